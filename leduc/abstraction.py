@@ -0,0 +1,205 @@
+import os
+import hashlib
+import numpy as np
+
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+from leduc.card import Card
+from leduc.deck import NAME, card_id, encode
+
+BUCKETS = (5, 10)
+BINS = 10
+
+
+def equity(hole, board, deck, hand_eval):
+    """Win probability (ties count half) against one random opponent card."""
+    public = [board] if board is not None else None
+    ours = hand_eval(hole, public)
+    wins = 0
+    dealt = (card_id(hole), card_id(board) if board is not None else -1)
+    opponents = [card for card in deck if card_id(card) not in dealt]
+    for card in opponents:
+        theirs = hand_eval(card, public)
+        wins += 1 if ours > theirs else .5 if ours == theirs else 0
+
+    return wins / len(opponents)
+
+
+_worker = {}
+
+
+def _init(deck, hand_eval, bins):
+    _worker['deck'] = deck
+    _worker['eval'] = hand_eval
+    _worker['bins'] = bins
+
+
+def _features(hand):
+    """Feature row of (hole, board); a board of None before the flop with a board still to come.
+
+    Post-flop the feature is the hand strength. Pre-flop it is the mean
+    hand strength over the boards to come followed by the cumulative
+    histogram of those strengths, so Euclidean distance between rows
+    tracks the earth mover's distance between equity distributions.
+    """
+    hole, board, future = hand
+    deck, hand_eval, bins = _worker['deck'], _worker['eval'], _worker['bins']
+    if not future:
+        return np.array([equity(hole, board, deck, hand_eval)])
+
+    strengths = [equity(hole, card, deck, hand_eval) for card in deck if card_id(card) != card_id(hole)]
+    histogram = np.histogram(strengths, bins=bins, range=(0, 1))[0] / len(strengths)
+    return np.concatenate([[np.mean(strengths)], np.cumsum(histogram)])
+
+
+def kmeans(points, k, seed=0, iterations=100):
+    """Lloyd's algorithm with k-means++ seeding; returns a cluster per point."""
+    rng = np.random.RandomState(seed)
+    k = min(k, len(np.unique(points, axis=0)))
+    centers = [points[rng.randint(len(points))]]
+    for _ in range(1, k):
+        distance = ((points[:, None] - np.array(centers)[None]) ** 2).sum(axis=2).min(axis=1)
+        centers.append(points[rng.choice(len(points), p=distance / distance.sum())])
+
+    centers = np.array(centers)
+    labels = None
+    for _ in range(iterations):
+        new = ((points[:, None] - centers[None]) ** 2).sum(axis=2).argmin(axis=1)
+        if labels is not None and (new == labels).all():
+            break
+        labels = new
+        for c in range(k):
+            if (labels == c).any():
+                centers[c] = points[labels == c].mean(axis=0)
+
+    return labels
+
+
+class Buckets:
+    """Card abstraction: maps (hole, board) to a bucket, numbered weakest first.
+
+    Handed to a State as `abstraction`, it replaces the cards in
+    `info_set()` with the bucket, so every hand in a bucket shares nodes.
+    The table is read-only and shared by every state that uses it.
+    """
+    def __init__(self, table, signature=''):
+        self.table = table
+        self.signature = signature
+
+    def bucket(self, hole, board=None):
+        return self.table[(NAME[hole], NAME[board] if board is not None else '')]
+
+    def info_set(self, state):
+        hole_card = state.cards[state.turn]
+        board_card = state.cards[state.num_players] if len(state.cards) > state.num_players \
+            and state.round > 0 else None
+        return f"b{self.bucket(hole_card, board_card)} || {str(state)}"
+
+    def __len__(self):
+        return len(set(self.table.values()))
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def save(self, path):
+        keys = list(self.table)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, holes=np.array([hole for hole, _ in keys]),
+                     boards=np.array([board for _, board in keys]),
+                     buckets=np.array(list(self.table.values()), dtype=np.int32),
+                     signature=np.array(self.signature))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            table = {(str(hole), str(board)): int(bucket) for hole, board, bucket in
+                     zip(data['holes'], data['boards'], data['buckets'])}
+            return cls(table, str(data['signature']))
+
+
+def signature(deck, hand_eval, buckets, bins, seed):
+    description = f"{sorted(NAME[card] for card in deck)} {hand_eval.__name__} {buckets} {bins} {seed}"
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def build(deck, hand_eval, buckets=BUCKETS, bins=BINS, workers=2, cache=None, seed=0):
+    """Cluster every (hole, board) of `deck` into buckets, `buckets[r]` of them in round r.
+
+    One entry of `buckets` means a game without a board (Kuhn). Features
+    are computed on a pool of `workers` processes. When `cache` is a path
+    the table is read from it if it was built with the same arguments,
+    and written to it otherwise.
+    """
+    deck = encode(deck)
+    key = signature(deck, hand_eval, buckets, bins, seed)
+    if cache is not None and os.path.exists(cache):
+        cached = Buckets.load(cache)
+        if cached.signature == key:
+            return cached
+
+    has_board = len(buckets) > 1
+    rounds = [[(hole, None, has_board) for hole in deck]]
+    if has_board:
+        rounds.append([(hole, board, False) for hole in deck for board in deck
+                       if card_id(board) != card_id(hole)])
+
+    hands = [hand for hands in rounds for hand in hands]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, mp_context=get_context('fork'), initializer=_init,
+                                 initargs=(deck, hand_eval, bins)) as pool:
+            features = list(pool.map(_features, hands, chunksize=max(1, len(hands) // (4 * workers))))
+    else:
+        _init(deck, hand_eval, bins)
+        features = [_features(hand) for hand in hands]
+
+    table = {}
+    start = 0
+    for hands, k in zip(rounds, buckets):
+        points = np.array(features[start:start + len(hands)])
+        start += len(hands)
+
+        labels = kmeans(points, k, seed)
+        # renumber so bucket ids grow with mean hand strength
+        strength = [points[labels == c, 0].mean() for c in range(labels.max() + 1)]
+        rank = np.argsort(np.argsort(strength))
+        for (hole, board, _), label in zip(hands, labels):
+            table[(NAME[hole], NAME[board] if board is not None else '')] = int(rank[label])
+
+    abstraction = Buckets(table, key)
+    if cache is not None:
+        abstraction.save(cache)
+    return abstraction
+
+
+def leduc_deck(ranks=13, suits=2):
+    """A Leduc deck with the top `ranks` ranks in each of `suits` suits."""
+    return [Card(rank, suit) for suit in range(1, suits + 1) for rank in range(14, 14 - ranks, -1)]
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    from leduc.monte import learn
+    from leduc.hand_eval import leduc_eval
+    from leduc.best_response import exact_exploitability
+
+    deck = leduc_deck(ranks=8)
+    cache = os.path.join(tempfile.mkdtemp(), 'buckets.npz')
+    start = time.perf_counter()
+    abstraction = build(deck, leduc_eval, buckets=(4, 8), cache=cache)
+    print(f'built {len(abstraction.table)} hands into buckets in {time.perf_counter() - start:.2f}s')
+    start = time.perf_counter()
+    build(deck, leduc_eval, buckets=(4, 8), cache=cache)
+    print(f'loaded from cache in {time.perf_counter() - start:.3f}s')
+
+    iterations = 20000
+    for name, used in [('lossless', None), ('bucketed', abstraction)]:
+        np.random.seed(0)
+        node_map = {i: {} for i in range(2)}
+        action_map = {i: {} for i in range(2)}
+        learn(iterations, deck, 3, node_map, action_map, abstraction=used)
+        exploit = exact_exploitability(deck, 3, node_map, action_map, abstraction=used)
+        print(f'{name}: {sum(len(nodes) for nodes in node_map.values())} info sets, '
+              f'exploitability {exploit:.4f} after {iterations} iterations')
@@ -0,0 +1,226 @@
+import numpy as np
+
+from tqdm import tqdm
+from leduc.deck import deal_table
+from leduc.node import MNode as Node
+from leduc.public import get_node
+from leduc.monte import STRAT_INTERVAL, default_rule, default_pruner
+from leduc.rules import get_rule
+
+
+def learn(iterations, cards, num_cards, node_map, action_map, batch_size=64,
+          rule=None, pruner=None):
+    """External sampling MCCFR over blocks of `batch_size` sampled deals.
+
+    Deals in a block walk the public tree together and only split where the
+    sampled actions differ, so the per-node work (taking actions, looking up
+    nodes, regret matching) is shared by every deal that reaches the node.
+    """
+    if len(cards) > 4:
+        from leduc.state import Leduc as State
+        from leduc.hand_eval import leduc_eval as eval
+    else:
+        from leduc.state import State
+        from leduc.hand_eval import kuhn_eval as eval
+
+    rule = get_rule(rule) or default_rule()
+    pruner = pruner or default_pruner()
+    all_combos = deal_table(cards, num_cards)
+    num_players = len(node_map)
+
+    with tqdm(total=iterations, desc="learning") as progress:
+        for start in range(1, iterations + 1, batch_size):
+            block = range(start, min(start + batch_size, iterations + 1))
+            choices = np.random.choice(len(all_combos), len(block))
+            deals = [all_combos[c] for c in choices]
+            sampled = [deals[k] for k, i in enumerate(block) if i % STRAT_INTERVAL == 0]
+
+            for player in range(num_players):
+                state = State(deals[0], num_players, eval)
+                pruner.step(block[-1])
+                if sampled:
+                    update_strategy(player, state, sampled, node_map, action_map,
+                                    weight=rule.strategy_weight(block[-1]),
+                                    pruner=pruner)
+
+                accumulate_regrets(player, state, deals, node_map, action_map,
+                                   pruner=pruner, floor=rule.floor)
+
+            for i in block:
+                rule.discount(node_map, i)
+            progress.update(len(block))
+
+
+def gather(state, deals, node_map, action_map):
+    """Look up the nodes for every deal at a public state.
+
+    Returns the legal actions, the distinct nodes, the node row of each deal
+    and the current strategy of each deal as a (deals, actions) array.
+    """
+    rows = np.empty(len(deals), dtype=int)
+    index = {}
+    nodes = []
+    for k, deal in enumerate(deals):
+        state.cards = deal
+        info_set = state.info_set()
+        if info_set not in index:
+            _, node, valid_actions = get_node(state, node_map, action_map, Node)
+            index[info_set] = len(nodes)
+            nodes.append(node)
+        rows[k] = index[info_set]
+
+    regrets = np.array([[node.regret_sum[a] for a in valid_actions] for node in nodes],
+                       dtype=float)
+    positive = np.maximum(regrets, 0)
+    norm = positive.sum(axis=1, keepdims=True)
+    strategy = np.divide(positive, norm, out=np.full_like(positive, 1 / len(valid_actions)),
+                         where=norm > 0)
+
+    return valid_actions, nodes, rows, strategy[rows]
+
+
+def sample(strategy):
+    cdf = strategy.cumsum(axis=1)
+    draws = np.random.rand(len(strategy), 1) * cdf[:, -1:]
+    return np.minimum((draws >= cdf).sum(axis=1), strategy.shape[1] - 1)
+
+
+def masks(nodes, rows, num_actions, pruner):
+    if pruner is None:
+        return np.zeros((len(rows), num_actions), dtype=bool)
+
+    bits = np.array([pruner.mask(node) for node in nodes])[rows]
+    return (bits[:, None] >> np.arange(num_actions)) & 1 == 1
+
+
+def terminal_utility(state, deals):
+    if state.num_players - sum(p.folded for p in state.players) == 1:
+        return np.tile(state.utility(), (len(deals), 1))
+
+    utils = np.empty((len(deals), state.num_players))
+    for k, deal in enumerate(deals):
+        state.cards = deal
+        utils[k] = state.utility()
+
+    return utils
+
+
+def update_strategy(traverser, state, deals, node_map, action_map, weight=1,
+                    pruner=None):
+    if state.terminal:
+        return
+
+    valid_actions, nodes, rows, strategy = gather(state, deals, node_map, action_map)
+
+    if state.turn == traverser:
+        choice = sample(strategy)
+        sums = np.zeros((len(nodes), len(valid_actions)))
+        np.add.at(sums, (rows, choice), weight)
+        for node, row in zip(nodes, sums):
+            for action, value in zip(valid_actions, row):
+                if value:
+                    node.strategy_sum[action] += value
+
+        for index in np.unique(choice):
+            group = [deals[k] for k in np.flatnonzero(choice == index)]
+            new_state = state.take(valid_actions[index], deep=True)
+            update_strategy(traverser, new_state, group, node_map, action_map,
+                            weight, pruner)
+
+    else:
+        pruned = masks(nodes, rows, len(valid_actions), pruner)
+        for index, action in enumerate(valid_actions):
+            keep = np.flatnonzero(~pruned[:, index])
+            if pruner is not None:
+                pruner.skipped += len(deals) - len(keep)
+            if len(keep) == 0:
+                continue
+
+            new_state = state.take(action, deep=True)
+            update_strategy(traverser, new_state, [deals[k] for k in keep],
+                            node_map, action_map, weight, pruner)
+
+
+def accumulate_regrets(traverser, state, deals, node_map, action_map,
+                       pruner=None, floor=None):
+    if state.terminal:
+        return terminal_utility(state, deals)
+
+    turn = state.turn
+    valid_actions, nodes, rows, strategy = gather(state, deals, node_map, action_map)
+    num_actions = len(valid_actions)
+
+    if turn == traverser:
+        util = np.zeros((len(deals), num_actions, len(node_map)))
+        pruned = masks(nodes, rows, num_actions, pruner)
+
+        for index, action in enumerate(valid_actions):
+            keep = np.flatnonzero(~pruned[:, index])
+            if pruner is not None:
+                pruner.skipped += len(deals) - len(keep)
+            if len(keep) == 0:
+                continue
+
+            new_state = state.take(action, deep=True)
+            util[keep, index] = accumulate_regrets(traverser, new_state,
+                                                   [deals[k] for k in keep],
+                                                   node_map, action_map,
+                                                   pruner=pruner, floor=floor)
+
+        node_util = np.einsum('ka,kap->kp', strategy, util)
+        regrets = np.where(pruned, 0, util[:, :, turn] - node_util[:, turn:turn + 1])
+
+        deltas = np.zeros((len(nodes), num_actions))
+        explored = np.zeros((len(nodes), num_actions), dtype=int)
+        np.add.at(deltas, rows, regrets)
+        np.add.at(explored, rows, ~pruned)
+
+        for node, delta, visits in zip(nodes, deltas, explored):
+            for index, action in enumerate(valid_actions):
+                if visits[index] == 0:
+                    continue
+
+                regret = node.regret_sum[action] + delta[index]
+                if floor is not None and regret < floor:
+                    regret = floor
+                node.regret_sum[action] = regret
+
+                if pruner is not None:
+                    pruner.visited += visits[index]
+                    pruner.update(node, index, regret)
+
+        return node_util
+
+    else:
+        choice = sample(strategy)
+        util = np.empty((len(deals), len(node_map)))
+        for index in np.unique(choice):
+            group = np.flatnonzero(choice == index)
+            new_state = state.take(valid_actions[index], deep=True)
+            util[group] = accumulate_regrets(traverser, new_state,
+                                             [deals[k] for k in group],
+                                             node_map, action_map,
+                                             pruner=pruner, floor=floor)
+
+        return util
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from leduc.card import Card
+    from leduc.monte import learn as mc_learn
+
+    ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    num_players = 2
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+    for name, train in [('sequential', mc_learn), ('batched', learn)]:
+        node_map = {i: {} for i in range(num_players)}
+        action_map = {i: {} for i in range(num_players)}
+        start = time.perf_counter()
+        train(ITERATIONS, cards, 3, node_map, action_map)
+        elapsed = time.perf_counter() - start
+
+        info_sets = sum(len(nodes) for nodes in node_map.values())
+        print(f'{name}: {ITERATIONS / elapsed:.0f} deals/sec, {info_sets} info sets')
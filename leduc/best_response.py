@@ -1,6 +1,8 @@
 import numpy as np
 
-from itertools import permutations
+
+from leduc.deck import deal_table
+from leduc.snapshot import freeze
 
 
 def exploitability(cards, num_cards, node_map, action_map):
@@ -12,9 +14,10 @@ def exploitability(cards, num_cards, node_map, action_map):
         from leduc.hand_eval import kuhn_eval as eval
 
     public_states, start = build_tree(cards, len(node_map))
+    node_map = freeze(node_map)
     exploit = 0 
     for player in range(len(node_map)):
-        v = expectimax(start, public_states, cards, player, node_map, 1)
+        v = expectimax(start, public_states, cards, player, node_map, action_map, 1)
         exploit += v
 
     return exploit/len(node_map)
@@ -50,10 +53,10 @@ def traverse_public(state, public):
     return
 
     
-def expectimax(public_state, state_map, cards, fixed, node_map, prob):
+def expectimax(public_state, state_map, cards, fixed, node_map, action_map, prob):
     if public_state.terminal:
         # normalize prob for everyone else
-        all_deals = [list(t) for t in set(permutations(cards, 2))]
+        all_deals = deal_table(cards, 2)
         util = np.zeros(len(node_map)) 
         for deal in all_deals:
             public_state.cards = deal
@@ -68,9 +71,10 @@ def expectimax(public_state, state_map, cards, fixed, node_map, prob):
     for action, state in state_map[public_state].items():
         if public_state.turn != fixed:
             # compute weight
-            new_prob = compute_weight(public_state, action, node_map, prob)
+            new_prob = compute_weight(public_state, action, node_map, action_map, prob)
             w[action] = new_prob
-        v_util[action] = expectimax(state, state_map, cards, fixed, node_map, new_prob)
+        v_util[action] = expectimax(state, state_map, cards, fixed, node_map, action_map,
+                                    new_prob)
         if public_state.turn == fixed and v_util[action] > v:
             v = v_util[action]
             
@@ -97,13 +101,105 @@ def normalize(map):
     return normed
 
 
-def compute_weight(state, action, node_map, prob):
+def compute_weight(state, action, node_map, action_map, prob):
     player = state.turn
     nodes = node_map[player]
-    next_state = state.take(action, deep=True)
+    public = action_map[player].get(str(state))
 
-    for info_set in nodes:
-        if str(state.history) in info_set:
+    if public is not None:
+        for info_set in public['info_sets']:
             prob *= nodes[info_set].avg_strategy()[action]
             
-    return prob
\ No newline at end of file
+    return prob
+
+def exact_exploitability(cards, num_cards, node_map, action_map, canonical=False,
+                         abstraction=None):
+    """Exact exploitability of a two-player average strategy.
+
+    Computes a full-width best response for each player, carrying every
+    deal as a NumPy vector, and averages the two best-response values.
+    Info sets missing from `node_map` play uniformly. A strategy learned
+    with a card `abstraction` is looked up through it, while the best
+    response sees the real cards.
+    """
+    from leduc.iso import deals as deal_list
+
+    deals, weights = deal_list(cards, num_cards, canonical)
+    prior = np.full(len(deals), 1 / len(deals)) if weights is None else np.array(weights)
+    return deal_exploitability(cards, deals, prior, node_map, action_map, canonical, abstraction)
+
+
+def sampled_exploitability(cards, num_cards, node_map, action_map, samples=30):
+    """Exploitability on `samples` random deals, a cheap estimate for progress checks.
+
+    The best responses see only the sampled deals, so small samples read high.
+    """
+    all_combos = deal_table(cards, num_cards)
+    deals = [all_combos[c] for c in np.random.choice(len(all_combos), min(samples, len(all_combos)),
+                                                     replace=False)]
+    return deal_exploitability(cards, deals, np.full(len(deals), 1 / len(deals)),
+                               node_map, action_map)
+
+
+def deal_exploitability(cards, deals, prior, node_map, action_map, canonical=False,
+                        abstraction=None):
+    if len(cards) > 4:
+        from leduc.state import Leduc as State
+        from leduc.hand_eval import leduc_eval as eval
+    else:
+        from leduc.state import State
+        from leduc.hand_eval import kuhn_eval as eval
+
+    frozen = freeze(node_map)
+    exploit = 0
+    for player in range(len(node_map)):
+        state = State(deals[0], len(node_map), eval, canonical)
+        values = best_response(state, player, deals, prior, frozen, action_map, abstraction)
+        exploit += (prior * values).sum()
+
+    return exploit / len(node_map)
+
+
+def best_response(state, player, deals, reach, node_map, action_map, abstraction=None):
+    """`player`'s best-response value in every deal; `reach` is the chance and opponent reach."""
+    if state.terminal:
+        values = np.empty(len(deals))
+        for w, deal in enumerate(deals):
+            state.cards = deal
+            values[w] = state.utility()[player]
+        return values
+
+    public = action_map[state.turn].get(str(state))
+    actions = public['actions'] if public is not None else state.valid_actions()
+    info_sets = []
+    for deal in deals:
+        state.cards = deal
+        info_sets.append(state.info_set() if abstraction is None or state.turn == player
+                         else abstraction.info_set(state))
+
+    values = np.empty((len(deals), len(actions)))
+    if state.turn == player:
+        for a, action in enumerate(actions):
+            values[:, a] = best_response(state.take(action, deep=True), player, deals, reach,
+                                         node_map, action_map, abstraction)
+
+        # pick the action with the best reach-weighted value over each info set
+        totals = {}
+        for info_set, row in zip(info_sets, values * reach[:, None]):
+            totals[info_set] = totals.get(info_set, 0) + row
+        best = np.array([totals[info_set].argmax() for info_set in info_sets])
+        return values[np.arange(len(deals)), best]
+
+    nodes = node_map[state.turn]
+    strategy = np.full(values.shape, 1 / len(actions))
+    for w, info_set in enumerate(info_sets):
+        node = nodes.get(info_set)
+        if node is not None:
+            average = node.avg_strategy()
+            strategy[w] = [average.get(action, 0) for action in actions]
+
+    for a, action in enumerate(actions):
+        values[:, a] = best_response(state.take(action, deep=True), player, deals,
+                                     reach * strategy[:, a], node_map, action_map, abstraction)
+
+    return (strategy * values).sum(axis=1)
@@ -0,0 +1,72 @@
+import os
+import pickle
+
+
+from leduc.deck import deal_table, decode, encode
+from leduc.snapshot import freeze
+
+VERSION = 3
+
+
+class Bundle:
+    """What Pluribus needs before its first action, precomputed.
+
+    Holds the deal table, the public action index and the frozen average
+    policy. The full blueprint, only needed once search starts, is
+    unpickled on first access.
+    """
+    def __init__(self, cards, num_cards, deals, action_map, policy, blueprint_path):
+        self.cards = cards
+        self.num_cards = num_cards
+        self.deals = deals
+        self.action_map = action_map
+        self.policy = policy
+        self.blueprint_path = blueprint_path
+        self._blueprint = None
+
+    @property
+    def blueprint(self):
+        if self._blueprint is None:
+            with open(self.blueprint_path, 'rb') as f:
+                self._blueprint = pickle.load(f)
+
+        return self._blueprint
+
+
+def build(node_map, action_map, cards, num_cards, path, blueprint_path, actions_path=None):
+    """Write a bundle; it goes stale when the blueprint or actions file it came from changes."""
+    deals = deal_table(cards, num_cards)
+    inputs = [p for p in (blueprint_path, actions_path) if p is not None]
+    data = {'version': VERSION, 'cards': encode(cards), 'num_cards': num_cards, 'deals': deals,
+            'action_map': action_map, 'policy': freeze(node_map),
+            'blueprint_path': blueprint_path,
+            'mtimes': {p: os.path.getmtime(p) for p in inputs}}
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+
+def load(path):
+    """Load a bundle, or return None if it is missing or its inputs changed since it was built."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except (TypeError, AttributeError):
+        # version 1 bundles pickled Card objects from before they were interned
+        return None
+    except (EOFError, pickle.UnpicklingError):
+        # truncated or corrupt, e.g. a build that was interrupted
+        return None
+
+    if data.get('version') != VERSION:
+        return None
+    for p, mtime in data['mtimes'].items():
+        if not os.path.exists(p) or os.path.getmtime(p) != mtime:
+            return None
+
+    blueprint_path = data['blueprint_path']
+    return Bundle(decode(data['cards']), data['num_cards'], data['deals'], data['action_map'],
+                  data['policy'], blueprint_path)
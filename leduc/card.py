@@ -1,5 +1,10 @@
 class Card:
-    """Inspired from pycfr card.py"""
+    """Inspired from pycfr card.py
+
+    A display view of the integer card ids in leduc.deck. Cards are interned,
+    so there is one object per (rank, suit), and a Card indexes the deck
+    lookup tables like its id does.
+    """
     SUIT_STRING = {
         1: "s",
         2: "h",
@@ -21,21 +26,41 @@ class Card:
         13: "K",
         14: "A"
     }
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    __slots__ = ('rank', 'suit', 'id')
+    _interned = {}
+
+    def __new__(cls, rank, suit):
+        card = cls._interned.get((rank, suit))
+        if card is None:
+            card = super().__new__(cls)
+            card.rank = rank
+            card.suit = suit
+            card.id = (rank - 2) * 4 + (suit - 1)
+            cls._interned[(rank, suit)] = card
+        return card
 
     def __repr__(self):
         return '{}{}'.format(self.CARD_STRING[self.rank], self.SUIT_STRING[self.suit])
 
     def __eq__(self, card):
-        return card.rank == self.rank
+        if not isinstance(card, Card):
+            return NotImplemented
+        return card.id == self.id
 
     def __lt__(self, card):
         return self.rank < card.rank
 
     def __hash__(self):
-        return hash(repr(self))
+        return self.id
+
+    def __index__(self):
+        return self.id
 
+    def __reduce__(self):
+        return Card, (self.rank, self.suit)
 
+    def __copy__(self):
+        return self
 
+    def __deepcopy__(self, memo):
+        return self
@@ -0,0 +1,21 @@
+import pytest
+import numpy as np
+
+from leduc.monte import learn
+from leduc.card import Card
+
+
+@pytest.fixture(scope='session')
+def blueprint():
+    """A two-player Leduc blueprint, trained once: (cards, node_map, action_map).
+
+    Tests that change the maps deepcopy them first.
+    """
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    state = np.random.get_state()
+    np.random.seed(0)
+    learn(3000, cards, 3, node_map, action_map)
+    np.random.set_state(state)
+    return cards, node_map, action_map
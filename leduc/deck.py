@@ -0,0 +1,59 @@
+import numpy as np
+
+from operator import index
+from itertools import permutations
+
+from leduc.card import Card
+
+# A card is an integer 0..51, card = (rank - 2) * 4 + (suit - 1), the
+# encoding of the Hold'em evaluator in hand_eval. Card objects index these
+# tables like their ids, so code written against ids also takes Cards.
+DECK = tuple(Card(rank, suit) for rank in range(2, 15) for suit in range(1, 5))
+RANK = tuple(card.rank for card in DECK)
+SUIT = tuple(card.suit for card in DECK)
+NAME = tuple(repr(card) for card in DECK)
+RANKS = np.array(RANK, dtype=np.int8)
+SUITS = np.array(SUIT, dtype=np.int8)
+
+
+def card_id(card):
+    """The id of a Card, an id, or a numpy integer."""
+    return index(card)
+
+
+def encode(cards):
+    return list(map(index, cards))
+
+
+def to_card(id):
+    return DECK[id]
+
+
+def decode(ids):
+    return [DECK[id] for id in ids]
+
+
+def deal_table(cards, num_cards):
+    """Every ordered deal of `num_cards` from `cards`, as lists of ids."""
+    return [list(deal) for deal in dict.fromkeys(permutations(encode(cards), num_cards))]
+
+
+if __name__ == '__main__':
+    import time
+    from leduc.hand_eval import leduc_eval
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    objects = [list(t) for t in set(permutations(cards, 3))]
+    ids = deal_table(cards, 3)
+    print(f'{len(ids)} deals, e.g. {ids[0]} = {decode(ids[0])}')
+
+    n = 200
+    for name, deals in [('Card', objects), ('id', ids)]:
+        start = time.perf_counter()
+        for _ in range(n):
+            for deal in deals:
+                leduc_eval(deal[0], deal[2:])
+                leduc_eval(deal[1], deal[2:])
+                f'{NAME[deal[0]]} |{NAME[deal[2]]}| [[], []]'
+        elapsed = time.perf_counter() - start
+        print(f'{name}: {n * len(deals) / elapsed:,.0f} showdowns and info sets/s')
@@ -0,0 +1,327 @@
+import os
+import time
+import zlib
+import threading
+import numpy as np
+
+from multiprocessing import AuthenticationError, get_context
+from multiprocessing.connection import Listener, Client
+
+from leduc.node import MNode as Node
+from leduc.public import get_node
+from leduc.iso import deals as deal_list
+from leduc.best_response import build_tree
+from leduc.monte import STRAT_INTERVAL, update_strategy, accumulate_regrets
+from leduc.rules import CFR, get_rule
+
+# connections unpickle what they receive, so there is deliberately no default key
+AUTHKEY_ENV = 'LEDUC_AUTHKEY'
+
+
+def get_authkey(authkey=None):
+    """`authkey` as bytes, falling back to the LEDUC_AUTHKEY environment variable."""
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f'an authkey is required: pass --authkey or set {AUTHKEY_ENV}')
+
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class Shard:
+    """One slice of the regret and strategy tables, keyed by (player, info_set)."""
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def pull(self, keys):
+        with self.lock:
+            return {key: (dict(self.entries[key][2]), dict(self.entries[key][3]))
+                    for key in keys if key in self.entries}
+
+    def push(self, deltas):
+        with self.lock:
+            for key, (public, actions, regret, strategy) in deltas.items():
+                if key not in self.entries:
+                    self.entries[key] = [public, list(actions), {a: 0 for a in actions},
+                                         {a: 0 for a in actions}]
+                entry = self.entries[key]
+                for action, delta in regret.items():
+                    entry[2][action] = entry[2].get(action, 0) + delta
+                for action, delta in strategy.items():
+                    entry[3][action] = entry[3].get(action, 0) + delta
+
+    def dump(self):
+        with self.lock:
+            return dict(self.entries)
+
+
+def serve(address, authkey, ready=None):
+    """Run a parameter-server shard until a client sends 'stop'.
+
+    Every connection gets its own thread; requests are (op, payload) pairs.
+    """
+    shard = Shard()
+    stopping = threading.Event()
+    listener = Listener(address, authkey=authkey)
+    if ready is not None:
+        ready.send(listener.address)
+        ready.close()
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except EOFError:
+                    return
+
+                if op == 'pull':
+                    conn.send(shard.pull(payload))
+                elif op == 'push':
+                    shard.push(payload)
+                    conn.send(True)
+                elif op == 'dump':
+                    conn.send(shard.dump())
+                elif op == 'stop':
+                    stopping.set()
+                    conn.send(True)
+                    # wake the accept loop
+                    Client(listener.address, authkey=authkey).close()
+                    return
+
+    while not stopping.is_set():
+        try:
+            conn = listener.accept()
+        except (AuthenticationError, OSError, EOFError):
+            # a client with the wrong key, or one that hung up mid-handshake
+            continue
+        if stopping.is_set():
+            conn.close()
+            break
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    listener.close()
+
+
+class RemoteTable:
+    """Client side of the sharded tables; requests go to every shard before any reply is read."""
+    def __init__(self, addresses, authkey):
+        self.conns = [Client(tuple(address), authkey=authkey) for address in addresses]
+
+    def shard(self, key):
+        player, info_set = key
+        return zlib.crc32(f'{player}|{info_set}'.encode()) % len(self.conns)
+
+    def split(self, items):
+        parts = [{} for _ in self.conns]
+        for key, value in items:
+            parts[self.shard(key)][key] = value
+        return parts
+
+    def request(self, op, parts):
+        for conn, part in zip(self.conns, parts):
+            conn.send((op, part))
+
+        return [conn.recv() for conn in self.conns]
+
+    def pull(self, keys):
+        snapshot = {}
+        for reply in self.request('pull', [list(p) for p in self.split((k, None) for k in keys)]):
+            snapshot.update(reply)
+        return snapshot
+
+    def push(self, deltas):
+        self.request('push', self.split(deltas.items()))
+
+    def dump(self):
+        entries = {}
+        for reply in self.request('dump', [None] * len(self.conns)):
+            entries.update(reply)
+        return entries
+
+    def stop(self):
+        self.request('stop', [None] * len(self.conns))
+        self.close()
+
+    def close(self):
+        for conn in self.conns:
+            conn.close()
+
+
+def work(addresses, cards, num_cards, num_players, iterations, worker=0, workers=1,
+         batch_size=64, rule=None, canonical=False, seed=None, authkey=None):
+    """Run this worker's share of `iterations` MCCFR iterations against the shards.
+
+    Worker `worker` plays global iterations worker + 1, worker + 1 + workers, ...
+    Each batch pulls the nodes its deals can reach, traverses locally and pushes
+    back the regret and strategy-sum deltas. Returns the iterations played.
+    """
+    if len(cards) > 4:
+        from leduc.state import Leduc as State
+        from leduc.hand_eval import leduc_eval as eval
+    else:
+        from leduc.state import State
+        from leduc.hand_eval import kuhn_eval as eval
+
+    np.random.seed(seed)
+    rule = get_rule(rule) or CFR()
+    all_combos, weights = deal_list(cards, num_cards, canonical)
+    public_states = list(build_tree(cards, num_players)[0])
+    for state in public_states:
+        state.canonical = canonical
+
+    remote = RemoteTable(addresses, get_authkey(authkey))
+    action_map = {i: {} for i in range(num_players)}
+    mine = list(range(worker + 1, iterations + 1, workers))
+    for start in range(0, len(mine), batch_size):
+        block = mine[start:start + batch_size]
+        deals = [all_combos[c] for c in np.random.choice(len(all_combos), len(block), p=weights)]
+
+        node_map = {i: {} for i in range(num_players)}
+        publics = {}
+        for state in public_states:
+            for deal in deals:
+                state.cards = deal
+                info_set, _, _ = get_node(state, node_map, action_map, Node)
+                publics[state.turn, info_set] = str(state)
+
+        snapshot = remote.pull(publics)
+        for (player, info_set), (regret, strategy) in snapshot.items():
+            node = node_map[player][info_set]
+            node.regret_sum.update(regret)
+            node.strategy_sum.update(strategy)
+        base = {key: (dict(node_map[key[0]][key[1]].regret_sum),
+                      dict(node_map[key[0]][key[1]].strategy_sum)) for key in publics}
+
+        for i, deal in zip(block, deals):
+            for player in range(num_players):
+                state = State(deal, num_players, eval, canonical)
+                if i % STRAT_INTERVAL == 0:
+                    update_strategy(player, state, node_map, action_map,
+                                    weight=rule.strategy_weight(i))
+                accumulate_regrets(player, state, node_map, action_map, floor=rule.floor)
+
+        deltas = {}
+        for (player, info_set), (regret, strategy) in base.items():
+            node = node_map[player][info_set]
+            regret = {a: v - regret.get(a, 0) for a, v in node.regret_sum.items()
+                      if v != regret.get(a, 0)}
+            strategy = {a: v - strategy.get(a, 0) for a, v in node.strategy_sum.items()
+                        if v != strategy.get(a, 0)}
+            if regret or strategy or (player, info_set) not in snapshot:
+                deltas[player, info_set] = (publics[player, info_set], node.actions, regret, strategy)
+        remote.push(deltas)
+
+    remote.close()
+    return len(mine)
+
+
+def collect(entries, node_map, action_map):
+    """Fill `node_map` and `action_map` from the entries dumped by the shards."""
+    for (player, info_set), (public, actions, regret, strategy) in entries.items():
+        entry = action_map[player].setdefault(public, {'actions': actions, 'info_sets': []})
+        node = Node(entry['actions'])
+        node.regret_sum = dict(regret)
+        node.strategy_sum = dict(strategy)
+        node_map[player][info_set] = node
+        entry['info_sets'].append(info_set)
+
+
+def start_shards(shards, authkey, host='127.0.0.1'):
+    ctx = get_context('fork')
+    processes = []
+    addresses = []
+    for _ in range(shards):
+        receiver, sender = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=serve, args=((host, 0), authkey, sender), daemon=True)
+        process.start()
+        addresses.append(receiver.recv())
+        processes.append(process)
+
+    return addresses, processes
+
+
+def learn(iterations, cards, num_cards, node_map, action_map, workers=2, shards=2,
+          batch_size=64, rule=None, canonical=False, seed=None):
+    """Distributed MCCFR with local worker and parameter-server processes.
+
+    Returns the wall-clock seconds spent training.
+    """
+    num_players = len(node_map)
+    seed = np.random.randint(2**31) if seed is None else seed
+    authkey = os.urandom(32)
+    addresses, servers = start_shards(shards, authkey)
+
+    ctx = get_context('fork')
+    start = time.perf_counter()
+    processes = [ctx.Process(target=work, args=(addresses, cards, num_cards, num_players,
+                                                iterations, w, workers, batch_size, rule,
+                                                canonical, seed + w, authkey))
+                 for w in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    seconds = time.perf_counter() - start
+
+    remote = RemoteTable(addresses, authkey)
+    collect(remote.dump(), node_map, action_map)
+    remote.stop()
+    for server in servers:
+        server.join()
+
+    return seconds
+
+
+def scaling(iterations, cards, num_cards, num_players=2, worker_counts=(1, 2, 4), shards=2):
+    """Throughput and parallel efficiency for a fixed amount of work."""
+    report = []
+    for workers in worker_counts:
+        node_map = {i: {} for i in range(num_players)}
+        action_map = {i: {} for i in range(num_players)}
+        seconds = learn(iterations, cards, num_cards, node_map, action_map,
+                        workers=workers, shards=shards)
+        throughput = iterations / seconds
+        base = report[0]['throughput'] if report else throughput
+        report.append({'workers': workers, 'seconds': seconds, 'throughput': throughput,
+                       'efficiency': throughput / (base * workers)})
+
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+    from leduc.card import Card
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    parser = argparse.ArgumentParser(description='Distributed MCCFR for Leduc')
+    commands = parser.add_subparsers(dest='command')
+    serve_args = commands.add_parser('serve', help='run one parameter-server shard')
+    serve_args.add_argument('--host', default='127.0.0.1')
+    serve_args.add_argument('--port', type=int, default=7655)
+    serve_args.add_argument('--authkey', help=f'shared secret, defaults to ${AUTHKEY_ENV}')
+    work_args = commands.add_parser('work', help='run one worker against remote shards')
+    work_args.add_argument('servers', help='host:port list, in the same order on every worker')
+    work_args.add_argument('--iterations', type=int, default=20000)
+    work_args.add_argument('--worker', type=int, default=0)
+    work_args.add_argument('--workers', type=int, default=1)
+    work_args.add_argument('--authkey', help=f'shared secret, defaults to ${AUTHKEY_ENV}')
+    bench_args = commands.add_parser('bench', help='measure scaling with local processes')
+    bench_args.add_argument('--iterations', type=int, default=4000)
+    bench_args.add_argument('--workers', default='1,2,4')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve((args.host, args.port), get_authkey(args.authkey))
+    elif args.command == 'work':
+        addresses = [(host, int(port)) for host, port in
+                     (address.rsplit(':', 1) for address in args.servers.split(','))]
+        work(addresses, cards, 3, 2, args.iterations, args.worker, args.workers,
+             authkey=get_authkey(args.authkey))
+    else:
+        args = bench_args.parse_args([]) if args.command is None else args
+        counts = [int(w) for w in args.workers.split(',')]
+        for row in scaling(args.iterations, cards, 3, worker_counts=counts):
+            print(f"{row['workers']} workers: {row['throughput']:.0f} iterations/sec, "
+                  f"efficiency {row['efficiency']:.0%}")
@@ -0,0 +1,151 @@
+import sys
+import numpy as np
+
+
+class PolicyTable:
+    """Read-only average strategy, one row per info set.
+
+    Row r holds the actions `actions[offsets[r]:offsets[r + 1]]` (ids into
+    `action_names`) with their quantized probabilities. Zero-probability
+    actions are not stored.
+    """
+    def __init__(self, ids, offsets, actions, probs, action_names):
+        self.ids = ids
+        self.offsets = offsets
+        self.actions = actions
+        self.probs = probs
+        self.action_names = action_names
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __contains__(self, key):
+        player, info_set = key
+        return info_set in self.ids[player]
+
+    def row(self, player, info_set):
+        return self.ids[player][info_set]
+
+    def distribution(self, row):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        probs = self.probs[start:end].astype(np.float64)
+        return self.actions[start:end], probs / probs.sum()
+
+    def strategy(self, player, info_set):
+        actions, probs = self.distribution(self.row(player, info_set))
+        return {self.action_names[a]: p for a, p in zip(actions, probs)}
+
+    def sample(self, player, info_set):
+        actions, probs = self.distribution(self.row(player, info_set))
+        return self.action_names[actions[np.random.choice(len(actions), p=probs)]]
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.actions.nbytes + self.probs.nbytes
+
+    def save(self, path):
+        players = sorted(self.ids)
+        keys = {f'keys_{p}': np.array(list(self.ids[p]), dtype=str) for p in players}
+        rows = {f'rows_{p}': np.array(list(self.ids[p].values()), dtype=np.int32)
+                for p in players}
+        np.savez_compressed(path, players=np.array(players), offsets=self.offsets,
+                            actions=self.actions, probs=self.probs,
+                            action_names=np.array(self.action_names, dtype=str),
+                            **keys, **rows)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            ids = {int(p): dict(zip(data[f'keys_{p}'].tolist(), data[f'rows_{p}'].tolist()))
+                   for p in data['players']}
+            return cls(ids, data['offsets'], data['actions'], data['probs'],
+                       data['action_names'].tolist())
+
+
+def quantize(probs, dtype):
+    if np.issubdtype(dtype, np.integer):
+        scale = np.iinfo(dtype).max
+        return np.rint(probs * scale).astype(dtype)
+
+    return probs.astype(dtype)
+
+
+def export(node_map, dtype=np.uint8):
+    """Freeze the average strategies of `node_map` into a PolicyTable."""
+    action_names = []
+    action_ids = {}
+    ids = {player: {} for player in node_map}
+    offsets = [0]
+    actions = []
+    probs = []
+
+    for player in node_map:
+        for info_set, node in node_map[player].items():
+            strategy = node.avg_strategy()
+            names = list(strategy.keys())
+            quantized = quantize(np.array(list(strategy.values()), dtype=np.float64), dtype)
+
+            for name, q in zip(names, quantized):
+                if q == 0:
+                    continue
+                if name not in action_ids:
+                    action_ids[name] = len(action_names)
+                    action_names.append(name)
+                actions.append(action_ids[name])
+                probs.append(q)
+
+            ids[player][info_set] = len(offsets) - 1
+            offsets.append(len(actions))
+
+    return PolicyTable(ids, np.array(offsets, dtype=np.int32),
+                       np.array(actions, dtype=np.uint8), np.array(probs, dtype=dtype),
+                       action_names)
+
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + size
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(obj.__dict__, seen)
+
+    return size
+
+
+def compare(table, node_map):
+    """Accuracy and memory of `table` against the full node map."""
+    errors = []
+    for player in node_map:
+        for info_set, node in node_map[player].items():
+            exact = node.avg_strategy()
+            approx = table.strategy(player, info_set)
+            errors.extend(abs(p - approx.get(a, 0)) for a, p in exact.items())
+
+    full_bytes = deep_sizeof(node_map)
+    table_bytes = table.nbytes + deep_sizeof(table.ids)
+    return {'max_error': float(np.max(errors)), 'mean_error': float(np.mean(errors)),
+            'full_bytes': full_bytes, 'table_bytes': table_bytes,
+            'array_bytes': table.nbytes, 'saved': 1 - table_bytes / full_bytes}
+
+
+if __name__ == '__main__':
+    import pickle
+
+    with open(sys.argv[1], 'rb') as f:
+        node_map = pickle.load(f)
+
+    for dtype in [np.uint8, np.float16]:
+        table = export(node_map, dtype)
+        print(np.dtype(dtype).name, compare(table, node_map))
+
+    if len(sys.argv) > 2:
+        export(node_map).save(sys.argv[2])
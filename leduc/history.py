@@ -0,0 +1,274 @@
+import os
+import glob
+import queue
+import struct
+import zipfile
+import threading
+import numpy as np
+
+from leduc.card import Card
+from leduc.deck import NAME, card_id
+
+CHUNK_SIZE = 10000
+
+
+def actions_of(state):
+    """(seat, round, public history, action) for every action taken in `state`."""
+    replay = type(state)(state.cards, state.num_players, state.eval)
+    actions = []
+    for round, taken in enumerate(state.history[:state.round + 1]):
+        for action in taken:
+            actions.append((replay.turn, round, str(replay), action))
+            replay.take(action)
+
+    return actions
+
+
+class Recorder:
+    """Buffers played hands and writes them as columnar .npz chunks.
+
+    Every `chunk_size` hands the buffer is handed to a background thread
+    that writes one file, so recording never waits on the disk. Per hand a
+    chunk stores the deal (card ids), payoffs and an offset into the
+    per-action columns: action, seat, round, public history, decision
+    latency in ms and the blueprint's probability of the action (NaN when
+    not recorded). Action names and public histories are stored once per
+    chunk and referenced by index. If a write fails the writer stops and
+    the error is raised from the next flush() or close().
+    """
+    def __init__(self, directory, chunk_size=CHUNK_SIZE, prefix=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.prefix = prefix if prefix is not None else f'hands-{os.getpid()}'
+        self.chunks = 0
+        self.hands = []
+        self.queue = queue.Queue(maxsize=4)
+        self.error = None
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    def record(self, deal, actions, payoffs, latency=None, blueprint=None, players=None):
+        """Add one hand.
+
+        `latency` and `blueprint` map action indices to values; `players`
+        says which player sat in each seat (seat order by default).
+        """
+        players = list(range(len(payoffs))) if players is None else list(players)
+        self.hands.append(([card_id(card) for card in deal], actions, list(payoffs),
+                           latency or {}, blueprint or {}, players))
+        if len(self.hands) >= self.chunk_size:
+            self.flush()
+
+    def record_state(self, state, latency=None, blueprint=None, players=None):
+        self.record(state.cards, actions_of(state), state.utility(), latency, blueprint, players)
+
+    def flush(self):
+        if not self.hands:
+            return
+
+        hands, self.hands = self.hands, []
+        path = os.path.join(self.directory, f'{self.prefix}-{self.chunks:06d}.npz')
+        self.chunks += 1
+        self.put((path, columns(hands)))
+
+    def put(self, item):
+        while True:
+            self.check()
+            try:
+                self.queue.put(item, timeout=.1)
+                return
+            except queue.Full:
+                pass
+
+    def check(self):
+        if self.error is not None:
+            raise self.error
+        if not self.writer.is_alive():
+            raise RuntimeError('history writer has stopped')
+
+    def write(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            path, arrays = item
+            try:
+                with open(path + '.tmp', 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(path + '.tmp', path)
+            except Exception as e:
+                self.error = e
+                return
+
+    def close(self):
+        self.flush()
+        self.put(None)
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def columns(hands):
+    names, publics = {}, {}
+    offsets = [0]
+    action, seat, round, public, latency, blueprint = [], [], [], [], [], []
+    for _, actions, _, latencies, probs, _ in hands:
+        for index, (s, r, history, a) in enumerate(actions):
+            action.append(names.setdefault(a, len(names)))
+            public.append(publics.setdefault(history, len(publics)))
+            seat.append(s)
+            round.append(r)
+            latency.append(latencies.get(index, np.nan))
+            blueprint.append(probs.get(index, np.nan))
+        offsets.append(len(action))
+
+    return {'deals': np.array([deal for deal, *_ in hands], dtype=np.int8),
+            'payoffs': np.array([payoffs for _, _, payoffs, *_ in hands], dtype=np.float32),
+            'players': np.array([players for *_, players in hands], dtype=np.int8),
+            'offsets': np.array(offsets, dtype=np.int64),
+            'action': np.array(action, dtype=np.uint8),
+            'seat': np.array(seat, dtype=np.int8),
+            'round': np.array(round, dtype=np.int8),
+            'public': np.array(public, dtype=np.int32),
+            'latency': np.array(latency, dtype=np.float32),
+            'blueprint': np.array(blueprint, dtype=np.float32),
+            'names': np.array(list(names), dtype=str),
+            'publics': np.array(list(publics), dtype=str)}
+
+
+def open_chunk(path):
+    """Memory-map every array of an uncompressed .npz, as written by Recorder."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+
+            # skip the member's local header to reach the .npy bytes
+            f.seek(info.header_offset + 26)
+            name_size, extra_size = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_size + extra_size)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.zeros(shape, dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                         shape=shape, order='F' if fortran else 'C')
+
+    return arrays
+
+
+class History:
+    """Read-only view of every chunk in `directory`."""
+    def __init__(self, directory):
+        self.paths = sorted(glob.glob(os.path.join(directory, '*.npz')))
+        self.chunks = [open_chunk(path) for path in self.paths]
+
+    @property
+    def hands(self):
+        return sum(len(chunk['payoffs']) for chunk in self.chunks)
+
+    def seat_ev(self):
+        """Mean payoff per seat."""
+        payoffs = np.concatenate([chunk['payoffs'] for chunk in self.chunks])
+        return payoffs.mean(axis=0)
+
+    def player_ev(self):
+        """Mean payoff per player, whichever seat they played from."""
+        payoffs = np.concatenate([chunk['payoffs'] for chunk in self.chunks])
+        players = np.concatenate([chunk['players'] for chunk in self.chunks])
+        totals = np.zeros(payoffs.shape[1])
+        np.add.at(totals, players, payoffs)
+        return totals / len(payoffs)
+
+    def action_counts(self, seat=None, round=None):
+        counts = {}
+        for chunk in self.chunks:
+            mask = np.ones(len(chunk['action']), dtype=bool)
+            if seat is not None:
+                mask &= chunk['seat'] == seat
+            if round is not None:
+                mask &= chunk['round'] == round
+
+            codes = np.bincount(chunk['action'][mask], minlength=len(chunk['names']))
+            for name, count in zip(chunk['names'], codes):
+                counts[str(name)] = counts.get(str(name), 0) + int(count)
+
+        return {name: count for name, count in counts.items() if count}
+
+    def info_set_frequencies(self, seat=None):
+        """Action frequencies per (hole card, board, public history) of the acting seat."""
+        table = {}
+        for chunk in self.chunks:
+            num_players = chunk['payoffs'].shape[1]
+            hand = np.repeat(np.arange(len(chunk['payoffs'])), np.diff(chunk['offsets']))
+            hole = chunk['deals'][hand, chunk['seat']]
+            if chunk['deals'].shape[1] > num_players:
+                board = np.where(chunk['round'] > 0, chunk['deals'][hand, num_players], -1)
+            else:
+                board = np.full(len(hand), -1)
+
+            keys = np.stack([hole, board, chunk['public'], chunk['action']], axis=1)
+            if seat is not None:
+                keys = keys[chunk['seat'] == seat]
+            rows, counts = np.unique(keys, axis=0, return_counts=True)
+            for (h, b, public, action), count in zip(rows, counts):
+                key = (NAME[h], NAME[b] if b >= 0 else '', str(chunk['publics'][public]))
+                actions = table.setdefault(key, {})
+                name = str(chunk['names'][action])
+                actions[name] = actions.get(name, 0) + int(count)
+
+        return {key: {a: n / sum(actions.values()) for a, n in actions.items()}
+                for key, actions in table.items()}
+
+    def latency(self):
+        """Recorded decision latencies in ms."""
+        latency = np.concatenate([chunk['latency'] for chunk in self.chunks])
+        return latency[~np.isnan(latency)]
+
+    def disagreement(self):
+        """Mean probability the blueprint gave to actions it did not pick, over recorded decisions."""
+        probs = np.concatenate([chunk['blueprint'] for chunk in self.chunks])
+        probs = probs[~np.isnan(probs)]
+        return float(1 - probs.mean()) if len(probs) else float('nan')
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    from leduc.monte import learn
+    from leduc.match import BlueprintPolicy, UniformPolicy, run_match
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    learn(5000, cards, 3, node_map, action_map)
+
+    directory = tempfile.mkdtemp()
+    result = run_match([BlueprintPolicy(node_map, action_map), UniformPolicy()], cards, 3,
+                       100000, workers=1, chunk_size=20000, history=directory)
+    print(result)
+
+    start = time.perf_counter()
+    history = History(directory)
+    print(f'{history.hands} hands in {len(history.chunks)} chunks, '
+          f'{sum(os.path.getsize(p) for p in history.paths) / history.hands:.0f} bytes/hand')
+    print('EV per seat', history.seat_ev(), 'per player', history.player_ev())
+    print('seat 0 actions', history.action_counts(seat=0))
+    print(f'{len(history.info_set_frequencies())} info sets, '
+          f'queries took {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,54 @@
+from leduc.card import Card
+from leduc.deck import NAME, deal_table
+
+
+def relabel(cards):
+    """Rename suits in order of first appearance.
+
+    Works on Card objects and on integer card ids (leduc.deck).
+    Two lists with the same relabeling differ only by a suit permutation.
+    """
+    suits = {}
+    relabeled = []
+    for card in cards:
+        if isinstance(card, Card):
+            suit = suits.setdefault(card.suit, len(suits) + 1)
+            relabeled.append(Card(card.rank, suit))
+        else:
+            suit = suits.setdefault(card & 3, len(suits))
+            relabeled.append(card & ~3 | suit)
+
+    return relabeled
+
+
+def key(cards):
+    return tuple(NAME[card] for card in relabel(cards))
+
+
+def canonical_deals(cards, num_cards):
+    """One deal per suit isomorphism class, with the share of deals it stands for.
+
+    Sampling the representatives with `weights` deals the same games as
+    sampling every permutation uniformly, when suits do not affect payoffs.
+    """
+    classes = {}
+    total = 0
+    for deal in deal_table(cards, num_cards):
+        k = key(deal)
+        if k not in classes:
+            classes[k] = [deal, 0]
+        classes[k][1] += 1
+        total += 1
+
+    classes = [classes[k] for k in sorted(classes)]
+    deals = [deal for deal, _ in classes]
+    weights = [count / total for _, count in classes]
+    return deals, weights
+
+
+def deals(cards, num_cards, canonical=False):
+    """Deals to sample from and their probabilities (None for uniform)."""
+    if canonical:
+        return canonical_deals(cards, num_cards)
+
+    return deal_table(cards, num_cards), None
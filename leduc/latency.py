@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (.5, .95, .99)
+RESERVOIR = 10000
+
+# metric -> (Prometheus name, help)
+METRICS = {'latency_ms': ('leduc_decision_latency_ms', 'Decision latency in ms by decision type and phase.'),
+           'iterations': ('leduc_search_iterations', 'Search iterations run per decision.'),
+           'rollouts': ('leduc_search_rollouts', 'Search rollouts run per decision.')}
+
+
+class Histogram:
+    """Count, sum and max of every value, with quantiles over the last RESERVOIR."""
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+        self.recent = deque(maxlen=RESERVOIR)
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantiles(self, quantiles=QUANTILES):
+        if not self.recent:
+            return [float('nan')] * len(quantiles)
+        return [float(q) for q in np.quantile(self.recent, quantiles)]
+
+    def summary(self):
+        p50, p95, p99 = self.quantiles()
+        return {'count': self.count, 'mean': self.sum / self.count if self.count else float('nan'),
+                'p50': p50, 'p95': p95, 'p99': p99, 'max': self.max}
+
+
+class Latency:
+    """Latency histograms per (decision, phase), and iteration and rollout counts per decision.
+
+    Safe to read from a server thread while the game thread records.
+    """
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def add(self, metric, decision, phase, value):
+        with self.lock:
+            histogram = self.histograms.get((metric, decision, phase))
+            if histogram is None:
+                histogram = self.histograms[(metric, decision, phase)] = Histogram()
+            histogram.add(value)
+
+    def observe(self, decision, phase, ms):
+        self.add('latency_ms', decision, phase, ms)
+
+    @contextmanager
+    def time(self, decision, phase='total'):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(decision, phase, (time.perf_counter() - start) * 1000)
+
+    def search(self, decision, search):
+        """Record the phases and work of a finished search (monte.Search or resolve.FullWidthSearch)."""
+        for phase, ms in search.timings.items():
+            self.observe(decision, phase, ms)
+        self.add('iterations', decision, '', search.iterations)
+        self.add('rollouts', decision, '', search.rollouts)
+
+    def summary(self):
+        """{metric: {decision: {phase: {count, mean, p50, p95, p99, max}}}}.
+
+        Iteration and rollout counts have no phase: {metric: {decision: {...}}}.
+        """
+        with self.lock:
+            summary = {}
+            for (metric, decision, phase), histogram in sorted(self.histograms.items()):
+                if phase:
+                    summary.setdefault(metric, {}).setdefault(decision, {})[phase] = histogram.summary()
+                else:
+                    summary.setdefault(metric, {})[decision] = histogram.summary()
+            return summary
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self):
+        with self.lock:
+            items = sorted(self.histograms.items())
+
+        lines = []
+        for metric, (name, help) in METRICS.items():
+            rows = [(decision, phase, h) for (m, decision, phase), h in items if m == metric]
+            if not rows:
+                continue
+
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} summary']
+            for decision, phase, histogram in rows:
+                labels = f'decision="{decision}"' + (f',phase="{phase}"' if phase else '')
+                for q, value in zip(QUANTILES, histogram.quantiles()):
+                    lines.append(f'{name}{{{labels},quantile="{q}"}} {value}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write JSON to a .json path and Prometheus text to any other."""
+        text = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        with open(path + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+    def __repr__(self):
+        lines = []
+        for decision, phases in self.summary().get('latency_ms', {}).items():
+            for phase, s in phases.items():
+                lines.append(f'{decision}/{phase}: {s["count"]} decisions, p50 {s["p50"]:.2f}ms, '
+                             f'p95 {s["p95"]:.2f}ms, p99 {s["p99"]:.2f}ms, max {s["max"]:.2f}ms')
+        return '\n'.join(lines)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        latency = self.server.latency
+        if self.path == '/metrics':
+            body, kind = latency.to_prometheus(), 'text/plain; version=0.0.4'
+        elif self.path == '/latency.json':
+            body, kind = latency.to_json(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', kind)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LatencyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(latency, address=('127.0.0.1', 9108)):
+    """Serve `latency` over HTTP: Prometheus text at /metrics, JSON at /latency.json."""
+    server = LatencyServer(address, Handler)
+    server.latency = latency
+    return server
+
+
+def serve(latency, address=('127.0.0.1', 9108)):
+    """Start make_server on a daemon thread; returns the server."""
+    server = make_server(latency, address)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    import sys
+    from itertools import permutations
+    from leduc.card import Card
+    from leduc.monte import learn, Search
+    from leduc.resolve import FullWidthSearch
+    from leduc.state import Leduc as State
+    from leduc.hand_eval import leduc_eval
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    learn(5000, cards, 3, node_map, action_map)
+
+    deals = [list(t) for t in permutations(cards, 3)]
+    latency = Latency()
+    for k in range(10):
+        # half the searches start at the first round, where leaves need rollouts
+        state = State(deals[np.random.choice(len(deals))], 2, leduc_eval)
+        if k % 2:
+            state.take('C').take('C')
+        for name, search in [('sampled', Search(state, node_map, action_map, cards, 3, iterations=200)),
+                             ('full_width', FullWidthSearch(state, node_map, action_map, cards, 3))]:
+            with latency.time(f'search_{name}'):
+                search.search()
+            latency.search(f'search_{name}', search)
+
+    print(latency)
+    print(latency.to_prometheus())
+    if len(sys.argv) > 1:
+        latency.write(sys.argv[1])
+        print(f'wrote {sys.argv[1]}')
@@ -0,0 +1,229 @@
+import time
+import numpy as np
+
+from itertools import permutations
+from multiprocessing import Pool
+
+from leduc.deck import deal_table, encode
+from leduc.snapshot import freeze
+
+
+def pot(state):
+    return sum(player.bets for player in state.players)
+
+
+def showdown(state, seat, deal):
+    """1 for a win, .5 for a tie and 0 for a loss of `seat` at a showdown on `deal`."""
+    board = [deal[state.num_players]] if len(deal) > state.num_players else None
+    ours = state.eval(deal[seat], board)
+    theirs = state.eval(deal[1 - seat], board)
+    return 1. if ours > theirs else .5 if ours == theirs else 0.
+
+
+class LocalBestResponse:
+    """Greedy one-step responder to a fixed two-player policy (Lisy & Bowling, 2017).
+
+    The responder tracks the worlds (opponent hole card and board) that fit
+    what its seat has seen, weighted by the policy's probability of the
+    opponent's actions in each. At each of its decisions it values folding,
+    calling and raising as if the hand were then checked down, with the
+    opponent folding to a raise as often as its policy says, and takes the
+    best. Any fixed responder wins at most the best response value, so its
+    mean winnings are a lower bound on exploitability.
+    """
+    def __init__(self, node_map, action_map, abstraction=None):
+        self.node_map = node_map
+        self.action_map = action_map
+        self.key = abstraction.info_set if abstraction is not None else lambda state: state.info_set()
+
+    def strategy(self, state):
+        """The opponent's action probabilities at `state`, with the cards of `state`."""
+        node = self.node_map[state.turn].get(self.key(state))
+        if node is not None:
+            return node.avg_strategy()
+
+        public = self.action_map[state.turn].get(str(state))
+        actions = public['actions'] if public is not None else state.valid_actions()
+        return {action: 1 / len(actions) for action in actions}
+
+    def worlds(self, deal, seat, cards):
+        """Every deal that `seat` cannot tell apart from `deal` before the board is dealt."""
+        deal = encode(deal)
+        hidden = [card for card in encode(cards) if card != deal[seat]]
+        worlds = []
+        for rest in permutations(hidden, len(deal) - 1):
+            world = list(rest)
+            world.insert(seat, deal[seat])
+            worlds.append(world)
+
+        return worlds
+
+    def play(self, deal, seat, cards, State, eval):
+        """Play one hand from `seat`; returns the responder's payoff."""
+        state = State(deal, 2, eval)
+        worlds = self.worlds(deal, seat, cards)
+        weights = np.ones(len(worlds))
+        revealed = False
+
+        while not state.terminal:
+            if state.round > 0 and not revealed and len(deal) > state.num_players:
+                board = state.cards[state.num_players]
+                keep = np.array([world[state.num_players] == board for world in worlds])
+                worlds = [world for world, k in zip(worlds, keep) if k]
+                weights = weights[keep]
+                revealed = True
+
+            if state.turn == seat:
+                action = self.respond(state, seat, worlds, weights / weights.sum())
+            else:
+                node = self.node_map[state.turn].get(self.key(state))
+                if node is not None:
+                    action = node.sample()
+                else:
+                    actions = list(self.strategy(state))
+                    action = actions[np.random.choice(len(actions))]
+
+                likelihood = np.array([self.probability(state, world, action) for world in worlds])
+                if (weights * likelihood).sum() > 0:
+                    weights = weights * likelihood
+
+            state.take(action)
+
+        return state.utility()[seat]
+
+    def probability(self, state, world, action):
+        cards = state.cards
+        state.cards = world
+        probability = self.strategy(state).get(action, 0)
+        state.cards = cards
+        return probability
+
+    def respond(self, state, seat, worlds, weights):
+        wins = np.array([showdown(state, seat, world) for world in worlds])
+        best, value = None, -np.inf
+        for action in state.valid_actions():
+            after = state.take(action, deep=True)
+            mine = after.players[seat].bets
+            if action == 'F':
+                estimate = -state.players[seat].bets
+            elif 'R' not in action or after.terminal:
+                estimate = weights @ wins * pot(after) - mine
+            else:
+                # the opponent folds or calls; re-raises are not looked ahead
+                folds = weights * [self.probability(after, world, 'F') for world in worlds]
+                calls = weights - folds
+                called = after.take('C', deep=True)
+                estimate = folds.sum() * (pot(after) - mine) + \
+                    calls @ wins * pot(called) - calls.sum() * called.players[seat].bets
+
+            if estimate > value:
+                best, value = action, estimate
+
+        return best
+
+
+_worker = {}
+
+
+def _init(node_map, action_map, cards, num_cards, abstraction):
+    if len(cards) > 4:
+        from leduc.state import Leduc as State
+        from leduc.hand_eval import leduc_eval as eval
+    else:
+        from leduc.state import State
+        from leduc.hand_eval import kuhn_eval as eval
+
+    _worker['responder'] = LocalBestResponse(node_map, action_map, abstraction)
+    _worker['cards'] = cards
+    _worker['State'] = State
+    _worker['eval'] = eval
+    _worker['all_combos'] = deal_table(cards, num_cards)
+
+
+def _play_chunk(args):
+    seed, num_deals = args
+    np.random.seed(seed)
+    responder, cards = _worker['responder'], _worker['cards']
+    all_combos = _worker['all_combos']
+    payoffs = np.zeros((num_deals, 2))
+    for k, c in enumerate(np.random.choice(len(all_combos), num_deals)):
+        for seat in range(2):
+            payoffs[k, seat] = responder.play(all_combos[c], seat, cards, _worker['State'],
+                                              _worker['eval'])
+
+    return payoffs
+
+
+class LBRResult:
+    def __init__(self, samples, seconds):
+        self.samples = samples
+        self.hands = samples.size
+        self.seconds = seconds
+
+    @property
+    def value(self):
+        """Estimated lower bound on exploitability, in chips per hand."""
+        return float(self.samples.mean())
+
+    def seat_values(self):
+        return self.samples.mean(axis=0)
+
+    def confidence(self, z=1.96):
+        if len(self.samples) < 2:
+            return float('inf')
+
+        return float(z * self.samples.mean(axis=1).std(ddof=1) / np.sqrt(len(self.samples)))
+
+    def summary(self):
+        return {'lbr': self.value, 'ci95': self.confidence(), 'hands': self.hands,
+                'seconds': self.seconds}
+
+    def __repr__(self):
+        return (f'{self.hands} hands in {self.seconds:.1f}s: exploitability >= '
+                f'{self.value:.4f} +/- {self.confidence():.4f} chips/hand')
+
+
+def lbr(node_map, action_map, cards, num_cards, deals, workers=None, chunk_size=1000,
+        seed=None, abstraction=None):
+    """Local best response against the average strategy of a two-player `node_map`.
+
+    Plays `deals` sampled deals with the responder in each seat. Info sets
+    missing from `node_map` play uniformly, as in exact_exploitability.
+    """
+    if len(node_map) != 2:
+        raise ValueError('Local best response is for two players')
+
+    seed = np.random.randint(2**31) if seed is None else seed
+    chunks = [(seed + i, min(chunk_size, deals - start)) for i, start in
+              enumerate(range(0, deals, chunk_size))]
+    initargs = (freeze(node_map), action_map, cards, num_cards, abstraction)
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init(*initargs)
+        results = [_play_chunk(chunk) for chunk in chunks]
+    else:
+        with Pool(workers, initializer=_init, initargs=initargs) as pool:
+            results = pool.map(_play_chunk, chunks)
+
+    return LBRResult(np.concatenate(results), time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    from leduc.card import Card
+    from leduc.monte import learn
+    from leduc.best_response import exact_exploitability
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    done = 0
+    for iterations in [0, 1000, 10000, 50000]:
+        learn(iterations - done, cards, 3, node_map, action_map)
+        done = iterations
+
+        start = time.perf_counter()
+        exact = exact_exploitability(cards, 3, node_map, action_map)
+        exact_seconds = time.perf_counter() - start
+        print(f'{iterations} iterations: exact {exact:.4f} in {exact_seconds:.2f}s, '
+              f'{lbr(node_map, action_map, cards, 3, 10000, seed=0)}')
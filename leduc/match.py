@@ -0,0 +1,262 @@
+import time
+import pickle
+import numpy as np
+
+from itertools import permutations
+from multiprocessing import Pool
+
+from leduc.deck import deal_table
+from leduc.snapshot import freeze
+
+
+class Policy:
+    name = 'policy'
+
+    def reset(self, state):
+        pass
+
+    def act(self, state):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return self.name
+
+
+class UniformPolicy(Policy):
+    name = 'uniform'
+
+    def act(self, state):
+        actions = state.valid_actions()
+        return actions[np.random.choice(len(actions))]
+
+
+class ReplayPolicy(Policy):
+    """Replays a recorded hand, picked at random from `hands` at every reset.
+
+    Raises that are no longer legal are played as calls, and a hand that
+    runs out of recorded actions checks or calls down.
+    """
+    name = 'replay'
+
+    def __init__(self, hands):
+        self.hands = hands
+        self.actions = []
+
+    def reset(self, state):
+        self.actions = list(self.hands[np.random.choice(len(self.hands))])
+
+    def act(self, state):
+        action = self.actions.pop(0) if self.actions else 'C'
+        if 'R' in action and not any('R' in a for a in state.valid_actions()):
+            return 'C'
+
+        return action
+
+
+class BlueprintPolicy(Policy):
+    name = 'blueprint'
+
+    def __init__(self, node_map, action_map, name=None):
+        self.node_map = freeze(node_map)
+        self.action_map = action_map
+        if name is not None:
+            self.name = name
+
+    def act(self, state):
+        info_set = state.info_set()
+        node = self.node_map[state.turn].get(info_set)
+        if node is None:
+            actions = state.valid_actions()
+            return actions[np.random.choice(len(actions))]
+
+        return node.sample()
+
+
+class SearchPolicy(BlueprintPolicy):
+    """Blueprint play that re-solves with `search` whenever a new round starts."""
+    name = 'search'
+
+    def __init__(self, node_map, action_map, cards, num_cards, search=None,
+                 name=None):
+        super().__init__(node_map, action_map, name)
+        if search is None:
+            from leduc.monte import Search as search
+
+        self.blueprint = node_map
+        self.frozen = self.node_map
+        self.cards = cards
+        self.num_cards = num_cards
+        self.search = search
+
+    def reset(self, state):
+        self.node_map = self.frozen
+        self.round = state.round
+
+    def act(self, state):
+        if state.round != self.round:
+            self.round = state.round
+            search = self.search(state, self.blueprint, self.action_map,
+                                 self.cards, self.num_cards)
+            self.node_map = freeze(search.search())
+
+        return super().act(state)
+
+
+def load_policy(path, action_path, name=None):
+    with open(path, 'rb') as f:
+        node_map = pickle.load(f)
+
+    with open(action_path, 'rb') as f:
+        action_map = pickle.load(f)
+
+    return BlueprintPolicy(node_map, action_map, name or path)
+
+
+def play_hand(policies, deal, State, eval, recorder=None, players=None):
+    state = State(deal, len(policies), eval)
+    for policy in policies:
+        policy.reset(state)
+
+    while state.terminal is False:
+        action = policies[state.turn].act(state)
+        state.take(action)
+
+    if recorder is not None:
+        recorder.record_state(state, players=players)
+
+    return state.utility()
+
+
+def play_deals(policies, deals, State, eval, duplicate=True, recorder=None):
+    """Play every deal once per seat arrangement.
+
+    Returns the payoff of each policy on each deal, averaged over the
+    arrangements when `duplicate` is set. Hands go to `recorder`, a
+    history.Recorder, when given.
+    """
+    num_players = len(policies)
+    if duplicate:
+        arrangements = list(permutations(range(num_players)))
+    else:
+        arrangements = [tuple(range(num_players))]
+
+    results = np.zeros((len(deals), num_players))
+    for k, deal in enumerate(deals):
+        for seats in arrangements:
+            payoffs = play_hand([policies[p] for p in seats], deal, State, eval, recorder, seats)
+            for seat, p in enumerate(seats):
+                results[k, p] += payoffs[seat]
+
+    return results / len(arrangements), len(arrangements)
+
+
+_worker = {}
+
+
+def _init(policies, cards, num_cards, duplicate, history=None):
+    if len(cards) > 4:
+        from leduc.state import Leduc as State
+        from leduc.hand_eval import leduc_eval as eval
+    else:
+        from leduc.state import State
+        from leduc.hand_eval import kuhn_eval as eval
+
+    _worker['policies'] = policies
+    _worker['State'] = State
+    _worker['eval'] = eval
+    _worker['all_combos'] = deal_table(cards, num_cards)
+    _worker['duplicate'] = duplicate
+    _worker['history'] = history
+
+
+def _play_chunk(args):
+    seed, num_deals = args
+    np.random.seed(seed)
+    all_combos = _worker['all_combos']
+    deals = [all_combos[c] for c in np.random.choice(len(all_combos), num_deals)]
+    if _worker['history'] is None:
+        return play_deals(_worker['policies'], deals, _worker['State'], _worker['eval'],
+                          _worker['duplicate'])
+
+    from leduc.history import Recorder
+
+    with Recorder(_worker['history'], prefix=f'match-{seed}') as recorder:
+        return play_deals(_worker['policies'], deals, _worker['State'], _worker['eval'],
+                          _worker['duplicate'], recorder)
+
+
+class MatchResult:
+    def __init__(self, names, samples, hands, seconds):
+        self.names = names
+        self.samples = samples
+        self.hands = hands
+        self.seconds = seconds
+
+    @property
+    def hands_per_sec(self):
+        return self.hands / self.seconds if self.seconds > 0 else float('inf')
+
+    def win_rate(self):
+        return self.samples.mean(axis=0)
+
+    def confidence(self, z=1.96):
+        if len(self.samples) < 2:
+            return np.full(len(self.names), float('inf'))
+
+        return z * self.samples.std(axis=0, ddof=1) / np.sqrt(len(self.samples))
+
+    def summary(self):
+        return {name: {'win_rate': float(rate), 'ci95': float(ci)} for
+                name, rate, ci in zip(self.names, self.win_rate(), self.confidence())}
+
+    def __repr__(self):
+        lines = [f'{self.hands} hands in {self.seconds:.1f}s ({self.hands_per_sec:.0f} hands/sec)']
+        for name, rate, ci in zip(self.names, self.win_rate(), self.confidence()):
+            lines.append(f'{name}: {rate:+.4f} +/- {ci:.4f} chips/hand')
+        return '\n'.join(lines)
+
+
+def run_match(policies, cards, num_cards, deals, workers=None, duplicate=True,
+              chunk_size=1000, seed=None, history=None):
+    """Play `deals` sampled deals between `policies`, one seat per policy.
+
+    With `duplicate` every deal is replayed under every seat arrangement so
+    card luck cancels out of the comparison. Payoffs are in chips per hand.
+    Every hand is logged to the `history` directory when given.
+    """
+    seed = np.random.randint(2**31) if seed is None else seed
+    chunks = [(seed + i, min(chunk_size, deals - start)) for i, start in
+              enumerate(range(0, deals, chunk_size))]
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init(policies, cards, num_cards, duplicate, history)
+        results = [_play_chunk(chunk) for chunk in chunks]
+    else:
+        with Pool(workers, initializer=_init,
+                  initargs=(policies, cards, num_cards, duplicate, history)) as pool:
+            results = pool.map(_play_chunk, chunks)
+    seconds = time.perf_counter() - start
+
+    samples = np.concatenate([r for r, _ in results])
+    hands = sum(len(r) * n for r, n in results)
+
+    return MatchResult([repr(p) for p in policies], samples, hands, seconds)
+
+
+if __name__ == '__main__':
+    import sys
+    from leduc.card import Card
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    if len(sys.argv) > 2:
+        blueprint = load_policy(sys.argv[1], sys.argv[2], name='blueprint')
+    else:
+        from leduc.monte import learn
+
+        node_map = {i: {} for i in range(2)}
+        action_map = {i: {} for i in range(2)}
+        learn(20000, cards, 3, node_map, action_map)
+        blueprint = BlueprintPolicy(node_map, action_map)
+
+    print(run_match([blueprint, UniformPolicy()], cards, 3, 20000))
@@ -0,0 +1,213 @@
+import os
+import csv
+import json
+import time
+import queue
+import threading
+
+from leduc.stopping import Converged, Exploitability
+
+FIELDS = ['iteration', 'seconds', 'iterations_per_sec', 'info_sets', 'mean_positive_regret',
+          'strategy_delta', 'exploitability']
+COUNTS = {'iteration', 'info_sets'}
+
+
+def mean_positive_regret(node_map):
+    total, count = 0., 0
+    for nodes in node_map.values():
+        for node in nodes.values():
+            for regret in node.regret_sum.values():
+                total += max(regret, 0)
+                count += 1
+
+    return total / count if count else 0.
+
+
+class Metrics:
+    """Training time series for learn(), written by a background thread.
+
+    Every `interval` iterations learn() calls record(), which computes a row
+    in the training thread and queues it; the writer thread appends it to
+    `path` as JSONL, or as CSV when the path ends in .csv. Exploitability is
+    estimated every `exploit_every` rows when `cards` are given, on
+    `samples` deals (exactly with samples=None), and is empty otherwise.
+    """
+    def __init__(self, path, interval=1000, cards=None, num_cards=None, samples=30,
+                 exploit_every=10):
+        self.path = path
+        self.interval = interval
+        self.csv = path.endswith('.csv')
+        self.exploit_every = exploit_every
+        self.exploitability = Exploitability(0, cards, num_cards, samples) if cards is not None else None
+        self.converged = Converged()
+        self.rows = 0
+        self.start = self.last = (0, time.perf_counter())
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    def reset(self):
+        self.converged.reset()
+        self.start = self.last = (0, time.perf_counter())
+
+    def record(self, i, node_map, action_map):
+        now = time.perf_counter()
+        last_i, last_t = self.last
+        self.last = (i, now)
+
+        self.converged.done(i, node_map, action_map)
+        exploitability = None
+        if self.exploitability is not None and self.rows % self.exploit_every == 0:
+            self.exploitability.done(i, node_map, action_map)
+            exploitability = float(self.exploitability.value)
+
+        delta = self.converged.delta
+        row = {'iteration': i,
+               'seconds': now - self.start[1],
+               'iterations_per_sec': (i - last_i) / (now - last_t) if now > last_t else None,
+               'info_sets': sum(len(nodes) for nodes in node_map.values()),
+               'mean_positive_regret': mean_positive_regret(node_map),
+               'strategy_delta': float(delta) if delta != float('inf') else None,
+               'exploitability': exploitability}
+        self.rows += 1
+        self.queue.put(row)
+        return row
+
+    def write(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, FIELDS) if self.csv else None
+            if writer is not None and new:
+                writer.writeheader()
+                f.flush()
+
+            while True:
+                row = self.queue.get()
+                if row is None:
+                    return
+
+                if writer is not None:
+                    writer.writerow({k: '' if v is None else v for k, v in row.items()})
+                else:
+                    f.write(json.dumps(row) + '\n')
+                f.flush()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse(line, header=None):
+    """One row of a metrics file; `header` is the CSV header, None for JSONL."""
+    if header is None:
+        return json.loads(line)
+
+    row = {}
+    for field, value in zip(header, next(csv.reader([line]))):
+        row[field] = None if value == '' else int(value) if field in COUNTS else float(value)
+    return row
+
+
+def read(path):
+    with open(path, newline='') as f:
+        lines = [line for line in f.read().splitlines() if line]
+
+    if path.endswith('.csv'):
+        header = next(csv.reader(lines[:1]), None)
+        return [parse(line, header) for line in lines[1:]]
+    return [parse(line) for line in lines]
+
+
+def summarize(rows):
+    if not rows:
+        return {'rows': 0}
+
+    last = rows[-1]
+    exploits = [row['exploitability'] for row in rows if row['exploitability'] is not None]
+    return {'rows': len(rows),
+            'iterations': last['iteration'],
+            'seconds': last['seconds'],
+            'iterations_per_sec': last['iteration'] / last['seconds'] if last['seconds'] else None,
+            'info_sets': last['info_sets'],
+            'mean_positive_regret': last['mean_positive_regret'],
+            'strategy_delta': last['strategy_delta'],
+            'exploitability': exploits[-1] if exploits else None,
+            'best_exploitability': min(exploits) if exploits else None}
+
+
+def format_row(row):
+    cells = []
+    for field in FIELDS:
+        value = row.get(field)
+        cells.append(f'{field}=' + ('-' if value is None else f'{value:.4g}' if isinstance(value, float)
+                                    else str(value)))
+    return ' '.join(cells)
+
+
+def tail(path, lines=10, follow=False, poll=1.):
+    """Print the last `lines` rows of `path`, then new rows as they arrive when `follow`."""
+    header = None
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            header = next(csv.reader([f.readline()]))
+
+        # only complete lines; the last row may be half written
+        *complete, pending = f.read().split('\n')
+        rows = [parse(line, header) for line in complete if line]
+        for row in rows[-lines:] if lines else []:
+            print(format_row(row), flush=True)
+
+        while follow:
+            chunk = f.read()
+            if not chunk:
+                time.sleep(poll)
+                continue
+
+            *complete, pending = (pending + chunk).split('\n')
+            for line in complete:
+                if line:
+                    print(format_row(parse(line, header)), flush=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Training metrics streams written by learn(metrics=...)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('tail', help='print the last rows, and follow with -f')
+    command.add_argument('path')
+    command.add_argument('-n', '--lines', type=int, default=10)
+    command.add_argument('-f', '--follow', action='store_true')
+    command = commands.add_parser('summary', help='summarize a finished or running stream')
+    command.add_argument('path')
+    command = commands.add_parser('train', help='train Leduc MCCFR while streaming metrics to path')
+    command.add_argument('path')
+    command.add_argument('--iterations', type=int, default=20000)
+    command.add_argument('--interval', type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == 'tail':
+        try:
+            tail(args.path, args.lines, args.follow)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'summary':
+        for key, value in summarize(read(args.path)).items():
+            print(f'{key}: {value}')
+    else:
+        from leduc.card import Card
+        from leduc.monte import learn
+
+        cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+        node_map = {i: {} for i in range(2)}
+        action_map = {i: {} for i in range(2)}
+        with Metrics(args.path, args.interval, cards, 3, samples=None, exploit_every=5) as metrics:
+            learn(args.iterations, cards, 3, node_map, action_map, metrics=metrics)
+        for key, value in summarize(read(args.path)).items():
+            print(f'{key}: {value}')
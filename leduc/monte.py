@@ -1,14 +1,18 @@
-import sys
-import json
+import time
 import numpy as np
 
 from copy import deepcopy
-from itertools import permutations
-from tqdm import tqdm
-from leduc.best_response import exploitability
 from leduc.node import MNode as Node
 from leduc.card import Card
 from leduc.hand_eval import leduc_eval
+from leduc.prune import Pruner
+from leduc.iso import deals
+from leduc.deck import RANK, deal_table
+from leduc.public import get_node
+from leduc.rules import LinearCFR, get_rule
+from leduc.snapshot import freeze
+from leduc.stopping import get_stop
+from leduc.table import pinned
 from leduc.util import expected_utility, bias
 
 STRAT_INTERVAL = 100
@@ -16,117 +20,156 @@ PRUNE_THRESH = 200
 DISCOUNT = 10
 LCFR_INTERVAL = 400
 REGRET_MIN = -300000
+BASELINE_DECAY = .5
+CONTINUATIONS = ["NULL", "F", "C", "4R"]
 
 
-def learn(iterations, cards, num_cards, node_map, action_map):
+def default_rule():
+    return LinearCFR(interval=DISCOUNT, until=LCFR_INTERVAL)
+
+
+def default_pruner():
+    return Pruner(threshold=REGRET_MIN, start=PRUNE_THRESH)
+
+
+def learn(iterations, cards, num_cards, node_map, action_map, rule=None,
+          pruner=None, canonical=False, baseline=False, stop=None, abstraction=None,
+          metrics=None):
+    """Run up to `iterations` MCCFR iterations; returns the number actually run.
+
+    `stop` is a stopping.Stop criterion (or a list of them) that can end
+    training early. `abstraction` (see abstraction.build) buckets the cards
+    in every info set. `metrics`, a metrics.Metrics, gets a row every
+    `metrics.interval` iterations.
+    """
     if len(cards) > 4:
         from leduc.state import Leduc as State
         from leduc.hand_eval import leduc_eval as eval
     else:
         from leduc.state import State
         from leduc.hand_eval import kuhn_eval as eval
-
-    all_combos = [list(t) for t in set(permutations(cards, num_cards))]
+    from tqdm import tqdm
+
+    rule = get_rule(rule) or default_rule()
+    pruner = pruner or default_pruner()
+    stop = get_stop(stop)
+    if stop is not None:
+        stop.reset()
+    if metrics is not None:
+        metrics.reset()
+    all_combos, weights = deals(cards, num_cards, canonical)
     num_players = len(node_map)
     for i in tqdm(range(1, iterations + 1), desc="learning"):
-        card = np.random.choice(len(all_combos))
-        for player in range(num_players):
-            state = State(all_combos[card], num_players, eval)
-            if i % STRAT_INTERVAL == 0:
-                update_strategy(player, state, node_map, action_map)
-
-            if i > PRUNE_THRESH:
-                chance = np.random.rand()
-                if chance < .05:
-                    accumulate_regrets(player, state, node_map, action_map)
-                else:
-                    accumulate_regrets(player, state, node_map, action_map,
-                                       prune=True)
-            else:
-                accumulate_regrets(player, state, node_map, action_map)
-
-        if i < LCFR_INTERVAL and i % DISCOUNT == 0:
-            discounted = (i/DISCOUNT)/(i/(DISCOUNT) + 1)
-            for player in node_map:
-                player_nodes = node_map[player]
-                for key, node in player_nodes.items():
-                    node.regret_sum = {key: value * discounted for
-                                       key, value in node.regret_sum.items()}
-                    node.strategy_sum = {key: value * discounted for
-                                         key, value in node.strategy_sum.items()}
-
-
-def update_strategy(traverser, state, node_map, action_map):
-    if state.terminal:
-        return
+        card = np.random.choice(len(all_combos), p=weights)
+        with pinned(node_map):
+            for player in range(num_players):
+                state = State(all_combos[card], num_players, eval, canonical, abstraction)
+                pruner.step(i)
+                if i % STRAT_INTERVAL == 0:
+                    update_strategy(player, state, node_map, action_map,
+                                    weight=rule.strategy_weight(i), pruner=pruner)
 
-    turn = state.turn
-    info_set = state.info_set()
+                accumulate_regrets(player, state, node_map, action_map,
+                                   pruner=pruner, floor=rule.floor, baseline=baseline)
 
-    if info_set not in action_map[turn]:
-        action_map[turn][info_set] = {'actions': state.valid_actions()}
+        rule.discount(node_map, i)
+        if metrics is not None and i % metrics.interval == 0:
+            metrics.record(i, node_map, action_map)
+        if stop is not None and i % stop.interval == 0 and stop.done(i, node_map, action_map):
+            return i
 
-    valid_actions = action_map[turn][info_set]['actions']
+    return iterations
 
-    if info_set not in node_map[turn]:
-        node_map[turn][info_set] = Node(valid_actions)
 
-    node = node_map[turn][info_set]
+def update_strategy(traverser, state, node_map, action_map, weight=1,
+                    pruner=None):
+    if state.terminal:
+        return
+
+    turn = state.turn
+    _, node, valid_actions = get_node(state, node_map, action_map, Node)
     strategy = node.strategy()
 
     if turn == traverser:
         actions = list(strategy.keys())
         probs = list(strategy.values())
         random_action = actions[np.random.choice(len(actions), p=probs)]
-        node.strategy_sum[random_action] += 1
+        node.strategy_sum[random_action] += weight
         new_state = state.take(random_action, deep=True)
 
-        update_strategy(traverser, new_state, node_map, action_map)
+        update_strategy(traverser, new_state, node_map, action_map, weight,
+                        pruner)
 
     else:
-        for action in valid_actions:
+        mask = pruner.mask(node) if pruner is not None else 0
+        for index, action in enumerate(valid_actions):
+            if mask >> index & 1:
+                pruner.skipped += 1
+                continue
+
             new_state = state.take(action, deep=True)
-            update_strategy(traverser, new_state, node_map, action_map)
+            update_strategy(traverser, new_state, node_map, action_map, weight,
+                            pruner)
 
 
-def accumulate_regrets(traverser, state, node_map, action_map, prune=False):
-    if state.terminal:
-        util = state.utility()
-        return util
+def baselined(node, strategy, action, value):
+    """VR-MCCFR estimate of an opponent node's value from one sampled action.
 
-    turn = state.turn
-    info_set = state.info_set()
+    Every action is valued at its baseline, and the sampled action is
+    corrected by its observed value, which keeps the estimate unbiased.
+    The sampled action's baseline then moves towards the observed value.
+    """
+    if node.baseline is None:
+        node.baseline = {}
+
+    zero = np.zeros(len(value))
+    expected = sum(prob * node.baseline.get(a, zero) for a, prob in strategy.items())
+    previous = node.baseline.get(action, zero)
+    node.baseline[action] = previous + BASELINE_DECAY * (value - previous)
 
-    if info_set not in action_map[turn]:
-        action_map[turn][info_set] = {'actions': state.valid_actions()}
+    return expected + value - previous
 
-    valid_actions = action_map[turn][info_set]['actions']
 
-    if info_set not in node_map[turn]:
-        node_map[turn][info_set] = Node(valid_actions)
+def accumulate_regrets(traverser, state, node_map, action_map, pruner=None,
+                       floor=None, baseline=False):
+    if state.terminal:
+        util = state.utility()
+        return util
 
-    node = node_map[turn][info_set]
+    turn = state.turn
+    _, node, valid_actions = get_node(state, node_map, action_map, Node)
     strategy = node.strategy()
 
     if turn == traverser:
         util = {a: 0 for a in valid_actions}
         node_util = np.zeros(len(node_map))
-        explored = set(valid_actions)
+        mask = pruner.mask(node) if pruner is not None else 0
+        explored = []
 
-        for action in valid_actions:
-            if prune is True and node.regret_sum[action] <= REGRET_MIN:
-                explored.remove(action)
-            else:
-                new_state = state.take(action, deep=True)
-                returned = accumulate_regrets(traverser, new_state, node_map,
-                                              action_map, prune=prune)
+        for index, action in enumerate(valid_actions):
+            if mask >> index & 1:
+                pruner.skipped += 1
+                continue
 
-                util[action] = returned[turn]
-                node_util += returned * strategy[action]
+            new_state = state.take(action, deep=True)
+            returned = accumulate_regrets(traverser, new_state, node_map,
+                                          action_map, pruner=pruner,
+                                          floor=floor, baseline=baseline)
+
+            util[action] = returned[turn]
+            node_util += returned * strategy[action]
+            explored.append(index)
 
-        for action in explored:
-            regret = util[action] - node_util[turn]
-            node.regret_sum[action] += regret
+        for index in explored:
+            action = valid_actions[index]
+            regret = node.regret_sum[action] + util[action] - node_util[turn]
+            if floor is not None and regret < floor:
+                regret = floor
+            node.regret_sum[action] = regret
+
+            if pruner is not None:
+                pruner.visited += 1
+                pruner.update(node, index, regret)
 
         return node_util
 
@@ -135,79 +178,103 @@ def accumulate_regrets(traverser, state, node_map, action_map, prune=False):
         probs = list(strategy.values())
         random_action = actions[np.random.choice(len(actions), p=probs)]
         new_state = state.take(random_action, deep=True)
-        return accumulate_regrets(traverser, new_state, node_map, action_map,
-                                  prune=prune)
+        returned = accumulate_regrets(traverser, new_state, node_map, action_map,
+                                      pruner=pruner, floor=floor, baseline=baseline)
+        if baseline:
+            return baselined(node, strategy, random_action, returned)
+        return returned
 
 class Search:
-    def __init__(self, state, blueprint, actions, cards, num_cards):                                  
+    def __init__(self, state, blueprint, actions, cards, num_cards, rule=None,
+                 pruner=None, baseline=False, iterations=1000, stop=None, belief=None):
+        """Re-solve the subgame at `state` for up to `iterations` iterations.
+
+        After search(), `iterations` holds the number actually run, fewer
+        when `stop` ended the search early, `rollouts` the number of leaf
+        rollouts and `timings` the ms spent in setup, regret iterations and
+        rollouts. With a `belief` (belief.Belief at
+        `state`) deals and rollouts are sampled from the players' ranges
+        instead of uniformly.
+        """
         self.blueprint = blueprint
+        self.budget = iterations
+        self.iterations = 0
+        self.rollouts = 0
+        self.timings = {}
+        self.stop = get_stop(stop)
+        self.rule = get_rule(rule) or default_rule()
+        self.pruner = pruner or default_pruner()
+        self.baseline = baseline
         self.action_map = actions
         self.cards = cards
         self.num_cards = num_cards
         self.num_players = len(blueprint)
 
         self.state = state
-        self.all_combos = [list(t) for t in set(permutations(self.cards, self.num_cards))]
+        self.all_combos = deal_table(self.cards, self.num_cards)
+        self.deals, self.weights = deals(cards, num_cards, state.canonical)
+        self.rollout_weights = None
+        if belief is not None:
+            self.weights = belief.weigh(self.deals, self.weights, state)
+            # a rollout fixes the traverser's card, so only the others' ranges count
+            self.rollout_weights = [belief.weigh(self.all_combos, state=state, exclude=player)
+                                    for player in range(self.num_players)]
 
     def search(self):
+        from tqdm import tqdm
+
+        start = time.perf_counter()
+        self.frozen = freeze(self.blueprint)
 
         starting_state = deepcopy(self.state)
         node_map = deepcopy(self.blueprint)
         action_map = deepcopy(self.action_map)
 
         continuations = {i: {} for i in range(len(node_map))}
-
-        for i in tqdm(range(1, 1001), desc="searching"):
-            card_choice = np.random.choice(len(self.all_combos))
-            starting_state.cards = self.all_combos[card_choice]
+        self.pruner.reset(node_map)
+        if self.stop is not None:
+            self.stop.reset()
+
+        self.rollouts, self.rollout_seconds = 0, 0
+        setup = time.perf_counter()
+        for i in tqdm(range(1, self.budget + 1), desc="searching"):
+            card_choice = np.random.choice(len(self.deals), p=self.weights)
+            starting_state.cards = self.deals[card_choice]
             for player in range(self.num_players):
+                self.pruner.step(i)
                 if i % STRAT_INTERVAL == 0:
-                    self.update_strategy_search(player, starting_state, node_map, action_map, continuations)
-
-                if i > PRUNE_THRESH:
-                    chance = np.random.rand()
-                    if chance < .05:
-                        self.accumulate_regrets_search(player, starting_state, node_map, action_map, continuations)
-                    else:
-                        self.accumulate_regrets_search(player, starting_state, node_map, action_map,
-                                                       continuations, prune=True)
-                else:
-                    self.accumulate_regrets_search(player, starting_state, node_map, action_map, continuations)
+                    self.update_strategy_search(player, starting_state, node_map, action_map, continuations,
+                                                weight=self.rule.strategy_weight(i))
+
+                self.accumulate_regrets_search(player, starting_state, node_map, action_map, continuations)
+
+            self.rule.discount(node_map, i)
+            self.iterations = i
+            if self.stop is not None and i % self.stop.interval == 0 and \
+                    self.stop.done(i, node_map, action_map):
+                break
 
-            if i < LCFR_INTERVAL and i % DISCOUNT == 0:
-                discounted = (i/DISCOUNT)/(i/(DISCOUNT) + 1)
-                for player in node_map:
-                    player_nodes = node_map[player]
-                    for key, node in player_nodes.items():
-                        node.regret_sum = {key: value * discounted for
-                                        key, value in node.regret_sum.items()}
-                        node.strategy_sum = {key: value * discounted for
-                                            key, value in node.strategy_sum.items()}
-        return node_map 
+        loop = time.perf_counter() - setup
+        self.timings = {'setup': (setup - start) * 1000,
+                        'iterations': (loop - self.rollout_seconds) * 1000,
+                        'rollouts': self.rollout_seconds * 1000}
+        return node_map
 
 
-    def update_strategy_search(self, traverser, state, node_map, action_map, continuation, leaf=False):
+    def update_strategy_search(self, traverser, state, node_map, action_map, continuation, leaf=False, weight=1):
         if state.terminal:
             return
 
         turn = state.turn
-        info_set = state.info_set()
-
-        if info_set not in action_map[turn]:
-            action_map[turn][info_set] = {'actions': state.valid_actions()}
-
-        valid_actions = action_map[turn][info_set]['actions']
 
         if leaf is True:
+            info_set = state.info_set()
             if info_set not in continuation[turn]:
-                continuation[turn][info_set] = Node([i for i in range(4)])
+                continuation[turn][info_set] = Node(CONTINUATIONS)
 
             node = continuation[turn][info_set]
         else:
-            if info_set not in node_map[turn]:
-                node_map[turn][info_set] = Node(valid_actions)
-
-            node = node_map[turn][info_set]
+            _, node, valid_actions = get_node(state, node_map, action_map, Node)
 
         strategy = node.strategy()
 
@@ -215,71 +282,77 @@ class Search:
             actions = list(strategy.keys())
             probs = list(strategy.values())
             random_action = actions[np.random.choice(len(actions), p=probs)]
-            node.strategy_sum[random_action] += 1
+            node.strategy_sum[random_action] += weight
             new_state = state.take(random_action, deep=True)
 
             if leaf is False:
                 self.update_strategy_search(traverser, new_state, node_map, action_map, continuation,
-                                    leaf=new_state.round!=state.round)
+                                    leaf=new_state.round!=state.round, weight=weight)
 
         else:
             if leaf is False:
-                for action in valid_actions:
+                mask = self.pruner.mask(node)
+                for index, action in enumerate(valid_actions):
+                    if mask >> index & 1:
+                        self.pruner.skipped += 1
+                        continue
+
                     new_state = state.take(action, deep=True)
                     self.update_strategy_search(traverser, new_state, node_map, action_map, continuation,
-                                    leaf=new_state.round!=state.round)
+                                    leaf=new_state.round!=state.round, weight=weight)
 
 
-    def accumulate_regrets_search(self, traverser, state, node_map, action_map, continuations, prune=False, leaf=False):
+    def accumulate_regrets_search(self, traverser, state, node_map, action_map, continuations, leaf=False):
         if state.terminal:
             util = state.utility()
             return util
 
         turn = state.turn
-        info_set = state.info_set()
-
-        if info_set not in action_map[turn]:
-            action_map[turn][info_set] = {'actions': state.valid_actions()}
-
-        valid_actions = action_map[turn][info_set]['actions']
-        if 'fixed' in valid_actions:
-            valid_actions = [action_map[turn][info_set]['fixed']]
 
         if leaf is True:
+            info_set = state.info_set()
             if info_set not in continuations[turn]:
-                continuations[turn][info_set] = Node(["NULL", "F", "C", "4R"])
+                continuations[turn][info_set] = Node(CONTINUATIONS)
 
             node = continuations[turn][info_set]
-            valid_actions = ["NULL", "F", "C", "4R"]
+            valid_actions = CONTINUATIONS
         else:
-            if info_set not in node_map[turn]:
-                node_map[turn][info_set] = Node(valid_actions)
-
-            node = node_map[turn][info_set]
+            _, node, valid_actions = get_node(state, node_map, action_map, Node)
 
         strategy = node.strategy()
 
         if turn == traverser:
             util = {a: 0 for a in valid_actions}
             node_util = np.zeros(len(node_map))
-            explored = set(valid_actions)
+            mask = self.pruner.mask(node) if leaf is False else 0
+            explored = []
 
-            for action in valid_actions:
-                if prune is True and leaf is False and node.regret_sum[action] <= REGRET_MIN:
-                    explored.remove(action)
+            for index, action in enumerate(valid_actions):
+                if mask >> index & 1:
+                    self.pruner.skipped += 1
+                    continue
+
+                if leaf is True:
+                    returned = self.rollout(traverser, state, action)
                 else:
-                    if leaf is True:
-                        returned = self.rollout(traverser, state, action)
-                    else:
-                        new_state = state.take(action, deep=True)
-                        returned = self.accumulate_regrets_search(traverser, new_state, node_map, action_map, continuations,
-                                                                  prune=prune, leaf=new_state.round!=state.round) 
-                    util[action] = returned[turn]
-                    node_util += returned * strategy[action]
-
-            for action in explored:
-                regret = util[action] - node_util[turn]
-                node.regret_sum[action] += regret
+                    new_state = state.take(action, deep=True)
+                    returned = self.accumulate_regrets_search(traverser, new_state, node_map, action_map, continuations,
+                                                              leaf=new_state.round!=state.round) 
+                util[action] = returned[turn]
+                node_util += returned * strategy[action]
+                explored.append(index)
+
+            floor = self.rule.floor
+            for index in explored:
+                action = valid_actions[index]
+                regret = node.regret_sum[action] + util[action] - node_util[turn]
+                if floor is not None and regret < floor:
+                    regret = floor
+                node.regret_sum[action] = regret
+
+                if leaf is False:
+                    self.pruner.visited += 1
+                    self.pruner.update(node, index, regret)
 
             return node_util
 
@@ -292,24 +365,36 @@ class Search:
             probs = list(strategy.values())
             random_action = actions[np.random.choice(len(actions), p=probs)]
             new_state = state.take(random_action, deep=True)
-            return self.accumulate_regrets_search(traverser, new_state, node_map, action_map, continuations,
-                                                  prune=prune, leaf=new_state.round!=state.round)
+            returned = self.accumulate_regrets_search(traverser, new_state, node_map, action_map, continuations,
+                                                      leaf=new_state.round!=state.round)
+            if self.baseline:
+                return baselined(node, strategy, random_action, returned)
+            return returned
+
     def rollout(self, player, state, contin_strat):
-        node_map = self.blueprint
+        start = time.perf_counter()
+        node_map = self.frozen
         action_map = self.action_map
 
         util = np.zeros(len(node_map))
         starting_state = deepcopy(state)
 
-        indistinguishable_states = [combo for combo in self.all_combos if combo[player] == state.cards[player]] 
+        rank = RANK[state.cards[player]]
+        indistinguishable_states = [k for k, combo in enumerate(self.all_combos) if RANK[combo[player]] == rank]
+        probs = None
+        if self.rollout_weights is not None:
+            probs = self.rollout_weights[player][indistinguishable_states]
+            probs = probs / probs.sum() if probs.sum() > 0 else None
 
         num_rollouts = 5
         for _ in range(num_rollouts):
-            card_choice = np.random.choice(len(indistinguishable_states))
-            starting_state.cards = indistinguishable_states[card_choice]
+            card_choice = np.random.choice(len(indistinguishable_states), p=probs)
+            starting_state.cards = self.all_combos[indistinguishable_states[card_choice]]
 
             util += self.playout(player, contin_strat, starting_state, node_map, action_map)
 
+        self.rollouts += num_rollouts
+        self.rollout_seconds += time.perf_counter() - start
         return util / num_rollouts
 
     def playout(self, player, contin_strat, hand, node_map, action_map):
@@ -318,14 +403,19 @@ class Search:
             return utility
 
         info_set = hand.info_set()
-        node = node_map[hand.turn][info_set]
+        node = node_map[hand.turn].get(info_set)
+
+        if node is None:
+            valid_actions = hand.valid_actions()
+            strategy = {action: 1/len(valid_actions) for action in valid_actions}
+        else:
+            valid_actions = action_map[hand.turn][str(hand)]['actions']
+            strategy = node.avg_strategy()
 
-        strategy = node.avg_strategy()
         if player == hand.turn:
             strategy = bias(strategy, contin_strat)
 
         util = np.zeros(len(node_map))
-        valid_actions = action_map[hand.turn][info_set]['actions']
         for action in valid_actions:
             new_hand = hand.take(action, deep=True)
             util += self.playout(player, contin_strat, new_hand, node_map, action_map) * strategy[action]
@@ -334,10 +424,30 @@ class Search:
                                          
 
 if __name__ == '__main__':
+    import sys
+    import time
+    from leduc.best_response import exact_exploitability
+
     num_players = 2
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+    if sys.argv[1:2] == ['baselines']:
+        # exploitability against CPU time, with and without VR-MCCFR baselines
+        for baseline in [False, True]:
+            for iterations in [1000, 4000, 10000]:
+                np.random.seed(0)
+                node_map = {i: {} for i in range(num_players)}
+                action_map = {i: {} for i in range(num_players)}
+                start = time.process_time()
+                learn(iterations, cards, 3, node_map, action_map, baseline=baseline)
+                elapsed = time.process_time() - start
+                exploit = exact_exploitability(cards, 3, node_map, action_map)
+                print(f'baseline={baseline} {iterations} iterations: {elapsed:.1f}s CPU, '
+                      f'exploitability {exploit:.3f}')
+        sys.exit()
+
     node_map = {i: {} for i in range(num_players)}
     action_map = {i: {} for i in range(num_players)}
-    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
     learn(50000, cards, 3, node_map, action_map)
 
     for player in node_map:
@@ -349,4 +459,4 @@ if __name__ == '__main__':
         
 
     util = expected_utility(cards, 3, 2, node_map, action_map)
-    print(util)
\ No newline at end of file
+    print(util)
@@ -40,6 +40,10 @@ class Node:
 
 
 class MNode(Node):
+    pruned = 0
+    expires = None
+    baseline = None
+
     def __init__(self, actions):
         super().__init__(actions)
 
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class Pruner:
+    """Regret-based pruning of traverser actions.
+
+    Each MNode carries a bitmask of its pruned actions (bit i is set when the
+    regret of `actions[i]` is at or below `threshold`) that is updated every
+    time the regret changes. After iteration `start`, pruning is active on all
+    but an `explore` fraction of iterations, and each pruned action is skipped
+    for `revisit` iterations from when it was pruned (`node.expires` maps
+    action index to that iteration, None until an action is pruned) before
+    it is traversed again.
+    """
+    def __init__(self, threshold=-300000, start=200, explore=.05, revisit=1000):
+        self.threshold = threshold
+        self.start = start
+        self.explore = explore
+        self.revisit = revisit
+
+        self.iteration = 0
+        self.active = False
+        self.skipped = 0
+        self.visited = 0
+
+    def step(self, iteration):
+        self.iteration = iteration
+        self.active = iteration > self.start and np.random.rand() >= self.explore
+
+    def mask(self, node):
+        if not self.active or not node.pruned or node.expires is None:
+            return 0
+
+        mask = 0
+        for index, expires in node.expires.items():
+            if self.iteration < expires:
+                mask |= 1 << index
+
+        return mask
+
+    def update(self, node, index, regret):
+        bit = 1 << index
+        expires = node.expires
+        if regret > self.threshold:
+            if node.pruned & bit:
+                node.pruned &= ~bit
+                if expires is not None:
+                    expires.pop(index, None)
+        elif expires is None:
+            node.pruned |= bit
+            node.expires = {index: self.iteration + self.revisit}
+        elif not node.pruned & bit or self.iteration >= expires.get(index, 0):
+            node.pruned |= bit
+            expires[index] = self.iteration + self.revisit
+
+    def reset(self, node_map):
+        for player in node_map:
+            for node in node_map[player].values():
+                # nodes pickled with a single per-node expiry start over
+                if isinstance(node.expires, dict):
+                    node.expires = dict.fromkeys(node.expires, 0)
+                else:
+                    node.expires = None
+
+    def stats(self):
+        total = self.skipped + self.visited
+        return {'skipped': self.skipped, 'visited': self.visited,
+                'saved': self.skipped / total if total > 0 else 0}
+
+    def __repr__(self):
+        return f'Pruner(skipped={self.skipped}, visited={self.visited})'
@@ -0,0 +1,46 @@
+def lookup(state, action_map):
+    """Return the public node of `state`, registering it on the first visit.
+
+    Legal actions only depend on the public history, so action_map holds one
+    entry per public node: `action_map[turn][history] = {'actions': [...],
+    'info_sets': [...]}`, where 'info_sets' lists the info sets of the acting
+    player that have a node at this public node.
+    """
+    public = action_map[state.turn]
+    key = str(state)
+    if key not in public:
+        public[key] = {'actions': state.valid_actions(), 'info_sets': []}
+
+    return public[key]
+
+
+def get_node(state, node_map, action_map, node_cls):
+    """Return the info set, node and legal actions of the player to act."""
+    entry = lookup(state, action_map)
+    info_set = state.info_set()
+    nodes = node_map[state.turn]
+
+    node = nodes.get(info_set)
+    if node is None:
+        node = nodes[info_set] = node_cls(entry['actions'])
+        entry['info_sets'].append(info_set)
+
+    return info_set, node, entry['actions']
+
+
+def add_action(state, action, node_map, action_map):
+    """Make an off-tree `action` legal at the public node of `state`."""
+    entry = lookup(state, action_map)
+    if action not in entry['actions']:
+        entry['actions'].append(action)
+
+    nodes = node_map[state.turn]
+    for info_set in entry['info_sets']:
+        node = nodes.get(info_set)
+        if node is None:
+            continue
+
+        if action not in node.actions:
+            node.actions.append(action)
+        node.regret_sum.setdefault(action, 0)
+        node.strategy_sum.setdefault(action, 0)
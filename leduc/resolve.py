@@ -0,0 +1,342 @@
+import time
+import numpy as np
+
+from copy import deepcopy
+
+from leduc.node import MNode as Node
+from leduc.deck import RANK, card_id
+from leduc.iso import deals as deal_list
+from leduc.monte import CONTINUATIONS
+from leduc.public import lookup, get_node
+from leduc.rules import CFRPlus, get_rule
+from leduc.snapshot import freeze
+from leduc.stopping import get_stop
+
+ITERATIONS = 200
+BIAS = 5
+
+
+class Decision:
+    """A public node inside the subgame; regrets and strategy sums are rows per info set."""
+    def __init__(self, state, actions, children, view, reps):
+        self.state = state
+        self.player = state.turn
+        self.actions = actions
+        self.children = children
+        self.view = view
+        self.reps = reps
+        self.rows = rows(view)
+        self.regret = np.zeros((len(reps), len(actions)))
+        self.strategy_sum = np.zeros((len(reps), len(actions)))
+
+
+class Terminal:
+    def __init__(self, utility):
+        self.utility = utility
+
+
+class Leaf:
+    """A round boundary where each player picks a continuation strategy.
+
+    `values[w, c0, c1]` is player 0's blueprint value in world w when
+    players 0 and 1 follow continuations c0 and c1 for the rest of the hand.
+    """
+    def __init__(self, views, values):
+        self.views = views
+        self.rows = [rows(view) for view in views]
+        self.values = values
+        self.regret = [np.zeros((view.max() + 1, len(CONTINUATIONS))) for view in views]
+        self.strategy_sum = [np.zeros_like(regret) for regret in self.regret]
+
+
+def regret_matching(regret):
+    positive = np.maximum(regret, 0)
+    total = positive.sum(axis=1, keepdims=True)
+    uniform = np.full_like(positive, 1 / positive.shape[1])
+    return np.where(total > 0, positive / np.where(total > 0, total, 1), uniform)
+
+
+def normalize(strategy_sum, fallback):
+    """Average strategy per row, or `fallback`'s row where nothing was accumulated."""
+    total = strategy_sum.sum(axis=1, keepdims=True)
+    return np.where(total > 0, strategy_sum / np.where(total > 0, total, 1), fallback)
+
+
+def rows(view):
+    """Matrix that sums per-world vectors into per-info-set rows."""
+    matrix = np.zeros((view.max() + 1, len(view)))
+    matrix[view, np.arange(len(view))] = 1
+    return matrix
+
+
+def index(keys):
+    """Map each world to a row per distinct key; returns (rows, first world of each row)."""
+    rows = {}
+    view = np.empty(len(keys), dtype=np.int64)
+    reps = []
+    for w, key in enumerate(keys):
+        if key not in rows:
+            rows[key] = len(reps)
+            reps.append(w)
+        view[w] = rows[key]
+
+    return view, reps
+
+
+class FullWidthSearch:
+    """Depth-limited re-solving with full-width CFR over every consistent deal.
+
+    A drop-in for monte.Search. Instead of sampling one deal per iteration,
+    each iteration walks the public tree of the current round once, carrying
+    the reach of both players for all deals as NumPy vectors. At the round
+    boundary each player picks one of CONTINUATIONS, valued exactly against
+    the blueprint biased towards that action. Two players only.
+
+    `stop` can end the search before `iterations`; after search(),
+    `iterations` holds the number actually run and `timings` the ms spent
+    building the subgame and iterating; leaf values are exact, so
+    `rollouts` stays 0. A `belief` (belief.Belief at
+    `state`) supplies the root ranges instead of replaying the history.
+    """
+    def __init__(self, state, blueprint, actions, cards, num_cards, rule=None,
+                 iterations=ITERATIONS, stop=None, belief=None):
+        if len(blueprint) != 2:
+            raise ValueError('FullWidthSearch supports two players')
+
+        self.blueprint = blueprint
+        self.rule = get_rule(rule) or CFRPlus()
+        self.action_map = actions
+        self.cards = cards
+        self.num_cards = num_cards
+        self.num_players = 2
+        self.budget = iterations
+        self.iterations = 0
+        self.rollouts = 0
+        self.timings = {}
+        self.stop = get_stop(stop)
+        self.belief = belief
+
+        self.state = state
+        self.worlds, self.prior = self.consistent_deals(state)
+
+    def consistent_deals(self, state):
+        """Deals that agree with the public cards of `state`, with their chance weights."""
+        deals, weights = deal_list(self.cards, self.num_cards, state.canonical)
+        weights = np.full(len(deals), 1 / len(deals)) if weights is None else np.array(weights)
+
+        if state.round > 0:
+            board = card_id(state.cards[self.num_players])
+            # canonical info sets forget suits, so any board of the same rank is the same world
+            same = (lambda card: RANK[card] == RANK[board]) if state.canonical else \
+                   (lambda card: card == board)
+            keep = [i for i, deal in enumerate(deals) if same(deal[self.num_players])]
+            deals = [deals[i] for i in keep]
+            weights = weights[keep]
+
+        return deals, weights / weights.sum()
+
+    def search(self):
+        start = time.perf_counter()
+        self.frozen = freeze(self.blueprint)
+        node_map = deepcopy(self.blueprint)
+        action_map = deepcopy(self.action_map)
+
+        root = self.build(deepcopy(self.state), action_map)
+        reach = self.root_reach()
+        if self.stop is not None:
+            self.stop.reset()
+
+        setup = time.perf_counter()
+        for t in range(1, self.budget + 1):
+            self.cfr(root, reach, self.rule.strategy_weight(t))
+            self.iterations = t
+            if self.stop is not None and t % self.stop.interval == 0:
+                # criteria read the node map, so bring it up to date first
+                self.write(root, node_map, action_map)
+                if self.stop.done(t, node_map, action_map):
+                    break
+
+        self.write(root, node_map, action_map)
+        self.timings = {'setup': (setup - start) * 1000,
+                        'iterations': (time.perf_counter() - setup) * 1000}
+        return node_map
+
+    def root_reach(self):
+        """Each player's blueprint probability of the history so far, per world.
+
+        A player whose history has zero probability everywhere (an action
+        just added to the tree) falls back to a uniform range.
+        """
+        if self.belief is not None:
+            index = self.belief.index
+            return np.array([[self.belief.ranges[player][index[deal[player]]] for deal in self.worlds]
+                             for player in range(self.num_players)])
+
+        state_cls = type(self.state)
+        history = [action for round in self.state.history[:self.state.round + 1] for action in round]
+        reach = np.ones((self.num_players, len(self.worlds)))
+        for w, deal in enumerate(self.worlds):
+            state = state_cls(deal, self.num_players, self.state.eval, self.state.canonical)
+            for action in history:
+                node = self.frozen[state.turn].get(state.info_set())
+                if node is None:
+                    public = self.action_map[state.turn].get(str(state))
+                    prob = 1 / len(public['actions'] if public is not None else state.valid_actions())
+                else:
+                    prob = node.avg_strategy().get(action, 0)
+                reach[state.turn, w] *= prob
+                state.take(action)
+
+        for player in range(self.num_players):
+            if not reach[player].any():
+                reach[player] = 1
+
+        return reach
+
+    def utility(self, state):
+        values = np.empty(len(self.worlds))
+        for w, deal in enumerate(self.worlds):
+            state.cards = deal
+            values[w] = state.utility()[0]
+
+        return values
+
+    def info_sets(self, state, player):
+        turn = state.turn
+        state.turn = player
+        keys = []
+        for deal in self.worlds:
+            state.cards = deal
+            keys.append(state.info_set())
+        state.turn = turn
+
+        return index(keys)
+
+    def build(self, state, action_map, start_round=None):
+        start_round = state.round if start_round is None else start_round
+        if state.terminal:
+            return Terminal(self.utility(state))
+
+        if state.round != start_round:
+            views = [self.info_sets(state, player)[0] for player in range(self.num_players)]
+            return Leaf(views, self.continuation(state, action_map))
+
+        actions = lookup(state, action_map)['actions']
+        view, reps = self.info_sets(state, state.turn)
+        children = [self.build(state.take(action, deep=True), action_map, start_round)
+                    for action in actions]
+        return Decision(state, actions, children, view, reps)
+
+    def continuation(self, state, action_map):
+        """Player 0's value for every world and pair of continuation strategies."""
+        num_worlds, k = len(self.worlds), len(CONTINUATIONS)
+        if state.terminal:
+            return np.broadcast_to(self.utility(state)[:, None, None], (num_worlds, k, k))
+
+        actions = lookup(state, action_map)['actions']
+        nodes = self.frozen[state.turn]
+        strategy = np.full((num_worlds, len(actions)), 1 / len(actions))
+        for w, deal in enumerate(self.worlds):
+            state.cards = deal
+            node = nodes.get(state.info_set())
+            if node is not None:
+                average = node.avg_strategy()
+                strategy[w] = [average.get(action, 0) for action in actions]
+
+        # biased[w, c, a]: the blueprint with continuation c's action weighted up
+        biased = np.repeat(strategy[:, None, :], k, axis=1)
+        for c, action in enumerate(CONTINUATIONS):
+            if action in actions:
+                biased[:, c, actions.index(action)] *= BIAS
+        total = biased.sum(axis=2, keepdims=True)
+        biased = np.where(total > 0, biased / np.where(total > 0, total, 1), 1 / len(actions))
+
+        values = np.stack([self.continuation(state.take(action, deep=True), action_map)
+                           for action in actions])
+        if state.turn == 0:
+            return np.einsum('wca,awcd->wcd', biased, values)
+        return np.einsum('wda,awcd->wcd', biased, values)
+
+    def cfr(self, node, reach, weight):
+        """One full-width CFR pass; returns player 0's value in every world."""
+        if isinstance(node, Terminal):
+            return node.utility
+
+        floor = self.rule.floor
+        if isinstance(node, Leaf):
+            strategies = [regret_matching(node.regret[p])[node.views[p]] for p in range(2)]
+            by_own = [np.einsum('wcd,wd->wc', node.values, strategies[1]),
+                      np.einsum('wcd,wc->wd', node.values, strategies[0])]
+            value = (strategies[0] * by_own[0]).sum(axis=1)
+            for player, sign in enumerate((1, -1)):
+                self.update(node.regret[player], node.strategy_sum[player], node.rows[player],
+                            sign * (by_own[player] - value[:, None]), strategies[player],
+                            reach, player, weight, floor)
+            return value
+
+        player = node.player
+        strategy = regret_matching(node.regret)[node.view]
+        values = np.empty_like(strategy)
+        for a, child in enumerate(node.children):
+            child_reach = reach.copy()
+            child_reach[player] *= strategy[:, a]
+            values[:, a] = self.cfr(child, child_reach, weight)
+
+        value = (strategy * values).sum(axis=1)
+        sign = 1 if player == 0 else -1
+        self.update(node.regret, node.strategy_sum, node.rows, sign * (values - value[:, None]),
+                    strategy, reach, player, weight, floor)
+        return value
+
+    def update(self, regret, strategy_sum, rows, advantage, strategy, reach, player, weight, floor):
+        opponent = reach[1 - player] * self.prior
+        regret += rows @ (advantage * opponent[:, None])
+        if floor is not None:
+            np.maximum(regret, floor, out=regret)
+        strategy_sum += rows @ (strategy * (weight * reach[player] * self.prior)[:, None])
+
+    def write(self, node, node_map, action_map):
+        """Store the solved average strategy of every subgame info set in `node_map`."""
+        if not isinstance(node, Decision):
+            return
+
+        # hands out of range at the root never accumulate a strategy sum; they
+        # play the current regret-matched strategy, which still sees their regrets
+        average = normalize(node.strategy_sum, regret_matching(node.regret))
+        state = node.state
+        for row, w in enumerate(node.reps):
+            state.cards = self.worlds[w]
+            _, entry, _ = get_node(state, node_map, action_map, Node)
+            entry.strategy_sum = dict(zip(node.actions, average[row].tolist()))
+            entry.regret_sum = dict(zip(node.actions, node.regret[row].tolist()))
+
+        for child in node.children:
+            self.write(child, node_map, action_map)
+
+
+if __name__ == '__main__':
+    import time
+    from leduc.card import Card
+    from leduc.monte import learn, Search
+    from leduc.state import Leduc as State
+    from leduc.hand_eval import leduc_eval
+
+    np.random.seed(0)
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    learn(20000, cards, 3, node_map, action_map)
+
+    root = State(cards[:3], num_players, leduc_eval)
+    info_set = root.info_set()
+    for name, search_cls in [('sampled', Search), ('full-width', FullWidthSearch)]:
+        times, probs = [], []
+        for _ in range(3):
+            start = time.perf_counter()
+            solved = search_cls(root, node_map, action_map, cards, 3).search()
+            times.append((time.perf_counter() - start) * 1000)
+            probs.append(list(solved[0][info_set].avg_strategy().values()))
+
+        print(f'{name}: {np.mean(times):.0f}ms +/- {np.std(times):.0f}ms per decision, '
+              f'root strategy spread {np.std(probs, axis=0).max():.3f}')
@@ -0,0 +1,82 @@
+class CFR:
+    """Plain regret matching with uniform strategy averaging."""
+    floor = None
+
+    def strategy_weight(self, t):
+        return 1
+
+    def discount(self, node_map, t):
+        pass
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+
+class CFRPlus(CFR):
+    """Regrets floored at zero and linearly weighted strategy averaging."""
+    floor = 0
+
+    def strategy_weight(self, t):
+        return t
+
+
+class DCFR(CFR):
+    """Discounted CFR.
+
+    Every `interval` iterations (and only before iteration `until`, if set)
+    positive regrets are scaled by t^alpha/(t^alpha + 1), negative regrets by
+    t^beta/(t^beta + 1) and the strategy sum by (t/(t + 1))^gamma, where t is
+    the number of discounting steps so far.
+    """
+    def __init__(self, alpha=1.5, beta=0, gamma=2, interval=1, until=None):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.interval = interval
+        self.until = until
+
+    def discount(self, node_map, t):
+        if t % self.interval != 0:
+            return
+        if self.until is not None and t >= self.until:
+            return
+
+        t = t / self.interval
+        pos = t ** self.alpha / (t ** self.alpha + 1)
+        neg = t ** self.beta / (t ** self.beta + 1)
+        strat = (t / (t + 1)) ** self.gamma
+
+        for player in node_map:
+            for node in node_map[player].values():
+                node.regret_sum = {key: value * (pos if value > 0 else neg)
+                                   for key, value in node.regret_sum.items()}
+                node.strategy_sum = {key: value * strat for
+                                     key, value in node.strategy_sum.items()}
+
+    def __repr__(self):
+        return (f'{type(self).__name__}(alpha={self.alpha}, beta={self.beta}, '
+                f'gamma={self.gamma}, interval={self.interval}, until={self.until})')
+
+
+class LinearCFR(DCFR):
+    """Linear CFR: iteration t is weighted by t, i.e. DCFR(1, 1, 1)."""
+    def __init__(self, interval=1, until=None):
+        super().__init__(1, 1, 1, interval, until)
+
+
+RULES = {
+    'cfr': CFR,
+    'cfr+': CFRPlus,
+    'dcfr': DCFR,
+    'lcfr': LinearCFR,
+}
+
+
+def get_rule(rule, **kwargs):
+    if rule is None or isinstance(rule, CFR):
+        return rule
+
+    if rule not in RULES:
+        raise ValueError(f"Unknown update rule {rule}, expected one of {list(RULES)}")
+
+    return RULES[rule](**kwargs)
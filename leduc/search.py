@@ -1,38 +1,83 @@
+# Deliberately above the imports (E402): the reported time to first action
+# includes the time spent importing numpy and the engine.
+import time
+STARTED = time.perf_counter()
+
 import glob
 import pickle
 import numpy as np
 from copy import deepcopy
 
+from leduc.deck import deal_table, decode
 from leduc.card import Card
-from leduc.node import MNode as Node
 from leduc.monte import learn, Search
-from itertools import permutations
+from leduc.belief import Belief
+from leduc.latency import Latency
+from leduc.public import lookup, add_action
+from leduc.snapshot import freeze
+from leduc.translate import translate
 from leduc.state import Leduc as State
 from leduc.hand_eval import leduc_eval as eval
 
 
 class Pluribus:
-    def __init__(self, node_map, action_map, cards, num_cards):
-        self.blueprint = node_map
+    def __init__(self, node_map, action_map, cards, num_cards, threshold=.5,
+                 policy=None, deals=None, search=Search, recorder=None, latency=None):
+        """`node_map` may be a zero-argument loader; it is called on first search.
+
+        `policy` and `deals` are a precomputed frozen policy and deal table.
+        `search` is the re-solver class, e.g. resolve.FullWidthSearch; it is
+        given the players' ranges at the search root as `belief`.
+        Finished hands go to `recorder`, a history.Recorder, when given.
+        Decision latencies and search work go to `latency`, a
+        latency.Latency, per decision type: pluribus_turn, opponent_turn
+        and check_round.
+        """
+        self._blueprint = node_map
         self.action_map = action_map
-
-        self.all_combos = [list(t) for t in set(permutations(cards, num_cards))]
+        self.cards = cards
+        self.threshold = threshold
+        self.policy = policy
+        self.search = search
+        self.recorder = recorder
+        self.latency = latency if latency is not None else Latency()
+
+        if deals is None:
+            deals = deal_table(cards, num_cards)
+        self.all_combos = deals
         card = np.random.choice(len(self.all_combos))
-        self.root = State(self.all_combos[card], len(node_map), eval) 
+        self.root = State(self.all_combos[card], len(action_map), eval) 
+
 
+    @property
+    def blueprint(self):
+        if callable(self._blueprint):
+            self._blueprint = self._blueprint()
 
-    def play(self):
-        self.node_map = deepcopy(self.blueprint)
+        return self._blueprint
+
+
+    def play(self, started=None):
+        self.node_map = self.policy if self.policy is not None else freeze(self.blueprint)
+        self.frozen = self.node_map
+        self.belief = Belief(self.cards, len(self.action_map), self.frozen, self.action_map)
+        self.root_belief = deepcopy(self.belief)
+        self.decisions = {'latency': {}, 'blueprint': {}}
         actions = self.action_map
+        cards = self.cards
 
 
         pluribus = 0
         state = deepcopy(self.root)
+        self.abstract = deepcopy(self.root)
         while state.terminal is False:
             player_turn = state.turn
 
             if player_turn == pluribus:
                 self.pluribus_turn(state, self.node_map, actions, cards)
+                if started is not None:
+                    print(f"Time to first action: {(time.perf_counter() - started) * 1000:.1f}ms")
+                    started = None
 
             else:
                 while True:
@@ -45,91 +90,165 @@ class Pluribus:
                 self.opponent_turn(action, state, self.blueprint, actions, cards)
 
         payout = state.utility()
+        if self.recorder is not None:
+            self.recorder.record_state(state, self.decisions['latency'], self.decisions['blueprint'])
+
         print(f"Game state {state}")
-        print(state.cards)
+        print(decode(state.cards))
         if payout[0] > 0:
             print(f"Pluribus won {payout[0]} chips")
         elif payout[0] < 0:
             print(f"You won {payout[1]} chips")
         else:
             print(f"There was a tie!")
+
+        print(self.latency)
             
                  
     def pluribus_turn(self, state, blueprint, action_map, cards):
-        info_set = state.info_set()
-        turn = state.turn
-        if info_set not in action_map[turn]:
-            action_map[turn][info_set] = {'actions': state.valid_actions()}
-
-        valid_actions = action_map[turn][info_set]['actions']
-        if state.info_set() not in blueprint[state.turn]:
-            blueprint[state.turn][state.info_set()] = Node(valid_actions)
-
-        node = blueprint[state.turn][state.info_set()]
-        strategy = node.avg_strategy()
-
-        actions = list(strategy.keys())
-        probs = list(strategy.values())
+        start = time.perf_counter()
+        node = blueprint[self.abstract.turn].get(self.abstract.info_set())
+        if node is None:
+            actions = lookup(self.abstract, action_map)['actions']
+            sampled = actions[np.random.choice(len(actions))]
+        else:
+            sampled = node.sample()
 
-        sampled = actions[np.random.choice(len(actions), p=probs)]
+        prior = self.frozen[self.abstract.turn].get(self.abstract.info_set())
+        if prior is not None:
+            self.decisions['blueprint'][self.actions_taken(state)] = prior.avg_strategy().get(sampled, 0)
         print(f"Pluribus played {sampled}")
 
-        action_map[state.turn][state.info_set()]['frozen'] = sampled
-
+        self.belief.observe(self.abstract, sampled)
         state.take(sampled)
+        self.abstract.take(sampled)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latency.observe('pluribus_turn', 'total', elapsed)
+        self.spent(elapsed)
 
-        self.check_round(state, self.root, blueprint, action_map, cards)    
+        self.check_round(self.abstract, self.root, self.blueprint, action_map, cards)    
 
 
     def opponent_turn(self, action, state, blueprint, actions, cards):
-        node_map = None
+        """Play the opponent's action, translating it onto the tree when it is off-tree.
+
+        Only translations off by more than `threshold` of the pot fall back
+        to adding the action to the tree and re-searching.
+        """
+        start = time.perf_counter()
+        translated, error = action, 0
+        legal = lookup(self.abstract, actions)['actions']
+        if action not in legal:
+            translated, error = translate(state, action, self.abstract, legal)
+
+        off_tree = error > self.threshold
+        if off_tree:
+            translated = action
+            add_action(self.abstract, action, blueprint, actions)
+
+        self.belief.observe(self.abstract, translated)
         state.take(action)
-        info_set = state.info_set()
-        turn = state.turn
-        if info_set not in actions[turn]:
-            actions[turn][info_set] = {'actions': state.valid_actions()}
-
-        if action not in actions[turn][info_set]['actions']:
-            for info_set in actions[state.turn]:
-                if str(state) in info_set:
-                    actions[state.turn][info_set]['actions'].append(action) 
+        self.abstract.take(translated)
 
-            search = Search(self.root, blueprint, actions, cards, len(state.cards))
+        if off_tree:
+            search = self.search(self.root, blueprint, actions, cards, len(state.cards),
+                                 belief=self.root_belief)
             print("***Action not found, finding strategy to counter***")
-            self.node_map = search.search()
+            self.node_map = freeze(search.search())
+            self.latency.search('opponent_turn', search)
+            self.record('search', start)
+        elif translated != action:
+            print(f"***Translated {action} to {translated} (error {error:.2f} pot)***")
+            self.record('translate', start)
+        else:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.latency.observe('opponent_turn', 'total', elapsed)
+            self.spent(elapsed)
+
+        self.check_round(self.abstract, self.root, blueprint, actions, cards)
 
-        self.check_round(state, self.root, node_map if node_map is not None else blueprint,
-                    actions, cards)
-                    
 
     def check_round(self, next_state, state, blueprint, actions, cards):
         if next_state.round > state.round:
+            start = time.perf_counter()
             self.root = next_state
-            search = Search(next_state, blueprint, actions, cards, len(state.cards))
+            self.root_belief = deepcopy(self.belief)
+            search = self.search(next_state, blueprint, actions, cards, len(state.cards),
+                                 belief=self.root_belief)
             print("***Reached end of round, updating strategy***")
-            new_strat = search.search()
-            self.node_map = new_strat
-
+            self.node_map = freeze(search.search())
+            self.latency.search('check_round', search)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.latency.observe('check_round', 'total', elapsed)
+            self.spent(elapsed)
+
+
+    def actions_taken(self, state):
+        return sum(len(actions) for actions in state.history)
+
+    def spent(self, elapsed):
+        """Add `elapsed` ms to the latency of the last action taken; a
+        round-ending search counts toward the action that ended the round."""
+        latency = self.decisions['latency']
+        index = self.actions_taken(self.abstract) - 1
+        latency[index] = latency.get(index, 0) + elapsed
+
+    def record(self, path, start):
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latency.observe('opponent_turn', 'total', elapsed)
+        self.latency.observe('opponent_turn', path, elapsed)
+        self.spent(elapsed)
+        print(f"Decision latency ({path}): {elapsed:.2f}ms")
+                    
 
 if __name__ == "__main__":
-    if not glob.glob('blueprint.po'):
-        num_players = 2
-        node_map = {i: {} for i in range(num_players)}
-        action_map = {i: {} for i in range(num_players)}
+    import sys
+    from leduc.bundle import build, load
+
+    bundle = load('blueprint.bundle')
+    if bundle is None:
         cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
-        learn(50000, cards, 3, node_map, action_map)
-        with open('blueprint.po', 'wb') as f:
-            pickle.dump(node_map, f)
-        with open('actions.po', 'wb') as f:
-            pickle.dump(action_map, f)
-
-    else:
-        with open('blueprint.po', 'rb') as f:
-            node_map = pickle.load(f)
-
-        with open('actions.po', 'rb') as f:
-            action_map = pickle.load(f)
-
-    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
-    pluribus = Pluribus(node_map, action_map, cards, 3)
-    pluribus.play()
\ No newline at end of file
+        if not glob.glob('blueprint.po'):
+            num_players = 2
+            node_map = {i: {} for i in range(num_players)}
+            action_map = {i: {} for i in range(num_players)}
+            learn(50000, cards, 3, node_map, action_map)
+            with open('blueprint.po', 'wb') as f:
+                pickle.dump(node_map, f)
+            with open('actions.po', 'wb') as f:
+                pickle.dump(action_map, f)
+
+        else:
+            with open('blueprint.po', 'rb') as f:
+                node_map = pickle.load(f)
+
+            with open('actions.po', 'rb') as f:
+                action_map = pickle.load(f)
+
+        build(node_map, action_map, cards, 3, 'blueprint.bundle', 'blueprint.po', 'actions.po')
+        bundle = load('blueprint.bundle')
+
+    recorder = None
+    if '--history' in sys.argv:
+        from leduc.history import Recorder
+        recorder = Recorder(sys.argv[sys.argv.index('--history') + 1])
+
+    search = Search
+    if '--full-width' in sys.argv:
+        from leduc.resolve import FullWidthSearch as search
+
+    latency = Latency()
+    if '--latency-port' in sys.argv:
+        from leduc.latency import serve
+        port = int(sys.argv[sys.argv.index('--latency-port') + 1])
+        serve(latency, ('127.0.0.1', port))
+        print(f"Latency at http://127.0.0.1:{port}/metrics and /latency.json")
+
+    pluribus = Pluribus(lambda: bundle.blueprint, bundle.action_map, bundle.cards,
+                        bundle.num_cards, policy=bundle.policy, deals=bundle.deals,
+                        search=search, recorder=recorder, latency=latency)
+    pluribus.play(STARTED)
+    if recorder is not None:
+        recorder.close()
+    if '--latency' in sys.argv:
+        latency.write(sys.argv[sys.argv.index('--latency') + 1])
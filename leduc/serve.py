@@ -0,0 +1,295 @@
+import json
+import socket
+import struct
+import socketserver
+import numpy as np
+
+from multiprocessing import shared_memory
+
+DISTRIBUTION = 1
+SAMPLE = 2
+NAMES = 3
+
+HEADER = struct.Struct('<BH')
+QUERY = struct.Struct('<BH')
+ENTRY = struct.Struct('<Bf')
+UNKNOWN = 255
+# reply op for a request the server cannot parse; the connection is closed after it
+ERROR = 255
+MAX_COUNT = 0xFFFF
+
+
+class SharedPolicy:
+    """A PolicyTable laid out in one shared memory block.
+
+    Any local process can `attach` to the block by name and read the policy
+    without loading its own copy. Info sets are found by binary search over
+    the sorted `player|info_set` keys.
+    """
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+
+        size = int.from_bytes(shm.buf[:4], 'little')
+        meta = json.loads(bytes(shm.buf[4:4 + size]))
+        self.action_names = meta['action_names']
+
+        arrays = {}
+        for name, dtype, shape, start in meta['arrays']:
+            count = int(np.prod(shape))
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                                      offset=start) if count else np.zeros(shape, dtype)
+        self.keys = arrays['keys']
+        self.rows = arrays['rows']
+        self.offsets = arrays['offsets']
+        self.actions = arrays['actions']
+        self.probs = arrays['probs']
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def create(cls, table, name=None):
+        keys = [f'{player}|{info_set}'.encode() for player in table.ids
+                for info_set in table.ids[player]]
+        rows = [row for player in table.ids for row in table.ids[player].values()]
+        order = np.argsort(np.array(keys, dtype=bytes), kind='stable')
+        keys = np.array(keys, dtype=bytes)[order]
+        arrays = [('keys', keys), ('rows', np.array(rows, dtype=np.int32)[order]),
+                  ('offsets', table.offsets), ('actions', table.actions),
+                  ('probs', table.probs)]
+
+        layout = []
+        start = 4096
+        for name_, array in arrays:
+            start = -(-start // 8) * 8
+            layout.append((name_, array.dtype.str, array.shape, start))
+            start += array.nbytes
+
+        meta = json.dumps({'action_names': table.action_names, 'arrays': layout}).encode()
+        if len(meta) + 4 > 4096:
+            raise ValueError('Too many distinct actions to fit the shared header')
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=start)
+        shm.buf[:4] = len(meta).to_bytes(4, 'little')
+        shm.buf[4:4 + len(meta)] = meta
+        for (_, array), (_, dtype, shape, offset) in zip(arrays, layout):
+            if array.size:
+                np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = array
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def row(self, player, info_set):
+        key = f'{player}|{info_set}'.encode()
+        index = np.searchsorted(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return int(self.rows[index])
+
+        return None
+
+    def distribution(self, row):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        probs = self.probs[start:end].astype(np.float64)
+        return self.actions[start:end], probs / probs.sum()
+
+    def strategy(self, player, info_set):
+        row = self.row(player, info_set)
+        if row is None:
+            return None
+
+        actions, probs = self.distribution(row)
+        return {self.action_names[a]: p for a, p in zip(actions, probs)}
+
+    def close(self):
+        for name in ['keys', 'rows', 'offsets', 'actions', 'probs']:
+            setattr(self, name, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Connection closed')
+        data += chunk
+
+    return bytes(data)
+
+
+def recv_header(sock):
+    op, count = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if op == ERROR:
+        raise ValueError('The server rejected the request')
+
+    return count
+
+
+def encode_queries(op, queries):
+    if len(queries) > MAX_COUNT:
+        raise ValueError(f'at most {MAX_COUNT} queries per request, got {len(queries)}')
+
+    parts = [HEADER.pack(op, len(queries))]
+    for player, info_set in queries:
+        data = info_set.encode()
+        if len(data) > MAX_COUNT:
+            raise ValueError(f'info set longer than {MAX_COUNT} bytes: {info_set[:40]}...')
+        parts.append(QUERY.pack(player, len(data)))
+        parts.append(data)
+
+    return b''.join(parts)
+
+
+class Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        policy = self.server.policy
+        while True:
+            try:
+                op, count = HEADER.unpack(recv_exact(self.request, HEADER.size))
+            except ConnectionError:
+                return
+
+            if op == NAMES:
+                data = json.dumps(policy.action_names).encode()
+                self.request.sendall(HEADER.pack(0, len(data)) + data)
+                continue
+            if op not in (DISTRIBUTION, SAMPLE):
+                # the payload's framing is unknown, so the stream cannot be resynced
+                self.request.sendall(HEADER.pack(ERROR, 0))
+                return
+
+            queries = []
+            for _ in range(count):
+                player, size = QUERY.unpack(recv_exact(self.request, QUERY.size))
+                queries.append((player, recv_exact(self.request, size).decode()))
+
+            parts = [HEADER.pack(0, count)]
+            for player, info_set in queries:
+                row = policy.row(player, info_set)
+                if op == DISTRIBUTION:
+                    if row is None:
+                        parts.append(bytes([0]))
+                        continue
+
+                    actions, probs = policy.distribution(row)
+                    parts.append(bytes([len(actions)]))
+                    parts.extend(ENTRY.pack(a, p) for a, p in zip(actions, probs))
+                else:
+                    if row is None:
+                        parts.append(bytes([UNKNOWN]))
+                        continue
+
+                    actions, probs = policy.distribution(row)
+                    parts.append(bytes([actions[np.random.choice(len(actions), p=probs)]]))
+
+            self.request.sendall(b''.join(parts))
+
+
+class UnixPolicyServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TCPPolicyServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(policy, address):
+    """Serve `policy` on a Unix socket path or a (host, port) TCP address."""
+    if isinstance(address, tuple):
+        server = TCPPolicyServer(address, Handler)
+    else:
+        server = UnixPolicyServer(address, Handler)
+
+    server.policy = policy
+    return server
+
+
+class PolicyClient:
+    def __init__(self, address):
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+
+        self.sock.sendall(HEADER.pack(NAMES, 0))
+        size = recv_header(self.sock)
+        self.action_names = json.loads(recv_exact(self.sock, size))
+
+    def distribution(self, queries):
+        """Action distributions for a batch of (player, info_set) queries."""
+        self.sock.sendall(encode_queries(DISTRIBUTION, queries))
+        count = recv_header(self.sock)
+
+        results = []
+        for _ in range(count):
+            num_actions = recv_exact(self.sock, 1)[0]
+            if num_actions == 0:
+                results.append(None)
+                continue
+
+            data = recv_exact(self.sock, ENTRY.size * num_actions)
+            results.append({self.action_names[a]: p for a, p in ENTRY.iter_unpack(data)})
+
+        return results
+
+    def sample(self, states):
+        """Sampled actions for a batch of states or (player, info_set) queries."""
+        queries = [(s.turn, s.info_set()) if hasattr(s, 'info_set') else s for s in states]
+        self.sock.sendall(encode_queries(SAMPLE, queries))
+        count = recv_header(self.sock)
+        actions = recv_exact(self.sock, count)
+
+        return [self.action_names[a] if a != UNKNOWN else None for a in actions]
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+    import signal
+    import argparse
+    from multiprocessing import get_context
+    from leduc.export import PolicyTable
+
+    parser = argparse.ArgumentParser(description='Serve a policy table over a local socket')
+    parser.add_argument('table', help='policy table written by PolicyTable.save')
+    parser.add_argument('--unix', help='Unix socket path')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7654)
+    parser.add_argument('--workers', type=int, default=1, help='forked server processes')
+    args = parser.parse_args()
+
+    policy = SharedPolicy.create(PolicyTable.load(args.table))
+    address = args.unix if args.unix else (args.host, args.port)
+    if args.unix and os.path.exists(args.unix):
+        os.unlink(args.unix)
+
+    server = make_server(policy, address)
+    print(f'Serving {len(policy.rows)} info sets from shared memory {policy.name} on {address}')
+    children = [get_context('fork').Process(target=server.serve_forever, daemon=True)
+                for _ in range(args.workers - 1)]
+    for child in children:
+        child.start()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for child in children:
+            child.terminate()
+        server.server_close()
+        policy.close()
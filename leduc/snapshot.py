@@ -0,0 +1,62 @@
+import numpy as np
+
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class FrozenNode:
+    """The average strategy of a node, normalized once.
+
+    Stands in for a Node wherever the node map is only read.
+    """
+    __slots__ = ('average', 'actions', 'probs', 'cdf')
+
+    def __init__(self, average):
+        self.average = average
+        self.actions = list(average)
+        self.probs = list(average.values())
+        self.cdf = list(accumulate(self.probs))
+
+    def avg_strategy(self):
+        return self.average
+
+    def sample(self):
+        index = bisect_right(self.cdf, np.random.rand() * self.cdf[-1])
+        return self.actions[min(index, len(self.actions) - 1)]
+
+    def __repr__(self):
+        return f'average: {self.average}\n'
+
+
+def freeze(node_map):
+    """Snapshot the average strategies of `node_map` for evaluation and rollouts."""
+    return {player: {info_set: FrozenNode(node.avg_strategy())
+                     for info_set, node in nodes.items()}
+            for player, nodes in node_map.items()}
+
+
+if __name__ == '__main__':
+    import time
+    from leduc.card import Card
+    from leduc.monte import learn
+    from leduc.util import traverse_tree
+    from leduc.state import Leduc as State
+    from leduc.hand_eval import leduc_eval
+    from itertools import permutations
+
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    learn(20000, cards, 3, node_map, action_map)
+
+    start = time.perf_counter()
+    frozen = freeze(node_map)
+    print(f'freeze: {time.perf_counter() - start:.4f}s')
+
+    deals = [list(t) for t in permutations(cards, 3)]
+    for name, nodes in [('node map', node_map), ('snapshot', frozen)]:
+        start = time.perf_counter()
+        util = sum(traverse_tree(State(deal, num_players, leduc_eval), nodes, action_map)
+                   for deal in deals) / len(deals)
+        print(f'{name}: {time.perf_counter() - start:.4f}s per evaluation {util}')
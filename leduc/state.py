@@ -2,6 +2,9 @@ import numpy as np
 
 from copy import copy, deepcopy
 
+from leduc.iso import relabel
+from leduc.deck import NAME, encode
+
 
 class Player:
     def __init__(self):
@@ -25,11 +28,13 @@ class Player:
         return self.bets + other
 
 class State:
-    def __init__(self, cards, num_players, hand_eval):
+    def __init__(self, cards, num_players, hand_eval, canonical=False, abstraction=None):
         self.num_players = num_players
+        self.canonical = canonical
+        self.abstraction = abstraction
         self.num_rounds = 1
         self.eval = hand_eval
-        self.cards = cards
+        self.cards = encode(cards)
         self.players = [Player() for _ in range(num_players)]
         self.history = [[] for _ in range(self.num_rounds)]
         self.round = 0
@@ -46,7 +51,7 @@ class State:
         return hash(f'{self.history}, {self.cards}')
 
     def __copy__(self):
-        new_state = State(self.cards, self.num_players, self.eval)
+        new_state = State(self.cards, self.num_players, self.eval, self.canonical, self.abstraction)
         new_state.players = deepcopy(self.players)
         new_state.history = deepcopy(self.history)
         new_state.turn = self.turn
@@ -56,13 +61,21 @@ class State:
         return new_state
 
     def info_set(self):
+        if self.abstraction is not None:
+            return self.abstraction.info_set(self)
+
         hole_card = self.cards[self.turn]
         if len(self.cards) > len(self.players):
             board_card = self.cards[len(self.players)]
         else:
             board_card = None
 
-        info_set = f"{hole_card} |{board_card if board_card is not None else ''}| {str(self)}"
+        if self.canonical:
+            # suits only matter relative to each other, so name them by first appearance
+            hole_card, *board = relabel([hole_card] + ([board_card] if board_card is not None else []))
+            board_card = board[0] if board else None
+
+        info_set = f"{NAME[hole_card]} |{NAME[board_card] if board_card is not None else ''}| {str(self)}"
         return info_set
 
     def take(self, action, deep=False):
@@ -168,14 +181,14 @@ class State:
 
 
 class Leduc(State):
-    def __init__(self, cards, num_players, hand_eval):
-        super().__init__(cards, num_players, hand_eval)
+    def __init__(self, cards, num_players, hand_eval, canonical=False, abstraction=None):
+        super().__init__(cards, num_players, hand_eval, canonical, abstraction)
         self.num_rounds = 2
         self.players = [Player() for _ in range(num_players)]
         self.history = [[] for _ in range(self.num_rounds)]
 
     def __copy__(self):
-        new_state = Leduc(self.cards, self.num_players, self.eval)
+        new_state = Leduc(self.cards, self.num_players, self.eval, self.canonical, self.abstraction)
         new_state.players = deepcopy(self.players)
         new_state.history = deepcopy(self.history)
         new_state.turn = self.turn
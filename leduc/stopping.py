@@ -0,0 +1,141 @@
+import time
+
+
+class Stop:
+    """A stopping criterion for learn() and search(), checked every `interval` iterations."""
+    interval = 100
+
+    def reset(self):
+        pass
+
+    def done(self, i, node_map, action_map):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return type(self).__name__
+
+
+class Budget(Stop):
+    """Stop once `seconds` of wall-clock time have passed since reset()."""
+    def __init__(self, seconds, interval=10):
+        self.seconds = seconds
+        self.interval = interval
+        self.start = time.perf_counter()
+
+    def reset(self):
+        self.start = time.perf_counter()
+
+    def done(self, i, node_map, action_map):
+        return time.perf_counter() - self.start >= self.seconds
+
+    def __repr__(self):
+        return f'Budget({self.seconds}s)'
+
+
+class Converged(Stop):
+    """Stop once the average strategy moves less than `tolerance` between checks.
+
+    The change is the largest difference in any action probability, taken
+    over the info sets whose average strategy moved since the last check.
+    Strategy sums that were only rescaled (by a discounting rule) or not
+    updated at all leave the average where it was and do not count, and a
+    check where no average moved never stops.
+    """
+    # rescaling the sums moves an average by rounding error only
+    noise = 1e-12
+
+    def __init__(self, tolerance=1e-3, interval=500):
+        self.tolerance = tolerance
+        self.interval = interval
+        self.previous = {}
+        self.delta = float('inf')
+
+    def reset(self):
+        self.previous = {}
+        self.delta = float('inf')
+
+    def done(self, i, node_map, action_map):
+        delta, touched = 0, 0
+        for player, nodes in node_map.items():
+            for info_set, node in nodes.items():
+                sums = tuple(node.strategy_sum.values())
+                last = self.previous.get((player, info_set))
+                if last is not None and last[0] == sums:
+                    continue
+
+                average = node.avg_strategy()
+                if last is not None:
+                    change = max(abs(p - last[1].get(a, 0)) for a, p in average.items())
+                    if change > self.noise:
+                        touched += 1
+                        delta = max(delta, change)
+                self.previous[player, info_set] = (sums, average)
+
+        self.delta = delta if touched else float('inf')
+        return self.delta < self.tolerance
+
+    def __repr__(self):
+        return f'Converged(delta {self.delta:.2g} < {self.tolerance})'
+
+
+class Exploitability(Stop):
+    """Stop once an exploitability estimate on `samples` random deals drops below `threshold`.
+
+    With samples=None the exact two-player exploitability is used.
+    """
+    def __init__(self, threshold, cards, num_cards, samples=30, interval=2000):
+        self.threshold = threshold
+        self.cards = cards
+        self.num_cards = num_cards
+        self.samples = samples
+        self.interval = interval
+        self.value = float('inf')
+
+    def reset(self):
+        self.value = float('inf')
+
+    def done(self, i, node_map, action_map):
+        from leduc.best_response import exact_exploitability, sampled_exploitability
+
+        if self.samples is None:
+            self.value = exact_exploitability(self.cards, self.num_cards, node_map, action_map)
+        else:
+            self.value = sampled_exploitability(self.cards, self.num_cards, node_map, action_map,
+                                                self.samples)
+        return self.value < self.threshold
+
+    def __repr__(self):
+        return f'Exploitability({self.value:.3g} < {self.threshold})'
+
+
+class AnyOf(Stop):
+    """Stop as soon as any of `criteria` is met; `reason` is the one that fired."""
+    interval = 1
+
+    def __init__(self, *criteria):
+        self.criteria = criteria
+        self.reason = None
+
+    def reset(self):
+        self.reason = None
+        for criterion in self.criteria:
+            criterion.reset()
+
+    def done(self, i, node_map, action_map):
+        for criterion in self.criteria:
+            if i % criterion.interval == 0 and criterion.done(i, node_map, action_map):
+                self.reason = criterion
+                return True
+
+        return False
+
+    def __repr__(self):
+        return f'AnyOf{self.criteria}'
+
+
+def get_stop(stop):
+    """Accept a criterion, a list of criteria or None."""
+    if stop is None or isinstance(stop, Stop):
+        return stop
+
+    return AnyOf(*stop)
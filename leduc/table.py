@@ -0,0 +1,205 @@
+import pickle
+import sqlite3
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from collections.abc import Mapping, MutableMapping
+
+CAPACITY = 100000
+BATCH = 1000
+MMAP_SIZE = 1 << 30
+
+
+class DiskNodes(MutableMapping):
+    """One player's info sets: an LRU cache of live nodes over a SQLite table.
+
+    Nodes are mutated in place by the training code, so every cached node
+    is treated as dirty. Evicted nodes are queued and written back `batch`
+    at a time in one transaction. While the table is pinned (see
+    DiskTable.pin) queued nodes stay in memory, so nodes that the caller
+    still holds are never written out from under it.
+    """
+    def __init__(self, table, player):
+        self.table = table
+        self.player = player
+        self.cache = OrderedDict()
+        self.pending = {}
+
+    def __getitem__(self, info_set):
+        cache = self.cache
+        node = cache.get(info_set)
+        if node is not None:
+            cache.move_to_end(info_set)
+            return node
+
+        node = self.pending.pop(info_set, None)
+        if node is None:
+            row = self.table.db.execute('SELECT node FROM nodes WHERE player = ? AND info_set = ?',
+                                        (self.player, info_set)).fetchone()
+            if row is None:
+                raise KeyError(info_set)
+            node = pickle.loads(row[0])
+            self.table.misses += 1
+
+        cache[info_set] = node
+        self.evict()
+        return node
+
+    def __setitem__(self, info_set, node):
+        self.pending.pop(info_set, None)
+        self.cache[info_set] = node
+        self.cache.move_to_end(info_set)
+        self.evict()
+
+    def __delitem__(self, info_set):
+        found = self.cache.pop(info_set, None) is not None
+        found = self.pending.pop(info_set, None) is not None or found
+        cursor = self.table.db.execute('DELETE FROM nodes WHERE player = ? AND info_set = ?',
+                                       (self.player, info_set))
+        if not found and cursor.rowcount == 0:
+            raise KeyError(info_set)
+
+    def evict(self):
+        excess = len(self.cache) - self.table.capacity
+        if excess <= 0:
+            return
+
+        cache = self.cache
+        for _ in range(excess):
+            info_set, node = cache.popitem(last=False)
+            self.pending[info_set] = node
+
+        if not self.table.pins:
+            self.flush()
+
+    def flush(self):
+        """Write the queued nodes once there is a batch of them."""
+        if len(self.pending) >= self.table.batch:
+            self.write(self.pending)
+            self.pending = {}
+
+    def write(self, nodes):
+        self.table.db.executemany(
+            'INSERT OR REPLACE INTO nodes VALUES (?, ?, ?)',
+            ((self.player, info_set, pickle.dumps(node, pickle.HIGHEST_PROTOCOL))
+             for info_set, node in nodes.items()))
+        self.table.db.commit()
+        self.table.writes += len(nodes)
+
+    def sync(self):
+        """Write every cached and queued node, keeping the cache warm."""
+        self.write({**self.pending, **self.cache})
+        self.pending = {}
+
+    def __len__(self):
+        self.sync()
+        return self.table.db.execute('SELECT COUNT(*) FROM nodes WHERE player = ?',
+                                     (self.player,)).fetchone()[0]
+
+    def __iter__(self):
+        self.sync()
+        rows = self.table.db.execute('SELECT info_set FROM nodes WHERE player = ?',
+                                     (self.player,)).fetchall()
+        return (info_set for info_set, in rows)
+
+
+class DiskTable(Mapping):
+    """A node_map whose info sets live in a SQLite file, with hot rows cached in memory.
+
+    Drop-in for `{player: {info_set: node}}` wherever nodes are looked up,
+    created and mutated (monte.learn, accumulate_regrets, update_strategy,
+    freeze). Iterating a player's nodes walks the whole file. Reopening a
+    path continues from what is stored there.
+
+    Code that keeps a node across later lookups (a tree walk mutating its
+    node after visiting the children) must hold pin(); learn() pins every
+    iteration. Outside a pin, mutate a node before the next lookup.
+    """
+    def __init__(self, path, num_players, capacity=CAPACITY, batch=BATCH):
+        self.path = path
+        self.capacity = capacity
+        self.batch = batch
+        self.misses = 0
+        self.writes = 0
+        self.pins = 0
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        self.db.execute('CREATE TABLE IF NOT EXISTS nodes (player INTEGER, info_set TEXT, '
+                        'node BLOB, PRIMARY KEY (player, info_set)) WITHOUT ROWID')
+        self.players = {player: DiskNodes(self, player) for player in range(num_players)}
+
+    def __getitem__(self, player):
+        return self.players[player]
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __len__(self):
+        return len(self.players)
+
+    @contextmanager
+    def pin(self):
+        """Keep every node looked up in the block in memory until the outermost pin ends."""
+        self.pins += 1
+        try:
+            yield self
+        finally:
+            self.pins -= 1
+            if not self.pins:
+                for nodes in self.players.values():
+                    nodes.flush()
+
+    def sync(self):
+        for nodes in self.players.values():
+            nodes.sync()
+
+    def close(self):
+        self.sync()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pinned(node_map):
+    """node_map.pin() for node maps that write nodes back, a no-op for dicts."""
+    pin = getattr(node_map, 'pin', None)
+    return pin() if pin is not None else nullcontext()
+
+
+if __name__ == '__main__':
+    import os
+    import time
+    import tempfile
+    import numpy as np
+    from leduc.card import Card
+    from leduc.monte import learn
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    iterations = 5000
+    directory = tempfile.mkdtemp()
+
+    for name, capacity in [('in-memory', None), ('disk, all cached', CAPACITY),
+                           ('disk, 64 cached', 64)]:
+        np.random.seed(0)
+        action_map = {i: {} for i in range(2)}
+        if capacity is None:
+            node_map = {i: {} for i in range(2)}
+        else:
+            node_map = DiskTable(os.path.join(directory, f'{capacity}.db'), 2, capacity, batch=256)
+
+        start = time.perf_counter()
+        learn(iterations, cards, 3, node_map, action_map, rule='cfr')
+        elapsed = time.perf_counter() - start
+
+        detail = ''
+        if capacity is not None:
+            detail = f', {node_map.misses} misses, {node_map.writes} rows written'
+            node_map.close()
+        print(f'{name}: {iterations / elapsed:.0f} iterations/sec{detail}')
@@ -0,0 +1,280 @@
+import time
+import asyncio
+import inspect
+import numpy as np
+
+from copy import copy, deepcopy
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+from leduc.deck import deal_table
+from leduc.public import add_action
+from leduc.snapshot import freeze
+from leduc.stopping import Budget
+from leduc.translate import translate
+
+# seconds past a table's time bank to wait for a search that stopped itself
+GRACE = .5
+
+
+def legal(state, action_map):
+    """Tree actions at the public node of `state`, without registering it."""
+    public = action_map[state.turn].get(str(state))
+    return public['actions'] if public is not None else state.valid_actions()
+
+
+_worker = {}
+
+
+def _init(blueprint, action_map, cards, num_cards, search):
+    if search is None:
+        from leduc.monte import Search as search
+
+    _worker['blueprint'] = blueprint
+    _worker['action_map'] = action_map
+    _worker['cards'] = cards
+    _worker['num_cards'] = num_cards
+    _worker['search'] = search
+
+
+def _search(state, off_tree, deadline=None):
+    """Re-solve from `state` after adding the table's off-tree actions to a private copy.
+
+    The search stops itself at `deadline` (a time.time()), so a table that
+    runs out of time never leaves a worker busy. Returns (policy, finished);
+    policy is None when the deadline passed while the job was queued.
+    """
+    stop = None
+    if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None, False
+        stop = Budget(remaining, interval=1)
+
+    blueprint, action_map = _worker['blueprint'], _worker['action_map']
+    if off_tree:
+        blueprint, action_map = deepcopy(blueprint), deepcopy(action_map)
+        for public, action in off_tree:
+            add_action(public, action, blueprint, action_map)
+
+    search = _worker['search'](state, blueprint, action_map, _worker['cards'], _worker['num_cards'],
+                               stop=stop)
+    policy = freeze(search.search())
+    return policy, search.iterations >= search.budget
+
+
+class Table:
+    """One hand between the engine's bot and an opponent policy.
+
+    Everything that Pluribus keeps on itself (root, abstract state, current
+    policy) lives here, so any number of tables can run side by side.
+    `time_limit` is the table's time bank for searches in this hand; a
+    search that would overrun it stops when the bank runs out and play
+    continues from what it solved so far, or from the current policy if
+    it never started.
+    """
+    def __init__(self, engine, deal, opponent, seat=0, time_limit=None):
+        self.engine = engine
+        # policies keep per-hand state in reset(), so every table gets its own
+        self.opponent = copy(opponent)
+        self.seat = seat
+        self.bank = time_limit
+        self.state = engine.State(deal, engine.num_players, engine.eval)
+        self.abstract = deepcopy(self.state)
+        self.root = deepcopy(self.state)
+        self.node_map = engine.policy
+        self.off_tree = []
+        self.searches = []
+        self.timeouts = 0
+        self.decisions = 0
+
+    async def play(self):
+        state = self.state
+        self.opponent.reset(state)
+        while state.terminal is False:
+            if state.turn == self.seat:
+                action = self.act()
+                self.decisions += 1
+                state.take(action)
+                self.abstract.take(action)
+            else:
+                action = self.opponent.act(state)
+                if inspect.isawaitable(action):
+                    action = await action
+                if await self.observe(action):
+                    continue
+
+            if self.abstract.round > self.root.round and not self.abstract.terminal:
+                self.root = deepcopy(self.abstract)
+                await self.search()
+
+        return state.utility()[self.seat]
+
+    def act(self):
+        node = self.node_map[self.abstract.turn].get(self.abstract.info_set())
+        if node is None:
+            actions = legal(self.abstract, self.engine.action_map)
+            return actions[np.random.choice(len(actions))]
+
+        return node.sample()
+
+    async def observe(self, action):
+        """Play the opponent's action, translating or re-solving when it is off-tree.
+
+        Returns True when the hand ended or a search already covered the round.
+        """
+        translated, error = action, 0
+        actions = legal(self.abstract, self.engine.action_map)
+        if action not in actions:
+            translated, error = translate(self.state, action, self.abstract, actions)
+
+        off_tree = error > self.engine.threshold
+        if off_tree:
+            translated = action
+            self.off_tree.append((deepcopy(self.abstract), action))
+
+        self.state.take(action)
+        self.abstract.take(translated)
+
+        if off_tree and not self.abstract.terminal:
+            if self.abstract.round > self.root.round:
+                self.root = deepcopy(self.abstract)
+            await self.search()
+            return True
+
+        return self.state.terminal
+
+    async def search(self):
+        if self.bank is not None and self.bank <= 0:
+            self.timeouts += 1
+            return
+
+        start = time.perf_counter()
+        deadline = time.time() + self.bank if self.bank is not None else None
+        future = self.engine.submit(deepcopy(self.root), list(self.off_tree), deadline)
+        try:
+            policy, finished = await asyncio.wait_for(
+                future, self.bank + GRACE if self.bank is not None else None)
+        except asyncio.TimeoutError:
+            # the job still ends at the deadline, or skips itself if it is still queued
+            policy, finished = None, False
+
+        if policy is not None:
+            self.node_map = policy
+            self.searches.append(time.perf_counter() - start)
+        if not finished:
+            self.timeouts += 1
+
+        if self.bank is not None:
+            self.bank -= time.perf_counter() - start
+
+
+class Report:
+    def __init__(self, payoffs, seconds, decisions, searches, timeouts):
+        self.payoffs = np.array(payoffs)
+        self.hands = len(payoffs)
+        self.seconds = seconds
+        self.decisions = decisions
+        self.searches = np.array(searches)
+        self.timeouts = timeouts
+
+    @property
+    def hands_per_sec(self):
+        return self.hands / self.seconds if self.seconds > 0 else float('inf')
+
+    def summary(self):
+        return {'hands': self.hands, 'seconds': self.seconds, 'hands_per_sec': self.hands_per_sec,
+                'decisions': self.decisions, 'searches': len(self.searches),
+                'search_ms_mean': float(self.searches.mean() * 1000) if len(self.searches) else 0.,
+                'timeouts': self.timeouts, 'win_rate': float(self.payoffs.mean())}
+
+    def __repr__(self):
+        lines = [f'{self.hands} hands in {self.seconds:.1f}s ({self.hands_per_sec:.1f} hands/sec), '
+                 f'{self.decisions} decisions',
+                 f'{len(self.searches)} searches'
+                 + (f', mean {self.searches.mean() * 1000:.0f}ms' if len(self.searches) else '')
+                 + f', {self.timeouts} over the time limit',
+                 f'win rate {self.payoffs.mean():+.4f} chips/hand']
+        return '\n'.join(lines)
+
+
+class Engine:
+    """Runs many tables at once against one read-only blueprint.
+
+    Tables are coroutines on one event loop; their `Search` calls go to a
+    pool of `workers` processes that each hold a copy of the blueprint,
+    loaded once when the pool starts.
+    """
+    def __init__(self, blueprint, action_map, cards, num_cards, search=None, workers=2,
+                 threshold=.5):
+        if len(cards) > 4:
+            from leduc.state import Leduc as State
+            from leduc.hand_eval import leduc_eval as eval
+        else:
+            from leduc.state import State
+            from leduc.hand_eval import kuhn_eval as eval
+
+        self.State = State
+        self.eval = eval
+        self.action_map = action_map
+        self.num_players = len(blueprint)
+        self.threshold = threshold
+        self.policy = freeze(blueprint)
+        self.all_combos = deal_table(cards, num_cards)
+        self.pool = ProcessPoolExecutor(workers, mp_context=get_context('fork'), initializer=_init,
+                                        initargs=(blueprint, action_map, cards, num_cards, search))
+
+    def submit(self, state, off_tree, deadline=None):
+        return asyncio.wrap_future(self.pool.submit(_search, state, off_tree, deadline))
+
+    async def run(self, opponents, hands, concurrency=100, time_limit=None):
+        """Play `hands` hands, at most `concurrency` at a time.
+
+        `opponents` is a list of policies; hand k plays opponents[k % len]
+        with the engine in seat k % num_players.
+        """
+        slots = asyncio.Semaphore(concurrency)
+        tables = []
+
+        async def play(k):
+            async with slots:
+                deal = self.all_combos[np.random.choice(len(self.all_combos))]
+                table = Table(self, deal, opponents[k % len(opponents)], seat=k % self.num_players,
+                              time_limit=time_limit)
+                tables.append(table)
+                return await table.play()
+
+        start = time.perf_counter()
+        payoffs = await asyncio.gather(*(play(k) for k in range(hands)))
+        seconds = time.perf_counter() - start
+
+        return Report(payoffs, seconds, sum(t.decisions for t in tables),
+                      [s for t in tables for s in t.searches], sum(t.timeouts for t in tables))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_tables(blueprint, action_map, cards, num_cards, opponents, hands, concurrency=100,
+               time_limit=None, search=None, workers=2):
+    engine = Engine(blueprint, action_map, cards, num_cards, search=search, workers=workers)
+    try:
+        return asyncio.run(engine.run(opponents, hands, concurrency, time_limit))
+    finally:
+        engine.close()
+
+
+if __name__ == '__main__':
+    from leduc.card import Card
+    from leduc.monte import learn
+    from leduc.match import UniformPolicy, BlueprintPolicy
+    from leduc.resolve import FullWidthSearch
+
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    learn(5000, cards, 3, node_map, action_map)
+
+    opponents = [UniformPolicy(), BlueprintPolicy(node_map, action_map)]
+    print(run_tables(node_map, action_map, cards, 3, opponents, 200, time_limit=2,
+                     search=FullWidthSearch))
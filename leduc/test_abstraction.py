@@ -0,0 +1,76 @@
+import numpy as np
+
+from leduc.abstraction import build, equity, kmeans, leduc_deck, Buckets
+from leduc.best_response import exact_exploitability
+from leduc.hand_eval import leduc_eval
+from leduc.state import Leduc as State
+from leduc.monte import learn
+from leduc.card import Card
+
+deck = leduc_deck(ranks=5)
+
+
+def test_equity():
+    # a pair with the board beats every other card
+    assert equity(Card(14, 1), Card(14, 2), deck, leduc_eval) == 1
+    # the lowest card without a pair loses to everything but the other low card, which ties
+    low = Card(10, 1)
+    assert equity(low, Card(14, 1), deck, leduc_eval) == .5 / 8
+
+
+def test_kmeans():
+    points = np.array([[0.], [.1], [.05], [5.], [5.1], [9.]])
+    labels = kmeans(points, 3)
+    assert len(set(labels[:3])) == 1 and labels[3] == labels[4] and labels[5] not in labels[:5], labels
+    assert len(set(kmeans(points[:2], 5))) == 2
+
+
+def test_build(tmp_path):
+    abstraction = build(deck, leduc_eval, buckets=(3, 4), workers=1)
+    assert len(abstraction.table) == len(deck) + len(deck) * (len(deck) - 1)
+    assert len(abstraction) == 4
+
+    # pool and in-process builds agree
+    assert build(deck, leduc_eval, buckets=(3, 4), workers=2).table == abstraction.table
+
+    # buckets are numbered weakest first
+    assert abstraction.bucket(Card(14, 1)) == 2
+    assert abstraction.bucket(Card(10, 2)) == 0
+    assert abstraction.bucket(Card(13, 1), Card(13, 2)) == 3
+    assert abstraction.bucket(Card(10, 1), Card(14, 2)) == 0
+
+    cache = str(tmp_path / 'buckets.npz')
+    built = build(deck, leduc_eval, buckets=(3, 4), workers=1, cache=cache)
+    loaded = Buckets.load(cache)
+    assert loaded.table == built.table == abstraction.table
+    assert build(deck, leduc_eval, buckets=(3, 4), cache=cache).signature == built.signature
+    assert build(deck, leduc_eval, buckets=(2, 2), cache=cache).signature != built.signature
+    assert len(Buckets.load(cache)) == 2
+
+
+def test_info_set():
+    abstraction = build(deck, leduc_eval, buckets=(3, 4), workers=1)
+    a = State([Card(13, 1), Card(10, 1), Card(14, 1)], 2, leduc_eval, abstraction=abstraction)
+    b = State([Card(13, 2), Card(11, 1), Card(12, 1)], 2, leduc_eval, abstraction=abstraction)
+    assert a.info_set() == b.info_set() == f"b{abstraction.bucket(Card(13, 1))} || [[]]", a.info_set()
+
+    # the board only counts once it is dealt
+    for state in (a, b):
+        state.take('C')
+        state.take('C')
+    assert a.info_set() != b.info_set()
+    assert a.info_set() == f"b{abstraction.bucket(Card(13, 1), Card(14, 1))} || [['C', 'C'], []]"
+
+
+def test_learn():
+    np.random.seed(0)
+    abstraction = build(deck, leduc_eval, buckets=(3, 4), workers=1)
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    learn(3000, deck, 3, node_map, action_map, abstraction=abstraction)
+
+    for player in range(2):
+        assert all(info_set.startswith('b') for info_set in node_map[player])
+    assert sum(len(nodes) for nodes in node_map.values()) < 200
+    exploit = exact_exploitability(deck, 3, node_map, action_map, abstraction=abstraction)
+    assert 0 < exploit < 2, exploit
@@ -0,0 +1,58 @@
+import numpy as np
+
+from leduc.batch import learn, gather, accumulate_regrets
+from leduc.util import expected_utility
+from leduc.hand_eval import kuhn_eval
+from leduc.card import Card
+from leduc.state import State
+
+np.random.seed(0)
+
+
+def test_gather():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    ace, king, queen = Card(14, 1), Card(13, 1), Card(12, 1)
+    deals = [[ace, king], [ace, queen], [king, ace]]
+    state = State(deals[0], num_players, kuhn_eval)
+
+    actions, nodes, rows, strategy = gather(state, deals, node_map, action_map)
+
+    assert len(nodes) == 2 and len(node_map[0]) == 2, node_map
+    assert list(rows) == [0, 0, 1], rows
+    assert np.allclose(strategy, 1 / 3), strategy
+    assert actions == ['F', 'C', '1R'], actions
+
+
+def test_accumulate_regrets():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    ace, king, queen = Card(14, 1), Card(13, 1), Card(12, 1)
+    deals = [[ace, king]] * 4 + [[queen, king]] * 4
+    state = State(deals[0], num_players, kuhn_eval)
+
+    util = accumulate_regrets(0, state, deals, node_map, action_map)
+
+    assert util.shape == (8, 2), util.shape
+    assert np.allclose(util.sum(axis=1), 0), util
+
+    ace_node = node_map[0]['As || [[]]']
+    queen_node = node_map[0]['Qs || [[]]']
+    assert ace_node.regret_sum['F'] < 0 < ace_node.regret_sum['1R'], ace_node
+    assert ace_node.regret_sum['F'] < queen_node.regret_sum['F'], f'{ace_node} {queen_node}'
+
+
+def test_expected_utility():
+    np.random.seed(0)
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(10000, cards, 2, node_map, action_map, batch_size=32)
+
+    util = expected_utility(cards, 2, 2, node_map, action_map)
+
+    assert np.isclose(util.sum(), 0), f"Util was {util}"
+    assert abs(util[1] - 1/18) <= .01, f"Util not converging {util}"
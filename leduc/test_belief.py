@@ -0,0 +1,88 @@
+import numpy as np
+
+from leduc.belief import Belief
+from leduc.resolve import FullWidthSearch
+from leduc.snapshot import FrozenNode, freeze
+from leduc.monte import learn, Search
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.deck import RANK, encode
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+deal = [Card(14, 1), Card(13, 1), Card(12, 1)]
+
+
+def raises_with_aces():
+    """Player 0 raises first with an ace and checks otherwise, on a Qs board."""
+    node_map = {0: {}, 1: {}}
+    for card in cards:
+        raises = 1 if card.rank == 14 else 0
+        node_map[0][f"{card} |Qs| [[]]"] = FrozenNode({'F': 0, 'C': 1 - raises, '2R': raises})
+    return node_map, {0: {}, 1: {}}
+
+
+def test_observe():
+    belief = Belief(cards, 2, *raises_with_aces())
+    state = State(list(deal), 2, leduc_eval)
+    belief.observe(state, '2R')
+    assert np.allclose(belief.ranges[0], [.5, 0, 0, .5, 0, 0]), belief.ranges[0]
+    assert np.allclose(belief.ranges[1], 1 / 6)
+    assert state.cards == encode(deal)
+
+    # an action the blueprint never takes leaves the range alone
+    state.take('2R')
+    belief.observe(state, '7R')
+    assert np.allclose(belief.ranges[1], 1 / 6)
+
+
+def test_weigh():
+    belief = Belief(cards, 2, *raises_with_aces())
+    state = State(list(deal), 2, leduc_eval)
+    belief.observe(state, '2R')
+
+    deals = [[a, b, c] for a in cards for b in cards for c in cards
+             if len({repr(a), repr(b), repr(c)}) == 3]
+    weights = belief.weigh(deals)
+    assert np.isclose(weights.sum(), 1)
+    assert all((w > 0) == (d[0].rank == 14) for d, w in zip(deals, weights))
+    assert np.allclose(belief.weigh(deals, exclude=0), 1 / len(deals))
+
+    state.take('2R').take('C')
+    weights = belief.weigh(deals, state=state)
+    assert all(w == 0 for d, w in zip(deals, weights) if repr(d[2]) != 'Qs')
+    assert np.isclose(weights.sum(), 1)
+
+
+def test_search_samples_ranges():
+    node_map, action_map = raises_with_aces()
+    belief = Belief(cards, 2, node_map, action_map)
+    state = State(list(deal), 2, leduc_eval)
+    belief.observe(state, '2R')
+    state.take('2R')
+
+    search = Search(state, node_map, action_map, cards, 3, iterations=1, belief=belief)
+    assert all((w > 0) == (RANK[d[0]] == 14) for d, w in zip(search.deals, search.weights))
+    # the traverser's own range is left out of its rollouts
+    assert all(w > 0 for w in search.rollout_weights[0])
+    assert all((w > 0) == (RANK[d[0]] == 14) for d, w in zip(search.all_combos, search.rollout_weights[1]))
+
+
+def test_full_width_root_reach():
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    learn(2000, cards, 3, node_map, action_map)
+
+    state = State(list(deal), 2, leduc_eval)
+    belief = Belief(cards, 2, freeze(node_map), action_map)
+    for action in ['2R', 'C']:
+        belief.observe(state, action)
+        state.take(action)
+
+    replayed = FullWidthSearch(state, node_map, action_map, cards, 3)
+    replayed.frozen = freeze(node_map)
+    tracked = FullWidthSearch(state, node_map, action_map, cards, 3, belief=belief)
+    for expected, reach in zip(replayed.root_reach(), tracked.root_reach()):
+        assert np.allclose(expected / expected.sum(), reach / reach.sum()), (expected, reach)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from leduc.best_response import exact_exploitability
+from leduc.vanilla import learn
+from leduc.card import Card
+
+np.random.seed(0)
+
+
+def test_exact_exploitability():
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+
+    uniform = exact_exploitability(cards, 2, node_map, action_map)
+    assert uniform > 0, uniform
+
+    learn(2000, cards, 2, node_map, action_map)
+    trained = exact_exploitability(cards, 2, node_map, action_map)
+    assert 0 <= trained < .05 < uniform, f'{trained} {uniform}'
+
+
+def test_exact_exploitability_canonical():
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+
+    full = exact_exploitability(cards, 3, node_map, action_map)
+    canonical = exact_exploitability(cards, 3, node_map, action_map, canonical=True)
+    assert np.isclose(full, canonical), f'{full} {canonical}'
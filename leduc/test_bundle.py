@@ -0,0 +1,47 @@
+import os
+import pickle
+
+from leduc.bundle import build, load
+from leduc.monte import learn
+from leduc.card import Card
+
+
+def test_bundle(tmp_path):
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(500, cards, 2, node_map, action_map)
+
+    blueprint_path = str(tmp_path / 'blueprint.po')
+    actions_path = str(tmp_path / 'actions.po')
+    bundle_path = str(tmp_path / 'blueprint.bundle')
+    with open(blueprint_path, 'wb') as f:
+        pickle.dump(node_map, f)
+    with open(actions_path, 'wb') as f:
+        pickle.dump(action_map, f)
+
+    assert load(bundle_path) is None
+    build(node_map, action_map, cards, 2, bundle_path, blueprint_path, actions_path)
+    bundle = load(bundle_path)
+
+    assert len(bundle.deals) == 6, bundle.deals
+    assert bundle.policy[0].keys() == node_map[0].keys()
+    assert bundle._blueprint is None
+    assert bundle.blueprint[0].keys() == node_map[0].keys()
+
+    for path in (actions_path, blueprint_path):
+        build(node_map, action_map, cards, 2, bundle_path, blueprint_path, actions_path)
+        assert load(bundle_path) is not None
+        mtime = os.path.getmtime(path)
+        os.utime(path, (mtime + 10, mtime + 10))
+        assert load(bundle_path) is None, path
+
+    build(node_map, action_map, cards, 2, bundle_path, blueprint_path, actions_path)
+    assert not os.path.exists(bundle_path + '.tmp')
+    with open(bundle_path, 'rb') as f:
+        data = f.read()
+    for corrupt in (data[:len(data) // 2], b'not a pickle'):
+        with open(bundle_path, 'wb') as f:
+            f.write(corrupt)
+        assert load(bundle_path) is None, corrupt[:10]
@@ -0,0 +1,75 @@
+import pickle
+from copy import deepcopy
+
+from leduc.deck import DECK, NAME, RANK, SUIT, card_id, decode, deal_table, encode
+from leduc.hand_eval import leduc_eval, kuhn_eval
+from leduc.card import Card
+from leduc.state import Leduc as State
+
+cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def test_interned():
+    assert Card(14, 1) is Card(14, 1) and Card(14, 1) is not Card(14, 2)
+    assert all(a is b for a, b in zip(pickle.loads(pickle.dumps(cards)), cards))
+    assert deepcopy(cards)[0] is cards[0]
+    assert not hasattr(Card(14, 1), '__dict__')
+
+
+def test_equality():
+    assert Card(14, 1) == Card(14, 1) and Card(14, 1) != Card(14, 2)
+    assert {Card(14, 1): 1}.get(Card(14, 2)) is None
+    assert Card(14, 1) != 50 and not Card(14, 1) == 50
+    assert RANK[Card(14, 1)] == RANK[Card(14, 2)]
+
+
+def test_lookups():
+    assert len(DECK) == 52 and [card_id(card) for card in DECK] == list(range(52))
+    for card in DECK:
+        assert (RANK[card.id], SUIT[card.id], NAME[card.id]) == (card.rank, card.suit, repr(card))
+        assert RANK[card] == card.rank
+    assert encode(cards) == [48, 44, 40, 49, 45, 41]
+    assert all(a is b for a, b in zip(decode(encode(cards)), cards))
+    assert repr(decode([0, 51])) == '[2s, Ac]'
+
+
+def test_deal_table():
+    deals = deal_table(cards, 3)
+    assert len(deals) == 120 and len({tuple(deal) for deal in deals}) == 120
+    assert all(type(card) is int for deal in deals for card in deal)
+    assert deals == deal_table(encode(cards), 3)
+
+
+def test_evaluators():
+    for hole in cards:
+        for board in cards:
+            if hole is not board:
+                assert leduc_eval(hole.id, [board.id]) == leduc_eval(hole, [board])
+    assert leduc_eval(Card(14, 1), [Card(14, 2)]) == 224
+    assert leduc_eval(Card(12, 1), [Card(14, 2)]) == 14 * 14 + 12
+    assert kuhn_eval(Card(13, 2).id, None) == 13
+
+
+def test_state():
+    state = State(cards[:3], 2, leduc_eval)
+    assert state.cards == [48, 44, 40]
+    assert state.info_set() == 'As |Qs| [[]]'
+    state.take('C').take('C').take('C')
+    assert state.info_set() == 'Ks |Qs| [[\'C\', \'C\'], [\'C\']]', state.info_set()
+
+    canonical = State([Card(13, 2), Card(14, 1), Card(12, 2)], 2, leduc_eval, canonical=True)
+    assert canonical.info_set() == 'Ks |Qs| [[]]'
+    # the 2 of spades is id 0
+    assert State([Card(14, 1), Card(13, 1), Card(2, 1)], 2, leduc_eval).info_set() == 'As |2s| [[]]'
+
+
+def test_assigned_cards():
+    # code may still assign Card objects to a state directly
+    from leduc.resolve import FullWidthSearch
+
+    state = State(cards[:3], 2, leduc_eval).take('C').take('C')
+    state.cards = cards[3:]
+    blueprint = {i: {} for i in range(2)}
+    search = FullWidthSearch(state, blueprint, {i: {} for i in range(2)}, cards, 3)
+    assert len(search.worlds) == 20 and all(deal[2] == Card(12, 2).id for deal in search.worlds)
+    assert state.info_set() == "Ah |Qh| [['C', 'C'], []]"
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+
+from multiprocessing import AuthenticationError
+
+from leduc.distributed import learn, start_shards, get_authkey, RemoteTable
+from leduc.util import expected_utility
+from leduc.card import Card
+
+
+def test_shards():
+    addresses, servers = start_shards(2, b'secret')
+    with pytest.raises(AuthenticationError):
+        RemoteTable(addresses[:1], b'wrong')
+    remote = RemoteTable(addresses, b'secret')
+    keys = [(0, 'As || [[]]'), (1, 'Ks || [[]]'), (0, 'Qs || [[]]')]
+    many = [(p, f'{c}s || [[]]') for p in range(2) for c in 'AKQJT98']
+    assert {remote.shard(key) for key in many} == {0, 1}
+
+    deltas = {key: ('[[]]', ['F', 'C', '1R'], {'C': 1}, {}) for key in keys}
+    remote.push(deltas)
+    remote.push({keys[0]: ('[[]]', ['F', 'C', '1R'], {'C': 2, 'F': -1}, {'C': 1})})
+
+    snapshot = remote.pull(keys[:1] + [(1, 'missing')])
+    assert snapshot == {keys[0]: ({'F': -1, 'C': 3, '1R': 0}, {'F': 0, 'C': 1, '1R': 0})}, snapshot
+    assert len(remote.dump()) == 3
+
+    remote.stop()
+    for server in servers:
+        server.join(5)
+        assert not server.is_alive()
+
+
+def test_authkey(monkeypatch):
+    monkeypatch.delenv('LEDUC_AUTHKEY', raising=False)
+    with pytest.raises(ValueError):
+        get_authkey()
+    assert get_authkey('key') == b'key'
+    monkeypatch.setenv('LEDUC_AUTHKEY', 'from env')
+    assert get_authkey() == b'from env'
+
+
+def test_learn():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(20000, cards, 2, node_map, action_map, workers=2, shards=2, seed=0)
+
+    assert len(node_map[0]) == 6 and len(node_map[1]) == 6, node_map
+    util = expected_utility(cards, 2, num_players, node_map, action_map)
+    assert np.isclose(util.sum(), 0), util
+    assert abs(util[1] - 1/18) <= .02, f"Util not converging {util}"
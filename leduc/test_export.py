@@ -0,0 +1,45 @@
+import numpy as np
+
+from leduc.export import export, compare, PolicyTable
+from leduc.monte import learn
+from leduc.node import MNode as Node
+from leduc.card import Card
+
+np.random.seed(0)
+
+
+def test_drops_zero_actions():
+    node = Node(['F', 'C', '2R'])
+    node.strategy_sum = {'F': 0, 'C': 3, '2R': 1}
+    node_map = {0: {'As || [[]]': node}, 1: {}}
+
+    table = export(node_map)
+
+    assert len(table) == 1 and table.offsets.tolist() == [0, 2], table.offsets
+    strategy = table.strategy(0, 'As || [[]]')
+    assert set(strategy) == {'C', '2R'}, strategy
+    assert abs(strategy['C'] - .75) < 1/255, strategy
+
+
+def test_accuracy_and_size(tmp_path):
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    learn(1000, cards, 3, node_map, action_map)
+
+    for dtype, tol in [(np.uint8, 1/255), (np.float16, 1e-3)]:
+        table = export(node_map, dtype)
+        stats = compare(table, node_map)
+
+        assert stats['max_error'] < 2 * tol, stats
+        assert stats['table_bytes'] < stats['full_bytes'] / 2, stats
+
+    path = tmp_path / 'policy.npz'
+    table.save(path)
+    loaded = PolicyTable.load(path)
+
+    for player in node_map:
+        for info_set in node_map[player]:
+            assert (player, info_set) in loaded
+            assert loaded.strategy(player, info_set) == table.strategy(player, info_set)
@@ -0,0 +1,79 @@
+import numpy as np
+
+from itertools import combinations
+from collections import Counter
+
+from leduc.card import Card
+from leduc.hand_eval import holdem_batch, holdem_eval, evaluate, hand_masks, card_id
+
+np.random.seed(0)
+
+
+def reference(cards):
+    """Slow five card ranking, maximized over every five card subset."""
+    best = None
+    for five in combinations(cards, 5):
+        ranks = sorted((c >> 2 for c in five), reverse=True)
+        counts = sorted(Counter(ranks).items(), key=lambda kv: (kv[1], kv[0]), reverse=True)
+        shape = [count for _, count in counts]
+        order = [rank for rank, _ in counts]
+        flush = len({c & 3 for c in five}) == 1
+        straight = len(set(ranks)) == 5 and (ranks[0] - ranks[4] == 4 or ranks == [12, 3, 2, 1, 0])
+        if straight:
+            order = [3] if ranks[0] == 12 and ranks[1] == 3 else [ranks[0]]
+
+        if straight and flush:
+            category = 8
+        elif shape[0] == 4:
+            category = 7
+        elif shape[:2] == [3, 2]:
+            category = 6
+        elif flush:
+            category = 5
+        elif straight:
+            category = 4
+        elif shape[0] == 3:
+            category = 3
+        elif shape[:2] == [2, 2]:
+            category = 2
+        elif shape[0] == 2:
+            category = 1
+        else:
+            category = 0
+
+        key = (category, order)
+        best = key if best is None or key > best else best
+
+    return best
+
+
+def test_against_reference():
+    for num_cards in [5, 6, 7]:
+        hands = np.argsort(np.random.rand(3000, 52), axis=1)[:, :num_cards]
+        scores = holdem_batch(hands)
+        assert np.array_equal(scores, evaluate(hand_masks(hands))), num_cards
+
+        keys = [reference(hand.tolist()) for hand in hands]
+        for i in range(len(hands) - 1):
+            expected = (keys[i] > keys[i + 1]) - (keys[i] < keys[i + 1])
+            actual = int(scores[i] > scores[i + 1]) - int(scores[i] < scores[i + 1])
+            assert expected == actual, f'{hands[i]} {hands[i + 1]} {keys[i]} {keys[i + 1]}'
+
+
+def test_categories():
+    royal = [Card(r, 2) for r in [14, 13, 12, 11, 10]]
+    wheel = [Card(14, 1), Card(2, 2), Card(3, 3), Card(4, 4), Card(5, 1)]
+    six_high = [Card(6, 2), Card(2, 2), Card(3, 3), Card(4, 4), Card(5, 1)]
+
+    assert holdem_eval(royal[:2], royal[2:]) >> 20 == 8
+    assert holdem_eval(wheel[:2], wheel[2:]) >> 20 == 4
+    assert holdem_eval(wheel[:2], wheel[2:]) < holdem_eval(six_high[:2], six_high[2:])
+
+
+def test_shared_board():
+    board = [card_id(Card(r, s)) for r, s in [(14, 1), (14, 2), (9, 1), (5, 1), (2, 3)]]
+    holes = np.array([[c, d] for c, d in combinations(range(52), 2)
+                      if c not in board and d not in board])
+
+    full = holdem_batch(np.hstack([holes, np.tile(board, (len(holes), 1))]))
+    assert np.array_equal(holdem_batch(holes, board), full)
@@ -0,0 +1,100 @@
+import threading
+import numpy as np
+import pytest
+
+from leduc.history import Recorder, History, actions_of, open_chunk
+from leduc.deck import to_card
+from leduc.match import play_deals, run_match, UniformPolicy
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def test_actions_of():
+    state = State(cards[:3], 2, leduc_eval)
+    for action in ['2R', 'C', 'C', '4R', 'F']:
+        state.take(action)
+
+    actions = actions_of(state)
+    assert [a for *_, a in actions] == ['2R', 'C', 'C', '4R', 'F'], actions
+    assert [(s, r) for s, r, _, _ in actions] == [(0, 0), (1, 0), (0, 1), (1, 1), (0, 1)], actions
+    assert actions[2][2] == "[['2R', 'C'], []]", actions[2]
+
+
+def test_round_trip(tmp_path):
+    deals = [cards[:3], cards[3:], cards[1:4]] * 5
+    with Recorder(tmp_path, chunk_size=8) as recorder:
+        results, arrangements = play_deals([UniformPolicy(), UniformPolicy()], deals, State,
+                                           leduc_eval, recorder=recorder)
+
+    history = History(tmp_path)
+    assert len(history.chunks) == 4, history.paths
+    assert history.hands == len(deals) * arrangements, history.hands
+    assert isinstance(history.chunks[0]['action'], np.memmap)
+
+    chunk = open_chunk(history.paths[0])
+    assert [repr(to_card(i)) for i in chunk['deals'][0]] == [repr(c) for c in cards[:3]]
+    assert np.allclose(history.player_ev(), results.mean(axis=0), atol=1e-5), history.player_ev()
+    assert np.isclose(history.seat_ev().sum(), 0, atol=1e-5), history.seat_ev()
+
+    counts = history.action_counts()
+    assert sum(counts.values()) == sum(len(c['action']) for c in history.chunks), counts
+    assert set(counts) <= {'F', 'C', '2R', '4R'}, counts
+
+    frequencies = history.info_set_frequencies(seat=0)
+    assert ('As', '', '[[]]') in frequencies, list(frequencies)[:5]
+    for strategy in frequencies.values():
+        assert np.isclose(sum(strategy.values()), 1), strategy
+    assert len(history.latency()) == 0 and np.isnan(history.disagreement())
+
+
+def test_decisions(tmp_path):
+    state = State(cards[:3], 2, leduc_eval)
+    for action in ['C', 'C', 'C', 'C']:
+        state.take(action)
+
+    with Recorder(tmp_path) as recorder:
+        recorder.record_state(state, latency={1: 12.5}, blueprint={0: .25, 2: .75})
+
+    history = History(tmp_path)
+    assert np.allclose(history.latency(), [12.5]), history.latency()
+    assert np.isclose(history.disagreement(), .5), history.disagreement()
+
+
+def test_write_error_is_raised(tmp_path, monkeypatch):
+    def savez(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(np, 'savez', savez)
+    state = State(cards[:3], 2, leduc_eval)
+    state.take('F')
+    recorder = Recorder(tmp_path, chunk_size=1)
+    errors = []
+
+    def play():
+        try:
+            for _ in range(20):
+                recorder.record_state(state)
+        except OSError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=play, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), 'record() blocked after the writer failed'
+    assert len(errors) == 1, errors
+    with pytest.raises(OSError):
+        recorder.close()
+
+
+def test_run_match_history(tmp_path):
+    result = run_match([UniformPolicy(), UniformPolicy()], cards, 3, 60, workers=1,
+                       chunk_size=20, seed=0, history=str(tmp_path))
+
+    history = History(tmp_path)
+    assert len(history.paths) == 3, history.paths
+    assert history.hands == result.hands, (history.hands, result.hands)
@@ -0,0 +1,56 @@
+import numpy as np
+
+from itertools import permutations
+
+from leduc.iso import relabel, canonical_deals
+from leduc.monte import learn
+from leduc.snapshot import freeze
+from leduc.util import expected_utility, traverse_tree
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def test_relabel():
+    assert repr(relabel([Card(14, 2), Card(13, 1), Card(12, 2)])) == '[As, Kh, Qs]'
+    assert relabel([51, 0, 47]) == [48, 1, 44], relabel([51, 0, 47])
+
+
+def test_canonical_deals():
+    deals, weights = canonical_deals(cards, 3)
+
+    assert len(deals) == 60, len(deals)
+    assert np.isclose(sum(weights), 1), sum(weights)
+    assert np.allclose(weights, 1 / 60), weights
+
+
+def test_canonical_info_sets():
+    first = State([Card(14, 1), Card(13, 1), Card(14, 2)], 2, leduc_eval, canonical=True)
+    second = State([Card(14, 2), Card(13, 2), Card(14, 1)], 2, leduc_eval, canonical=True)
+    first.take('C')
+    first.take('C')
+    second = second.take('C', deep=True).take('C')
+
+    assert first.info_set() == second.info_set() == "As |Ah| [['C', 'C'], []]", first.info_set()
+
+
+def test_expected_utility():
+    np.random.seed(0)
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    learn(5000, cards, 3, node_map, action_map, canonical=True)
+
+    assert len(node_map[0]) == 270, len(node_map[0])
+
+    util = expected_utility(cards, 3, num_players, node_map, action_map, canonical=True)
+
+    frozen = freeze(node_map)
+    all_deals = [list(t) for t in set(permutations(cards, 3))]
+    full = sum(traverse_tree(State(deal, num_players, leduc_eval, canonical=True), frozen, action_map)
+               for deal in all_deals) / len(all_deals)
+    assert np.allclose(util, full), f'{util} {full}'
@@ -0,0 +1,93 @@
+import json
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+
+from leduc.latency import Histogram, Latency, serve
+from leduc.resolve import FullWidthSearch
+from leduc.monte import Search
+from leduc.hand_eval import leduc_eval
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+
+def test_histogram():
+    histogram = Histogram()
+    assert np.isnan(histogram.summary()['p50'])
+    for value in range(1, 101):
+        histogram.add(value)
+
+    summary = histogram.summary()
+    assert summary['count'] == 100 and summary['mean'] == 50.5 and summary['max'] == 100
+    assert np.isclose(summary['p50'], 50.5) and 95 <= summary['p95'] <= 96 and 99 <= summary['p99'] <= 100
+
+
+def test_search_phases(blueprint):
+    cards, node_map, action_map = blueprint
+    latency = Latency()
+    search = Search(State(cards[:3], 2, leduc_eval), node_map, action_map, cards, 3, iterations=10)
+    with latency.time('check_round'):
+        search.search()
+    latency.search('check_round', search)
+
+    assert set(search.timings) == {'setup', 'iterations', 'rollouts'}
+    assert search.rollouts > 0 and search.rollouts % 5 == 0
+    summary = latency.summary()
+    phases = summary['latency_ms']['check_round']
+    assert sum(phases[p]['max'] for p in search.timings) <= phases['total']['max']
+    assert summary['iterations']['check_round']['max'] == 10
+    assert summary['rollouts']['check_round']['max'] == search.rollouts
+
+    state = State(cards[:3], 2, leduc_eval).take('C').take('C')
+    full = FullWidthSearch(state, node_map, action_map, cards, 3, iterations=20)
+    full.search()
+    latency.search('opponent_turn', full)
+    assert set(full.timings) == {'setup', 'iterations'} and full.rollouts == 0
+    assert latency.summary()['iterations']['opponent_turn']['p50'] == 20
+
+
+def test_export(tmp_path):
+    latency = Latency()
+    for ms in [1., 2., 3.]:
+        latency.observe('pluribus_turn', 'total', ms)
+    latency.add('iterations', 'check_round', '', 200)
+
+    text = latency.to_prometheus()
+    assert '# TYPE leduc_decision_latency_ms summary' in text
+    assert 'leduc_decision_latency_ms{decision="pluribus_turn",phase="total",quantile="0.5"} 2.0' in text
+    assert 'leduc_decision_latency_ms_count{decision="pluribus_turn",phase="total"} 3' in text
+    assert 'leduc_search_iterations_sum{decision="check_round"} 200' in text
+    assert 'rollouts' not in text
+
+    latency.write(str(tmp_path / 'latency.json'))
+    latency.write(str(tmp_path / 'latency.prom'))
+    with open(tmp_path / 'latency.json') as f:
+        assert json.load(f) == json.loads(latency.to_json())
+    with open(tmp_path / 'latency.prom') as f:
+        assert f.read() == text
+
+
+def test_server():
+    latency = Latency()
+    server = serve(latency, ('127.0.0.1', 0))
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with latency.time('opponent_turn', 'translate'):
+            time.sleep(.01)
+
+        with urllib.request.urlopen(url + '/metrics') as response:
+            assert 'phase="translate"' in response.read().decode()
+        with urllib.request.urlopen(url + '/latency.json') as response:
+            ms = json.load(response)['latency_ms']['opponent_turn']['translate']['p50']
+            assert ms >= 10, ms
+
+        try:
+            urllib.request.urlopen(url + '/missing')
+            assert False, 'expected a 404'
+        except urllib.error.HTTPError as error:
+            assert error.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+
+from leduc.lbr import lbr, LocalBestResponse
+from leduc.best_response import exact_exploitability
+from leduc.monte import learn
+from leduc.card import Card
+from leduc.deck import encode
+
+kuhn = [Card(14, 1), Card(13, 1), Card(12, 1)]
+leduc = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def maps(num_players=2):
+    return {i: {} for i in range(num_players)}, {i: {} for i in range(num_players)}
+
+
+def test_worlds():
+    responder = LocalBestResponse(*maps())
+    deal = [leduc[0], leduc[1], leduc[2]]
+    worlds = responder.worlds(deal, 1, leduc)
+    assert len(worlds) == 5 * 4
+    assert all(world[1] == leduc[1].id for world in worlds)
+    assert encode(deal) in worlds
+
+
+def test_lower_bound():
+    np.random.seed(0)
+    node_map, action_map = maps()
+    uniform = lbr(node_map, action_map, leduc, 3, 1000, workers=1, seed=0)
+    assert uniform.value > 1, uniform
+
+    learn(2000, leduc, 3, node_map, action_map)
+    exact = exact_exploitability(leduc, 3, node_map, action_map)
+    trained = lbr(node_map, action_map, leduc, 3, 1000, workers=1, seed=0)
+    assert 0 < trained.value < uniform.value, (trained, uniform)
+    assert trained.value - trained.confidence() < exact, (trained, exact)
+    assert trained.hands == 2000 and trained.samples.shape == (1000, 2)
+
+
+def test_kuhn():
+    node_map, action_map = maps()
+    learn(3000, kuhn, 2, node_map, action_map)
+    exact = exact_exploitability(kuhn, 2, node_map, action_map)
+    result = lbr(node_map, action_map, kuhn, 2, 2000, workers=1, seed=1)
+    assert result.value - result.confidence() < exact, (result, exact)
+
+
+def test_workers():
+    node_map, action_map = maps()
+    serial = lbr(node_map, action_map, leduc, 3, 600, workers=1, chunk_size=200, seed=3)
+    pooled = lbr(node_map, action_map, leduc, 3, 600, workers=2, chunk_size=200, seed=3)
+    assert np.array_equal(serial.samples, pooled.samples)
+
+
+def test_two_players():
+    with pytest.raises(ValueError):
+        lbr(*maps(3), leduc, 4, 10, workers=1)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from leduc.match import run_match, play_deals, BlueprintPolicy, UniformPolicy
+from leduc.monte import learn
+from leduc.hand_eval import kuhn_eval
+from leduc.card import Card
+from leduc.state import State
+
+np.random.seed(0)
+
+
+class AlwaysRaise(UniformPolicy):
+    name = 'raise'
+
+    def act(self, state):
+        return state.valid_actions()[-1]
+
+
+class AlwaysFold(UniformPolicy):
+    name = 'fold'
+
+    def act(self, state):
+        return 'F'
+
+
+def test_duplicate_cancels_cards():
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    policies = [AlwaysRaise(), AlwaysRaise()]
+    deals = [[cards[0], cards[1]], [cards[2], cards[0]]]
+
+    results, arrangements = play_deals(policies, deals, State, kuhn_eval)
+
+    assert arrangements == 2, arrangements
+    assert np.allclose(results, 0), results
+
+    results, arrangements = play_deals(policies, deals, State, kuhn_eval, duplicate=False)
+
+    assert arrangements == 1, arrangements
+    assert np.allclose(results, [[2, -2], [-2, 2]]), results
+
+
+def test_run_match():
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    result = run_match([AlwaysRaise(), AlwaysFold()], cards, 2, 200, workers=2,
+                       chunk_size=50, seed=0)
+
+    assert result.hands == 400, result.hands
+    assert np.allclose(result.win_rate(), [1, -1]), result
+    assert np.allclose(result.confidence(), 0), result
+    assert result.hands_per_sec > 0, result
+    assert set(result.summary()) == {'raise', 'fold'}, result.summary()
+
+
+def test_blueprint_beats_uniform():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(5000, cards, 2, node_map, action_map)
+
+    result = run_match([BlueprintPolicy(node_map, action_map), UniformPolicy()],
+                       cards, 2, 4000, workers=1, seed=0)
+
+    rate, ci = result.win_rate()[0], result.confidence()[0]
+    assert rate - ci > 0, result
+    assert np.isclose(result.win_rate().sum(), 0), result
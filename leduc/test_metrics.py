@@ -0,0 +1,86 @@
+import io
+import json
+import threading
+import contextlib
+import numpy as np
+
+from leduc.metrics import Metrics, FIELDS, read, summarize, tail, mean_positive_regret
+from leduc.monte import learn
+from leduc.card import Card
+
+cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def train(path, iterations=600, **kwargs):
+    np.random.seed(0)
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    with Metrics(path, **kwargs) as metrics:
+        learn(iterations, cards, 3, node_map, action_map, metrics=metrics)
+    return node_map
+
+
+def test_jsonl(tmp_path):
+    path = str(tmp_path / 'metrics.jsonl')
+    node_map = train(path, interval=100, cards=cards, num_cards=3, exploit_every=3)
+
+    rows = read(path)
+    assert [row['iteration'] for row in rows] == list(range(100, 700, 100))
+    assert all(set(row) == set(FIELDS) for row in rows)
+    assert [row['exploitability'] is not None for row in rows] == [True, False, False] * 2
+    assert rows[0]['strategy_delta'] is None and rows[-1]['strategy_delta'] is not None
+    assert rows[-1]['info_sets'] == sum(len(nodes) for nodes in node_map.values())
+    assert np.isclose(rows[-1]['mean_positive_regret'], mean_positive_regret(node_map))
+    assert all(row['iterations_per_sec'] > 0 for row in rows)
+
+    # between strategy updates (every 100 iterations) the discount only rescales the sums
+    path = str(tmp_path / 'often.jsonl')
+    train(path, iterations=300, interval=50)
+    deltas = [row['strategy_delta'] for row in read(path)]
+    assert deltas[2] is None and deltas[4] is None and deltas[3] > 0, deltas
+
+    with open(path) as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_csv(tmp_path):
+    path = str(tmp_path / 'metrics.csv')
+    train(path, iterations=300, interval=100)
+    rows = read(path)
+    assert len(rows) == 3 and rows[-1]['iteration'] == 300 and isinstance(rows[-1]['info_sets'], int)
+    assert all(row['exploitability'] is None for row in rows)
+
+    # appending keeps a single header
+    train(path, iterations=200, interval=100)
+    assert len(read(path)) == 5
+    with open(path) as f:
+        assert f.read().count('iteration,seconds') == 1
+
+    summary = summarize(read(path))
+    assert summary['rows'] == 5 and summary['iterations'] == 200 and summary['best_exploitability'] is None
+
+
+def test_tail(tmp_path):
+    path = str(tmp_path / 'metrics.jsonl')
+    train(path, iterations=500, interval=100)
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        tail(path, lines=2)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 2 and lines[-1].startswith('iteration=500 '), lines
+
+    # a half-written row waits for its newline, then follow prints it once
+    out = io.StringIO()
+    with open(path, 'a') as f:
+        f.write(json.dumps({field: None for field in FIELDS} | {'iteration': 600}))
+    follower = threading.Thread(target=lambda: tail(path, lines=1, follow=True, poll=.01), daemon=True)
+    with contextlib.redirect_stdout(out):
+        follower.start()
+        with open(path, 'a') as f:
+            f.write('\n')
+        for _ in range(200):
+            if 'iteration=600' in out.getvalue():
+                break
+            follower.join(.01)
+    assert out.getvalue().count('iteration=600 ') == 1, out.getvalue()
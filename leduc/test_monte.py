@@ -2,7 +2,7 @@ import json
 import numpy as np
 
 
-from leduc.monte import learn, expected_utility, update_strategy
+from leduc.monte import learn, expected_utility, update_strategy, baselined
 from leduc.hand_eval import kuhn_eval
 from leduc.card import Card
 from leduc.node import MNode as Node
@@ -66,3 +66,38 @@ def test_expected_utility_three_player():
 
     assert abs(util.sum()) <= 0.0001, f"Something weird, not a zero sum game"
     assert np.abs(util).sum() > 0, f"Util was {util}"
+
+
+def test_baselined():
+    node = Node(['F', 'C'])
+    strategy = {'F': .25, 'C': .75}
+
+    value = baselined(node, strategy, 'C', np.array([2., -2.]))
+    assert np.allclose(value, [2, -2]), value
+    assert np.allclose(node.baseline['C'], [1, -1]), node.baseline
+
+    # every action valued at its baseline, the sampled one corrected by what was seen
+    value = baselined(node, strategy, 'F', np.array([-1., 1.]))
+    assert np.allclose(value, [.75 * 1 - 1, -.75 * 1 + 1]), value
+
+    # a perfect baseline leaves no sampling noise
+    node.baseline = {'F': np.array([-1., 1.]), 'C': np.array([2., -2.])}
+    expected = .25 * node.baseline['F'] + .75 * node.baseline['C']
+    for action in ['F', 'C']:
+        value = baselined(node, strategy, action, node.baseline[action].copy())
+        assert np.allclose(value, expected), value
+
+
+def test_learn_baseline():
+    np.random.seed(0)
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(2000, cards, 2, node_map, action_map, baseline=True)
+
+    baselines = [node.baseline for nodes in node_map.values() for node in nodes.values()]
+    assert any(b for b in baselines), 'no baselines recorded'
+    for b in baselines:
+        for value in (b or {}).values():
+            assert value.shape == (num_players,), value
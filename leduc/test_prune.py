@@ -0,0 +1,101 @@
+import numpy as np
+
+from leduc.monte import learn
+from leduc.card import Card
+from leduc.node import MNode as Node
+from leduc.prune import Pruner
+
+np.random.seed(0)
+
+
+def test_mask():
+    pruner = Pruner(threshold=-10, start=0, explore=0, revisit=5)
+    node = Node(['F', 'C', '1R'])
+
+    pruner.step(1)
+    pruner.update(node, 0, -20)
+    pruner.update(node, 2, -5)
+
+    assert node.pruned == 0b001, bin(node.pruned)
+    assert node.expires == {0: 6}, node.expires
+    assert pruner.mask(node) == 0b001, pruner.mask(node)
+
+    pruner.update(node, 0, 3)
+    assert node.pruned == 0, bin(node.pruned)
+
+
+def test_revisit():
+    pruner = Pruner(threshold=-10, start=0, explore=0, revisit=5)
+    node = Node(['F', 'C', '1R'])
+
+    pruner.step(1)
+    pruner.update(node, 1, -20)
+
+    pruner.step(5)
+    assert pruner.mask(node) == 0b010, pruner.mask(node)
+
+    pruner.step(6)
+    assert pruner.mask(node) == 0, f'Branch should be revisited {node.expires}'
+
+    pruner.update(node, 1, -30)
+    assert node.expires == {1: 11} and pruner.mask(node) == 0b010, node.expires
+
+
+def test_revisit_per_action():
+    pruner = Pruner(threshold=-10, start=0, explore=0, revisit=5)
+    node = Node(['F', 'C', '1R'])
+
+    pruner.step(1)
+    pruner.update(node, 0, -20)
+    pruner.step(4)
+    pruner.update(node, 2, -20)
+    pruner.update(node, 0, -25)
+    assert node.expires == {0: 6, 2: 9}, node.expires
+
+    pruner.step(6)
+    assert pruner.mask(node) == 0b100, f'F should be revisited {node.expires}'
+
+    pruner.step(9)
+    assert pruner.mask(node) == 0, node.expires
+
+
+def test_restored_node():
+    pruner = Pruner(threshold=-10, start=0, explore=0, revisit=5)
+    # restored from a pickle made before nodes had expires, without __init__
+    node = Node.__new__(Node)
+    node.__dict__.update(actions=['F', 'C'], regret_sum={'F': 0, 'C': 0},
+                         strategy_sum={'F': 0, 'C': 0})
+    old = Node(['F', 'C'])
+    old.pruned, old.expires = 0b01, 7
+
+    pruner.reset({0: {'a': node, 'b': old}})
+    pruner.step(1)
+    assert pruner.mask(node) == 0 and pruner.mask(old) == 0
+    pruner.update(node, 1, -20)
+    assert node.expires == {1: 6} and pruner.mask(node) == 0b10, node.expires
+
+
+def test_inactive():
+    pruner = Pruner(threshold=-10, start=100, explore=0, revisit=5)
+    node = Node(['F', 'C', '1R'])
+
+    pruner.step(1)
+    pruner.update(node, 1, -20)
+
+    assert not pruner.active
+    assert pruner.mask(node) == 0, pruner.mask(node)
+
+
+def test_learn_skips_pruned():
+    num_players = 3
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(11, 1)]
+    pruner = Pruner(threshold=-5, start=50, revisit=100)
+
+    learn(1000, cards, 3, node_map, action_map, pruner=pruner)
+
+    stats = pruner.stats()
+    assert stats['skipped'] > 0 and stats['visited'] > 0, stats
+    assert 0 < stats['saved'] < 1, stats
+    assert any(node.pruned for node in node_map[0].values())
@@ -0,0 +1,50 @@
+from leduc.public import lookup, get_node, add_action
+from leduc.monte import learn
+from leduc.node import MNode as Node
+from leduc.card import Card
+from leduc.hand_eval import leduc_eval
+from leduc.state import Leduc as State
+
+
+def test_one_action_list_per_public_node():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    learn(500, cards, 3, node_map, action_map)
+
+    for player in node_map:
+        public = action_map[player]
+        assert len(public) < len(node_map[player]), f'{len(public)} {len(node_map[player])}'
+
+        registered = sum(len(entry['info_sets']) for entry in public.values())
+        assert registered == len(node_map[player]), registered
+
+        for key, entry in public.items():
+            for info_set in entry['info_sets']:
+                assert info_set.endswith(key), f'{info_set} {key}'
+                assert node_map[player][info_set].actions is entry['actions']
+
+
+def test_add_action():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+    first = State([cards[0], cards[1], cards[2]], num_players, leduc_eval)
+    second = State([cards[3], cards[1], cards[2]], num_players, leduc_eval)
+    _, a, _ = get_node(first, node_map, action_map, Node)
+    _, b, _ = get_node(second, node_map, action_map, Node)
+
+    assert lookup(first, action_map)['info_sets'] == ['As |Qs| [[]]', 'Ah |Qs| [[]]']
+
+    add_action(first, '3R', node_map, action_map)
+
+    assert lookup(second, action_map)['actions'] == ['F', 'C', '2R', '3R']
+    for node in [a, b]:
+        assert node.regret_sum['3R'] == 0 and node.strategy_sum['3R'] == 0, node
+        assert sum(node.strategy().values()) == 1, node
+
+    next_state = first.take('C', deep=True)
+    assert lookup(next_state, action_map)['actions'] == ['F', 'C', '2R']
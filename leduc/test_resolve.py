@@ -0,0 +1,92 @@
+import numpy as np
+
+from copy import deepcopy
+
+from leduc.resolve import FullWidthSearch
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.deck import RANK, encode
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+
+def test_consistent_deals(blueprint):
+    cards, node_map, action_map = blueprint
+    root = State(cards[:3], 2, leduc_eval)
+    search = FullWidthSearch(root, node_map, action_map, cards, 3)
+    assert len(search.worlds) == 120 and np.isclose(search.prior.sum(), 1)
+
+    state = root.take('C', deep=True).take('C', deep=True)
+    search = FullWidthSearch(state, node_map, action_map, cards, 3)
+    assert len(search.worlds) == 20, len(search.worlds)
+    assert all(deal[2] == cards[2].id for deal in search.worlds)
+
+    state.canonical = True
+    search = FullWidthSearch(state, node_map, action_map, cards, 3)
+    assert all(RANK[deal[2]] == cards[2].rank for deal in search.worlds)
+    assert np.isclose(search.prior.sum(), 1)
+
+
+def test_search_deterministic(blueprint):
+    cards, node_map, action_map = blueprint
+    state = State(cards[:3], 2, leduc_eval).take('C', deep=True).take('C', deep=True)
+    first = FullWidthSearch(state, node_map, action_map, cards, 3, iterations=50).search()
+    second = FullWidthSearch(state, node_map, action_map, cards, 3, iterations=50).search()
+
+    info_set = state.info_set()
+    assert first[0][info_set].avg_strategy() == second[0][info_set].avg_strategy()
+    assert np.isclose(sum(first[0][info_set].avg_strategy().values()), 1)
+    assert node_map[0][info_set] is not first[0][info_set]
+
+
+def test_last_round_solves_nuts(blueprint):
+    cards, node_map, action_map = blueprint
+    # round two is solved to the end: a pair on the board never folds to a raise
+    state = State(cards[:3], 2, leduc_eval).take('C', deep=True).take('C', deep=True)
+    state = state.take('4R', deep=True)
+    pair = [Card(14, 1), Card(12, 2), Card(12, 1)]
+    search = FullWidthSearch(state, node_map, action_map, cards, 3)
+    solved = search.search()
+
+    state.cards = pair
+    strategy = solved[1][state.info_set()].avg_strategy()
+    # only the uniform first iterations ever fold it
+    assert strategy['F'] < 1e-3, strategy
+
+    # a blueprint that always raises a pair leaves player 1's pairs out of range at
+    # the root; they play the solved current strategy instead of uniform
+    raising = deepcopy(node_map)
+    for info_set, node in raising[1].items():
+        if info_set.endswith("| [['C']]") and info_set[0] == info_set[4]:
+            node.strategy_sum = {action: float(action == '2R') for action in node.strategy_sum}
+    search = FullWidthSearch(state, raising, action_map, cards, 3)
+    solved = search.search()
+    assert search.root_reach()[1][search.worlds.index(encode(pair))] == 0
+    state.cards = pair
+    strategy = solved[1][state.info_set()].avg_strategy()
+    assert strategy['F'] == 0, strategy
+
+
+def test_round_boundary(blueprint):
+    cards, node_map, action_map = blueprint
+    root = State(cards[:3], 2, leduc_eval)
+    search = FullWidthSearch(root, node_map, action_map, cards, 3, iterations=20)
+    solved = search.search()
+
+    for deal in search.worlds[:10]:
+        root.cards = deal
+        strategy = solved[0][root.info_set()].avg_strategy()
+        assert np.isclose(sum(strategy.values()), 1), strategy
+        assert all(p >= 0 for p in strategy.values()), strategy
+
+
+def test_three_players(blueprint):
+    cards, node_map, action_map = blueprint
+    three = {i: {} for i in range(3)}
+    try:
+        FullWidthSearch(State(cards[:4], 3, leduc_eval), three, action_map, cards, 4)
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected ValueError'
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from leduc.vanilla import learn
+from leduc.monte import learn as mc_learn
+from leduc.best_response import exploitability
+from leduc.card import Card
+from leduc.node import MNode as Node
+from leduc.rules import CFR, CFRPlus, DCFR, LinearCFR, get_rule
+
+
+def test_dcfr_discount():
+    node_map = {0: {}}
+    node = Node(['F', 'C', '2R'])
+    node.regret_sum = {'F': 2, 'C': -2, '2R': 0}
+    node.strategy_sum = {'F': 1, 'C': 1, '2R': 2}
+    node_map[0]['As || [[]]'] = node
+
+    DCFR(alpha=1, beta=0, gamma=2).discount(node_map, 1)
+
+    assert node.regret_sum == {'F': 1, 'C': -1, '2R': 0}, node.regret_sum
+    assert node.strategy_sum == {'F': .25, 'C': .25, '2R': .5}, node.strategy_sum
+
+
+def test_discount_schedule():
+    node_map = {0: {'As || [[]]': Node(['F', 'C'])}}
+    node = node_map[0]['As || [[]]']
+    node.regret_sum = {'F': 1, 'C': -1}
+
+    rule = LinearCFR(interval=10, until=20)
+    rule.discount(node_map, 5)
+    assert node.regret_sum == {'F': 1, 'C': -1}, node.regret_sum
+
+    rule.discount(node_map, 10)
+    assert node.regret_sum == {'F': .5, 'C': -.5}, node.regret_sum
+
+    rule.discount(node_map, 20)
+    assert node.regret_sum == {'F': .5, 'C': -.5}, node.regret_sum
+
+
+def test_get_rule():
+    assert get_rule(None) is None
+    assert isinstance(get_rule('cfr+'), CFRPlus)
+    assert get_rule('dcfr', alpha=2).alpha == 2
+
+    rule = CFR()
+    assert get_rule(rule) is rule
+
+    with pytest.raises(ValueError):
+        get_rule('cfr++')
+
+
+def test_cfr_plus_converges_faster():
+    np.random.seed(0)
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+
+    exploits = {}
+    for rule in [CFR(), CFRPlus(), DCFR()]:
+        node_map = {i: {} for i in range(2)}
+        action_map = {i: {} for i in range(2)}
+        learn(500, cards, 2, node_map, action_map, rule=rule)
+        exploits[type(rule).__name__] = exploitability(cards, 2, node_map, action_map)
+
+    assert exploits['CFRPlus'] < exploits['CFR'], exploits
+    assert exploits['DCFR'] < exploits['CFR'], exploits
+
+
+def test_cfr_plus_floor():
+    np.random.seed(0)
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    node_map = {i: {} for i in range(2)}
+    action_map = {i: {} for i in range(2)}
+    mc_learn(300, cards, 2, node_map, action_map, rule='cfr+')
+
+    for player in node_map:
+        for info_set, node in node_map[player].items():
+            assert min(node.regret_sum.values()) >= 0, f'{info_set}: {node}'
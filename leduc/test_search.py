@@ -0,0 +1,26 @@
+import builtins
+import numpy as np
+
+from functools import partial
+
+from leduc.search import Pluribus
+from leduc.history import Recorder, History
+from leduc.monte import Search
+
+np.random.seed(0)
+
+
+def test_every_decision_has_latency(blueprint, tmp_path, monkeypatch):
+    cards, node_map, action_map = blueprint
+    monkeypatch.setattr(builtins, 'input', lambda prompt: 'C')
+    with Recorder(tmp_path) as recorder:
+        for _ in range(4):
+            pluribus = Pluribus(node_map, action_map, cards, 3, recorder=recorder,
+                                search=partial(Search, iterations=20))
+            pluribus.play()
+
+    history = History(tmp_path)
+    decisions = sum(len(chunk['action']) for chunk in history.chunks)
+    latency = history.latency()
+    assert len(latency) == decisions, (len(latency), decisions)
+    assert (latency > 0).all(), latency
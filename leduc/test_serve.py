@@ -0,0 +1,97 @@
+import time
+import socket
+import threading
+import numpy as np
+
+from leduc.serve import SharedPolicy, PolicyClient, make_server, encode_queries, recv_header, MAX_COUNT
+from leduc.export import export
+from leduc.monte import learn
+from leduc.card import Card
+from leduc.hand_eval import leduc_eval
+from leduc.state import Leduc
+
+np.random.seed(0)
+
+
+def trained():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+    learn(500, cards, 3, node_map, action_map)
+    return node_map, cards
+
+
+def test_shared_policy():
+    node_map, _ = trained()
+    table = export(node_map)
+    policy = SharedPolicy.create(table)
+    attached = SharedPolicy.attach(policy.name)
+
+    try:
+        for player in node_map:
+            for info_set in node_map[player]:
+                assert attached.strategy(player, info_set) == table.strategy(player, info_set)
+
+        assert attached.row(0, 'not an info set') is None
+    finally:
+        attached.close()
+        policy.close()
+
+
+def test_latency(tmp_path):
+    node_map, cards = trained()
+    policy = SharedPolicy.create(export(node_map))
+    address = str(tmp_path / 'policy.sock')
+    server = make_server(policy, address)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    client = PolicyClient(address)
+    queries = [(p, info_set) for p in node_map for info_set in node_map[p]]
+    try:
+        single = []
+        for player, info_set in queries[:200]:
+            start = time.perf_counter()
+            result = client.distribution([(player, info_set)])[0]
+            single.append(time.perf_counter() - start)
+            assert abs(sum(result.values()) - 1) < 1e-3, result
+
+        batch = queries[:256]
+        batched = []
+        for _ in range(20):
+            start = time.perf_counter()
+            results = client.distribution(batch)
+            batched.append(time.perf_counter() - start)
+        assert len(results) == len(batch) and None not in results
+
+        state = Leduc(cards[:3], 2, leduc_eval)
+        assert client.sample([state])[0] in state.valid_actions()
+        assert client.sample([(0, 'not an info set')]) == [None]
+
+        # batching amortizes the round trip
+        assert np.median(batched) / len(batch) < np.median(single), (batched, single)
+
+        try:
+            client.distribution([(0, 'x')] * (MAX_COUNT + 1))
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+
+        # an unknown op gets an error reply instead of being served as a sample
+        raw = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        raw.connect(address)
+        raw.sendall(encode_queries(7, [(0, 'x')]))
+        try:
+            recv_header(raw)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+        finally:
+            raw.close()
+        assert client.sample([state])[0] in state.valid_actions()
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        policy.close()
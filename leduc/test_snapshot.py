@@ -0,0 +1,29 @@
+import numpy as np
+
+from leduc.snapshot import freeze
+from leduc.monte import learn
+from leduc.card import Card
+
+np.random.seed(0)
+
+
+def test_freeze():
+    num_players = 2
+    node_map = {i: {} for i in range(num_players)}
+    action_map = {i: {} for i in range(num_players)}
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    learn(2000, cards, 2, node_map, action_map)
+
+    frozen = freeze(node_map)
+
+    for player in node_map:
+        assert frozen[player].keys() == node_map[player].keys()
+        for info_set, node in node_map[player].items():
+            assert frozen[player][info_set].avg_strategy() == node.avg_strategy(), info_set
+            assert np.isclose(frozen[player][info_set].cdf[-1], 1), info_set
+
+    node = frozen[0]['Ks || [[]]']
+    samples = [node.sample() for _ in range(5000)]
+    for action, prob in node.avg_strategy().items():
+        freq = samples.count(action) / len(samples)
+        assert abs(freq - prob) < .03, f'{action} {freq} {prob}'
@@ -0,0 +1,103 @@
+import time
+import numpy as np
+
+from leduc.stopping import Budget, Converged, Exploitability, AnyOf, get_stop
+from leduc.best_response import exact_exploitability
+from leduc.resolve import FullWidthSearch
+from leduc.monte import learn, default_rule, Search
+from leduc.node import MNode as Node
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+kuhn = [Card(14, 1), Card(13, 1), Card(12, 1)]
+leduc = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def maps(num_players=2):
+    return {i: {} for i in range(num_players)}, {i: {} for i in range(num_players)}
+
+
+def test_budget():
+    node_map, action_map = maps()
+    start = time.perf_counter()
+    used = learn(10**7, kuhn, 2, node_map, action_map, stop=Budget(.5))
+
+    assert 0 < used < 10**7, used
+    assert time.perf_counter() - start < 5
+
+
+def test_converged():
+    np.random.seed(0)
+    node_map, action_map = maps()
+    stop = Converged(tolerance=.02, interval=1000)
+    used = learn(10**6, kuhn, 2, node_map, action_map, stop=stop)
+
+    assert used < 10**6 and used % 1000 == 0, used
+    assert stop.delta < .02, stop
+
+
+def test_converged_ignores_rescaling():
+    node = Node(['F', 'C'])
+    node.strategy_sum = {'F': 1., 'C': 3.}
+    node_map = {0: {'x': node}}
+    stop = Converged(tolerance=1e-3, interval=10)
+    assert not stop.done(10, node_map, {})
+
+    # a discount rescales the sums but leaves the average where it was
+    node.strategy_sum = {'F': .3, 'C': .9}
+    assert not stop.done(20, node_map, {}) and stop.delta == float('inf'), stop
+    assert not stop.done(30, node_map, {})
+
+    node.strategy_sum = {'F': .3, 'C': .9005}
+    assert stop.done(40, node_map, {}) and 0 < stop.delta < 1e-3, stop
+
+
+def test_converged_linear_cfr():
+    # the default LinearCFR discounts every 10 iterations, strategies update every 100
+    np.random.seed(0)
+    node_map, action_map = maps()
+    stop = Converged(tolerance=1e-3, interval=10)
+    used = learn(2000, leduc, 3, node_map, action_map, rule=default_rule(), stop=stop)
+    assert used == 2000 and stop.delta > 1e-3, (used, stop)
+
+
+def test_exploitability():
+    np.random.seed(0)
+    node_map, action_map = maps()
+    stop = Exploitability(.05, kuhn, 2, samples=None, interval=1000)
+    used = learn(10**6, kuhn, 2, node_map, action_map, stop=stop)
+
+    assert used < 10**6, used
+    assert np.isclose(stop.value, exact_exploitability(kuhn, 2, node_map, action_map)), stop
+    assert stop.value < .05, stop
+
+
+def test_any_of():
+    node_map, action_map = maps()
+    stop = get_stop([Converged(tolerance=0), Budget(.2)])
+    assert isinstance(stop, AnyOf)
+
+    used = learn(10**7, kuhn, 2, node_map, action_map, stop=stop)
+    assert used < 10**7 and isinstance(stop.reason, Budget), stop.reason
+
+    assert learn(300, kuhn, 2, node_map, action_map) == 300
+
+
+def test_search_stops():
+    np.random.seed(0)
+    node_map, action_map = maps()
+    learn(1000, leduc, 3, node_map, action_map)
+    state = State(leduc[:3], 2, leduc_eval).take('C', deep=True).take('C', deep=True)
+
+    search = Search(state, node_map, action_map, leduc, 3, stop=Budget(.3))
+    search.search()
+    assert 0 < search.iterations < 1000, search.iterations
+
+    search = FullWidthSearch(state, node_map, action_map, leduc, 3, iterations=1000,
+                             stop=Converged(tolerance=5e-3, interval=10))
+    solved = search.search()
+    assert 0 < search.iterations < 1000 and search.iterations % 10 == 0, search.iterations
+    assert np.isclose(sum(solved[0][state.info_set()].avg_strategy().values()), 1)
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+
+from leduc.table import DiskTable
+from leduc.monte import learn
+from leduc.card import Card
+
+leduc = [Card(14, 1), Card(13, 1), Card(12, 1), Card(14, 2), Card(13, 2), Card(12, 2)]
+
+
+def train(node_map, iterations=300):
+    np.random.seed(0)
+    action_map = {i: {} for i in range(2)}
+    learn(iterations, leduc, 3, node_map, action_map, rule='cfr')
+    return action_map
+
+
+def test_matches_in_memory(tmp_path):
+    memory = {i: {} for i in range(2)}
+    train(memory)
+
+    disk = DiskTable(str(tmp_path / 'nodes.db'), 2, capacity=16, batch=8)
+    train(disk)
+    assert disk.misses > 0 and disk.writes > 0, (disk.misses, disk.writes)
+
+    for player in range(2):
+        assert set(disk[player]) == set(memory[player]), player
+        for info_set, node in memory[player].items():
+            stored = disk[player][info_set]
+            assert stored.regret_sum == node.regret_sum, f'{info_set} {stored.regret_sum} {node.regret_sum}'
+            assert stored.strategy_sum == node.strategy_sum, f'{info_set} {stored.strategy_sum}'
+    disk.close()
+
+
+def test_pinned_nodes_survive_eviction(tmp_path):
+    # with room for two nodes, a tree walk evicts its own ancestors before updating them
+    memory = {i: {} for i in range(2)}
+    train(memory, 100)
+    with DiskTable(str(tmp_path / 'nodes.db'), 2, capacity=2, batch=1) as disk:
+        train(disk, 100)
+        for info_set, node in memory[0].items():
+            assert disk[0][info_set].regret_sum == node.regret_sum, info_set
+
+    from leduc.node import MNode as Node
+    with DiskTable(str(tmp_path / 'pins.db'), 1, capacity=1, batch=1) as disk:
+        with disk.pin():
+            held = disk[0]['a'] = Node(['C'])
+            disk[0]['b'] = Node(['C'])
+            held.regret_sum['C'] = 5
+        assert disk[0]['a'].regret_sum['C'] == 5
+
+
+def test_reopen(tmp_path):
+    path = str(tmp_path / 'nodes.db')
+    with DiskTable(path, 2, capacity=16, batch=8) as disk:
+        train(disk, 100)
+        expected = {info_set: dict(disk[0][info_set].strategy_sum) for info_set in disk[0]}
+
+    assert os.path.getsize(path) > 0
+    with DiskTable(path, 2, capacity=16) as disk:
+        assert len(disk[0]) == len(expected)
+        for info_set, strategy_sum in expected.items():
+            assert disk[0][info_set].strategy_sum == strategy_sum, info_set
+
+        info_set = next(iter(expected))
+        del disk[0][info_set]
+        assert info_set not in disk[0]
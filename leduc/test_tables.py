@@ -0,0 +1,69 @@
+import time
+import asyncio
+import numpy as np
+
+from copy import deepcopy
+from functools import partial
+
+from leduc.tables import Engine, Table, run_tables, _search
+from leduc.match import ReplayPolicy, UniformPolicy
+from leduc.resolve import FullWidthSearch
+
+np.random.seed(0)
+
+
+def test_run_tables(blueprint):
+    cards, node_map, action_map = blueprint
+    opponents = [UniformPolicy(), ReplayPolicy([['C', 'C'], ['2R', '4R']])]
+    report = run_tables(node_map, action_map, cards, 3, opponents, 24, concurrency=8,
+                        search=FullWidthSearch, workers=2)
+
+    assert report.hands == 24, report
+    assert report.decisions > 0 and len(report.searches) > 0, report
+    assert report.timeouts == 0, report
+    assert report.hands_per_sec > 0, report
+    assert set(report.summary()) >= {'hands_per_sec', 'searches', 'timeouts'}, report.summary()
+
+
+def test_off_tree_search_is_private(blueprint):
+    cards, node_map, action_map = blueprint
+    before = {p: {k: list(v['actions']) for k, v in action_map[p].items()} for p in action_map}
+    engine = Engine(node_map, action_map, cards, 3, search=FullWidthSearch, workers=1)
+    try:
+        table = Table(engine, cards[:3], ReplayPolicy([['9R']]), seat=0)
+        table.state.take('C')
+        table.abstract.take('C')
+        asyncio.run(table.observe('9R'))
+    finally:
+        engine.close()
+
+    assert table.off_tree and len(table.searches) == 1, table.off_tree
+    assert '9R' in str(table.abstract), table.abstract
+    after = {p: {k: list(v['actions']) for k, v in action_map[p].items()} for p in action_map}
+    assert after == before, 'the shared action map changed'
+
+
+def test_time_limit(blueprint):
+    cards, node_map, action_map = blueprint
+    report = run_tables(node_map, action_map, cards, 3, [ReplayPolicy([['C', 'C', 'C']])], 6,
+                        time_limit=1e-6, search=FullWidthSearch, workers=1)
+
+    assert report.hands == 6, report
+    assert report.timeouts > 0 and len(report.searches) == 0, report
+
+
+def test_time_limit_frees_worker(blueprint):
+    # a search far longer than the bank stops itself instead of holding the only worker
+    cards, node_map, action_map = blueprint
+    slow = partial(FullWidthSearch, iterations=10**6)
+    engine = Engine(node_map, action_map, cards, 3, search=slow, workers=1)
+    try:
+        table = Table(engine, cards[:3], ReplayPolicy([['C']]), seat=0, time_limit=.5)
+        asyncio.run(table.search())
+        assert table.timeouts == 1 and len(table.searches) <= 1, (table.searches, table.timeouts)
+
+        job = engine.pool.submit(_search, deepcopy(table.root), [], time.time() + 1)
+        policy, finished = job.result(timeout=60)
+        assert policy is not None and not finished, (policy, finished)
+    finally:
+        engine.close()
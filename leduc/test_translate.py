@@ -0,0 +1,34 @@
+import numpy as np
+
+from leduc.translate import pot_fraction, pseudo_harmonic, translate
+from leduc.hand_eval import leduc_eval
+from leduc.card import Card
+from leduc.state import Leduc as State
+
+np.random.seed(0)
+
+
+def test_pseudo_harmonic():
+    assert np.isclose(pseudo_harmonic(.5, .5, 1), 1)
+    assert np.isclose(pseudo_harmonic(1, .5, 1), 0)
+    assert 0 < pseudo_harmonic(.75, .5, 1) < .5, pseudo_harmonic(.75, .5, 1)
+
+
+def test_translate():
+    cards = [Card(14, 1), Card(13, 1), Card(12, 1)]
+    state = State(cards, 2, leduc_eval)
+
+    assert pot_fraction(state, 2) == 1
+
+    action, error = translate(state, '3R', state, ['F', 'C', '2R'])
+    assert action == '2R' and np.isclose(error, .5), f'{action} {error}'
+
+    counts = {'2R': 0, '4R': 0}
+    for _ in range(2000):
+        action, error = translate(state, '3R', state, ['F', 'C', '2R', '4R'])
+        counts[action] += 1
+    expected = pseudo_harmonic(1.5, 1, 2)
+    assert abs(counts['2R'] / 2000 - expected) < .05, f'{counts} {expected}'
+    assert np.isclose(error, .5), error
+
+    assert translate(state, '3R', state, ['F', 'C']) == (None, float('inf'))
@@ -0,0 +1,51 @@
+import numpy as np
+
+from bisect import bisect_right
+
+
+def raise_size(action):
+    return int(action[:-1])
+
+
+def pot_fraction(state, amount):
+    """A raise of `amount` chips as a fraction of the pot once the raiser has called."""
+    player = state.players[state.turn]
+    call = max(state.players).bets - player.bets
+    return amount / (sum(state.players) + call)
+
+
+def pseudo_harmonic(x, a, b):
+    """Probability of mapping a bet of `x` onto the smaller size `a`, a <= x <= b.
+
+    Sizes are pot fractions (Ganzfried & Sandholm, 2013).
+    """
+    return (b - x) * (1 + a) / ((b - a) * (1 + x))
+
+
+def translate(state, action, abstract, actions):
+    """Map an off-tree raise in `state` onto one of the raises in `actions`.
+
+    `abstract` is the matching state inside the tree, whose pot can differ
+    from the real one after earlier translations. Returns the translated
+    action and the translation error, the distance in pot fractions to the
+    nearest abstract size. Returns (None, inf) when there is nothing to map to.
+    """
+    raises = sorted((a for a in actions if 'R' in a), key=raise_size)
+    if 'R' not in action or not raises:
+        return None, float('inf')
+
+    x = pot_fraction(state, raise_size(action))
+    sizes = [pot_fraction(abstract, raise_size(a)) for a in raises]
+
+    if x <= sizes[0]:
+        return raises[0], sizes[0] - x
+    if x >= sizes[-1]:
+        return raises[-1], x - sizes[-1]
+
+    k = bisect_right(sizes, x)
+    a, b = sizes[k - 1], sizes[k]
+    error = min(x - a, b - x)
+    if np.random.rand() < pseudo_harmonic(x, a, b):
+        return raises[k - 1], error
+
+    return raises[k], error
@@ -1,25 +1,31 @@
 import numpy as np
 
-from itertools import permutations
-from tqdm import tqdm
+from leduc.iso import deals
+from leduc.snapshot import freeze
 
 def expected_utility(cards, num_cards, num_players,
-                     node_map, action_map):
+                     node_map, action_map, canonical=False):
     if len(cards) > 4:
         from leduc.state import Leduc as State
         from leduc.hand_eval import leduc_eval as eval
     else:
         from leduc.state import State
         from leduc.hand_eval import kuhn_eval as eval
+    from tqdm import tqdm
+
     cards = sorted(cards)
-    all_combos = [list(t) for t in set(permutations(cards, num_cards))]
+    all_combos, weights = deals(cards, num_cards, canonical)
+    if weights is None:
+        weights = np.full(len(all_combos), 1 / len(all_combos))
+    node_map = freeze(node_map)
 
     expected_utility = np.zeros(num_players)
-    for card in tqdm(all_combos, desc='calculating expected utility'):
-        hand = State(card, num_players, eval)
-        expected_utility += traverse_tree(hand, node_map, action_map)
+    for card, weight in tqdm(zip(all_combos, weights), total=len(all_combos),
+                             desc='calculating expected utility'):
+        hand = State(card, num_players, eval, canonical)
+        expected_utility += traverse_tree(hand, node_map, action_map) * weight
 
-    return expected_utility/len(all_combos)
+    return expected_utility
 
 
 def traverse_tree(hand, node_map, action_map):
@@ -32,9 +38,7 @@ def traverse_tree(hand, node_map, action_map):
 
     strategy = node.avg_strategy()
     util = np.zeros(len(node_map))
-    valid_actions = action_map[hand.turn][info_set]
-    if 'actions' in valid_actions:
-        valid_actions = valid_actions['actions']
+    valid_actions = action_map[hand.turn][str(hand)]['actions']
     for action in valid_actions:
         new_hand = hand.take(action, deep=True)
         util += traverse_tree(new_hand, node_map, action_map) * strategy[action]
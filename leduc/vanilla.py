@@ -2,48 +2,44 @@ import sys
 import json
 import numpy as np
 
-from itertools import permutations
 from tqdm import tqdm
 from leduc.best_response import exploitability
 from leduc.node import Node
+from leduc.iso import deals
+from leduc.public import get_node
 from leduc.card import Card
+from leduc.rules import CFR, get_rule
 from leduc.util import expected_utility
 
 
-def learn(iterations, cards, num_cards, node_map, action_map):
+def learn(iterations, cards, num_cards, node_map, action_map, rule=None,
+          canonical=False):
     if len(cards) > 4:
         from leduc.state import Leduc as State
         from leduc.hand_eval import leduc_eval as eval
     else:
         from leduc.state import State
         from leduc.hand_eval import kuhn_eval as eval
-    all_combos = [list(t) for t in set(permutations(cards, num_cards))]
+    rule = get_rule(rule) or CFR()
+    all_combos, weights = deals(cards, num_cards, canonical)
     num_players = len(node_map)
-    for _ in tqdm(range(iterations), desc="learning"):
-        card = np.random.choice(len(all_combos))
-        state = State(all_combos[card], num_players, eval)
+    for i in tqdm(range(1, iterations + 1), desc="learning"):
+        card = np.random.choice(len(all_combos), p=weights)
+        state = State(all_combos[card], num_players, eval, canonical)
         probs = np.ones(num_players)
-        accumulate_regrets(state, node_map, action_map, probs)
+        accumulate_regrets(state, node_map, action_map, probs,
+                           weight=rule.strategy_weight(i), floor=rule.floor)
+        rule.discount(node_map, i)
 
 
-def accumulate_regrets(state, node_map, action_map, probs):
+def accumulate_regrets(state, node_map, action_map, probs, weight=1, floor=None):
     if state.terminal:
         util = state.utility()
         return util
 
-    info_set = state.info_set()
+    _, node, valid_actions = get_node(state, node_map, action_map, Node)
 
-    if info_set not in action_map[state.turn]:
-        action_map[state.turn][info_set] = state.valid_actions()
-
-    valid_actions = action_map[state.turn][info_set]
-
-    if info_set not in node_map[state.turn]:
-        node_map[state.turn][info_set] = Node(valid_actions)
-
-    node = node_map[state.turn][info_set]
-
-    strategy = node.strategy(probs[state.turn])
+    strategy = node.strategy(probs[state.turn] * weight)
 
     util = {a: 0 for a in valid_actions}
     node_util = np.zeros(len(node_map))
@@ -52,7 +48,7 @@ def accumulate_regrets(state, node_map, action_map, probs):
                     for i, p in enumerate(probs)]
         new_state = state.take(action, deep=True)
         returned = accumulate_regrets(new_state, node_map,
-                                      action_map, new_prob)
+                                      action_map, new_prob, weight, floor)
 
         util[action] = returned[state.turn]
         node_util += returned * strategy[action]
@@ -65,6 +61,8 @@ def accumulate_regrets(state, node_map, action_map, probs):
     for action in valid_actions:
         regret = util[action] - node_util[state.turn]
         node.regret_sum[action] += regret * reach_prob
+        if floor is not None and node.regret_sum[action] < floor:
+            node.regret_sum[action] = floor
 
     return node_util
 